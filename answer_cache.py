@@ -0,0 +1,123 @@
+"""
+Answers of recently shown questions kept in memory, so they are not read from (possibly slow, network-mounted)
+vault again. Entries are keyed by path and validated by file mtime: answer edited in Obsidian is read anew.
+Answer of just selected question is prefetched on background thread while user is recalling it.
+Large answers are neither cached nor prefetched: they are streamed from file in chunks.
+"""
+import codecs
+import io
+import locale
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+
+def _iter_blocks(fh: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    try:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # file system does not support mapping (or file shrank to nothing), plain reads will do
+        yield from iter(lambda: fh.read(chunk_size), b"")
+        return
+    with mm:
+        for offset in range(0, len(mm), chunk_size):
+            yield mm[offset:offset + chunk_size]
+
+
+def stream_file(path: Path, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Text of file in chunks, decoded the same way as open(path, "r").read() would do"""
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(locale.getpreferredencoding(False))(), translate=True)
+    with open(path, "rb") as fh:
+        for block in _iter_blocks(fh, chunk_size):
+            text = decoder.decode(block)
+            if text:
+                yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+class AnswerCache:
+    def __init__(self, max_size_chars: int = 1 << 22, max_answer_size_bytes: int = 1 << 18):
+        self._max_size_chars = max_size_chars
+        self._max_answer_size_bytes = max_answer_size_bytes
+        self._size_chars = 0
+        # least recently used entries first: path -> (mtime_ns, lines, size_chars)
+        self._entries: "OrderedDict[Path, Tuple[int, List[str], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._prefetch: Optional[Tuple[Path, threading.Thread]] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def prefetch(self, path: Path):
+        def read_quietly():
+            try:
+                if os.stat(path).st_size <= self._max_answer_size_bytes:
+                    self._read(path)
+            except OSError:
+                pass  # reported when answer is actually requested
+
+        # previous prefetch is not waited for, if it finishes it just warms cache up
+        thread = threading.Thread(target=read_quietly, daemon=True)
+        # started before published: cache shared by server users is loaded from other threads
+        thread.start()
+        self._prefetch = (path, thread)
+
+    def load(self, path: Path) -> List[str]:
+        """Raises OSError if file can not be read (e.g. it was renamed or removed)"""
+        self._wait_for_prefetch(path)
+        # stat is made in any case: it is cheaper than reading file and keeps stale answers from being shown
+        return self._read(path)
+
+    def stream(self, path: Path) -> Iterator[str]:
+        """Like load, but large answers are read chunk by chunk, so memory use does not depend on answer size"""
+        self._wait_for_prefetch(path)
+        if os.stat(path).st_size > self._max_answer_size_bytes:
+            yield from stream_file(path)
+        else:
+            yield "".join(self._read(path))
+
+    def _wait_for_prefetch(self, path: Path):
+        prefetch = self._prefetch
+        if prefetch is not None and prefetch[0] == path:
+            prefetch[1].join()
+            if self._prefetch is prefetch:
+                self._prefetch = None
+
+    def invalidate(self, paths: Iterable[Path]):
+        with self._lock:
+            for path in paths:
+                entry = self._entries.pop(path, None)
+                if entry is not None:
+                    self._size_chars -= entry[2]
+
+    def _read(self, path: Path) -> List[str]:
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime_ns:
+                self._entries.move_to_end(path)
+                return entry[1]
+        with open(path, "r") as fh:
+            lines = fh.readlines()
+        self._put(path, mtime_ns, lines)
+        return lines
+
+    def _put(self, path: Path, mtime_ns: int, lines: List[str]):
+        size_chars = sum(map(len, lines))
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._size_chars -= entry[2]
+            if size_chars > self._max_size_chars:
+                return
+            self._entries[path] = (mtime_ns, lines, size_chars)
+            self._size_chars += size_chars
+            while self._size_chars > self._max_size_chars:
+                _, (_, _, evicted_size_chars) = self._entries.popitem(last=False)
+                self._size_chars -= evicted_size_chars
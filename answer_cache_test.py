@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from answer_cache import AnswerCache, stream_file
+
+
+class AnswerCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.path = self.root / "q.md"
+        self.path.write_text("line 1\nline 2\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_answer_cached(self):
+        cache = AnswerCache()
+        lines = cache.load(self.path)
+        self.assertEqual(lines, ["line 1\n", "line 2\n"])
+        self.assertIs(cache.load(self.path), lines)
+
+    def test_modified_answer_read_again(self):
+        cache = AnswerCache()
+        cache.load(self.path)
+        self.path.write_text("edited\n")
+        mtime_ns = self.path.stat().st_mtime_ns
+        os.utime(self.path, ns=(mtime_ns, mtime_ns + 1))
+        self.assertEqual(cache.load(self.path), ["edited\n"])
+
+    def test_prefetched_answer_loaded(self):
+        cache = AnswerCache()
+        cache.prefetch(self.path)
+        self.assertEqual(cache.load(self.path), ["line 1\n", "line 2\n"])
+        self.assertEqual(len(cache), 1)
+
+    def test_removed_answer_raises(self):
+        cache = AnswerCache()
+        cache.prefetch(self.path)
+        cache.load(self.path)
+        self.path.unlink()
+        self.assertRaises(OSError, cache.load, self.path)
+        cache.prefetch(self.path)
+        self.assertRaises(OSError, cache.load, self.path)
+
+    def test_least_recently_used_evicted(self):
+        paths = [self.root / f"q{i}.md" for i in range(3)]
+        for path in paths:
+            path.write_text("0123456789")
+        cache = AnswerCache(max_size_chars=25)
+        cache.load(paths[0])
+        cache.load(paths[1])
+        cache.load(paths[0])
+        cache.load(paths[2])
+        self.assertEqual(list(cache._entries), [paths[0], paths[2]])
+        self.path.write_text("x" * 26)
+        cache.load(self.path)
+        self.assertEqual(list(cache._entries), [paths[0], paths[2]])
+        cache.invalidate([paths[0]])
+        self.assertEqual(list(cache._entries), [paths[2]])
+        self.assertEqual(cache._size_chars, 10)
+
+    def test_large_answer_streamed(self):
+        text = "ё\r\n" * 1000
+        self.path.write_bytes(text.encode("utf-8"))
+        cache = AnswerCache(max_answer_size_bytes=100)
+        cache.prefetch(self.path)
+        chunks = list(cache.stream(self.path))
+        self.assertEqual("".join(chunks), "ё\n" * 1000)
+        self.assertEqual(len(cache), 0)
+
+    def test_small_answer_streamed_from_cache(self):
+        cache = AnswerCache()
+        self.assertEqual(list(cache.stream(self.path)), ["line 1\nline 2\n"])
+        self.assertEqual(len(cache), 1)
+
+    def test_stream_file_chunks_split_characters(self):
+        self.path.write_bytes("ёёё\r\nё".encode("utf-8"))
+        self.assertEqual("".join(stream_file(self.path, chunk_size=3)), "ёёё\nё")
+        self.path.write_bytes(b"")
+        self.assertEqual(list(stream_file(self.path)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
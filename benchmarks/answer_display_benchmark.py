@@ -0,0 +1,68 @@
+"""
+Measures time to first written line, total time and peak memory of displaying answer depending on its size:
+line-by-line print of readlines() against streamed answer written in blocks.
+Usage: python -m benchmarks.answer_display_benchmark
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from answer_cache import AnswerCache
+from utils.pager import write_paged
+
+_SIZES_MB = (1, 10, 50)
+
+
+class _NullOutput:
+    def __init__(self):
+        self.first_write_ts = None
+        self._fh = open(os.devnull, "w")
+
+    def write(self, s):
+        if self.first_write_ts is None:
+            self.first_write_ts = time.perf_counter()
+        return self._fh.write(s)
+
+    def flush(self):
+        self._fh.flush()
+
+
+def _print_lines(path, out):
+    with open(path, "r") as fh:
+        for line in fh.readlines():
+            print(line, end="", file=out)
+
+
+def _write_streamed(path, out):
+    write_paged(AnswerCache().stream(path), out)
+
+
+def _measure(display, path):
+    out = _NullOutput()
+    tracemalloc.start()
+    start = time.perf_counter()
+    display(path, out)
+    total_secs = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out.first_write_ts - start, total_secs, peak_bytes
+
+
+def main():
+    print(f"{'answer':>7} {'method':>9} {'first line':>11} {'total':>9} {'peak memory':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "answer.md"
+        for size_mb in _SIZES_MB:
+            line = "Some line of long exported note, with **markdown** in it\n"
+            with open(path, "w") as fh:
+                fh.write(line * (size_mb * (1 << 20) // len(line)))
+            for name, display in (("print", _print_lines), ("streamed", _write_streamed)):
+                first_line_secs, total_secs, peak_bytes = _measure(display, path)
+                print(f"{size_mb:>5}MB {name:>9} {1000 * first_line_secs:>9.1f}ms {total_secs:>8.3f}s "
+                      f"{peak_bytes / (1 << 20):>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures cost of single grading operation depending on number of questions.
+Usage: python -m benchmarks.grading_benchmark
+"""
+import random
+import timeit
+from pathlib import Path
+
+from weight_handler import WeightHandler
+
+_SIZES = (1000, 10000, 100000)
+_REPEATS = 10000
+
+
+def _make_weight_handler(size):
+    question_uids_to_tags = {Path(f"vault/dir{i % 100}/question{i}.md"): "vault" for i in range(size)}
+    return WeightHandler(question_uids_to_tags, 1000000.0, None)
+
+
+def measure_grading(size, repeats=_REPEATS, seed=0):
+    wh = _make_weight_handler(size)
+    rng = random.Random(seed)
+    # questions are picked from the end of index - worst case for linear lookup
+    questions = [wh.question_uids[-1 - rng.randrange(min(size, 100))] for _ in range(repeats)]
+    graders = {
+        "success_on_question": lambda q: wh.success_on_question(q, 1000000.0),
+        "fail_on_question": wh.fail_on_question,
+        "ambiguity_on_question": wh.ambiguity_on_question,
+        "reask": wh.reask,
+    }
+    results = {}
+    for name, grade in graders.items():
+        it = iter(questions)
+        seconds = timeit.timeit(lambda: grade(next(it)), number=repeats)
+        results[name] = seconds / repeats
+    return results
+
+
+def main():
+    print(f"{'questions':>10} " + " ".join(f"{name:>22}" for name in measure_grading(10, 10)))
+    for size in _SIZES:
+        results = measure_grading(size)
+        print(f"{size:>10} " + " ".join(f"{1e6 * secs:>20.2f}us" for secs in results.values()))
+
+
+if __name__ == "__main__":
+    main()
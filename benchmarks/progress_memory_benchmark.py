@@ -0,0 +1,93 @@
+"""
+Compares memory taken by progress records stored as dicts and as ProgressRecord objects,
+and time of weights computation over them (per-question and, if NumPy is installed, vectorized).
+Usage: python -m benchmarks.progress_memory_benchmark
+"""
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+import weight_engine
+from progress_record import ProgressRecord
+from weight_handler import WeightHandler
+
+_SIZES = (10000, 100000)
+
+
+def _make_progress(size, seed=0):
+    rng = random.Random(seed)
+    return {
+        Path(f"vault/dir{i % 100}/question{i}.md"): {
+            "successes": rng.randrange(10),
+            "failures": rng.randrange(10),
+            "answered": rng.randrange(20),
+            "last_success_ts": 1000000.0 - rng.uniform(0, 1e7),
+            "is_hot": rng.random() < 0.1,
+        } for i in range(size)
+    }
+
+
+def _measure_memory(build):
+    tracemalloc.start()
+    try:
+        records = build()
+        return tracemalloc.get_traced_memory()[0], records
+    finally:
+        tracemalloc.stop()
+
+
+def _compute_weights_over_dicts(progress, now_ts=1000000.0):
+    weights = []
+    for info in progress.values():
+        delta_answers = info.get("successes", 0) - info.get("failures", 0)
+        delta_time_secs = now_ts - info.get("last_success_ts", now_ts)
+        recency_multiplier = 1 + sum([int(delta_time_secs > delta) for delta in WeightHandler._TIME_LIMITS])
+        weight = recency_multiplier * (1 + max(0, -delta_answers)) / (1.0 + max(0, delta_answers))
+        if info.get("is_hot", False):
+            weight = max(len(progress) / 4, 5 * weight, 5.0)
+        weights.append(weight)
+    return weights
+
+
+def _compute_weights_over_records(progress, now_ts=1000000.0):
+    weights = []
+    for info in progress.values():
+        delta_answers = (info.successes or 0) - (info.failures or 0)
+        last_success_ts = info.last_success_ts
+        delta_time_secs = now_ts - (now_ts if last_success_ts is None else last_success_ts)
+        recency_multiplier = 1 + sum([int(delta_time_secs > delta) for delta in WeightHandler._TIME_LIMITS])
+        weight = recency_multiplier * (1 + max(0, -delta_answers)) / (1.0 + max(0, delta_answers))
+        if info.is_hot:
+            weight = max(len(progress) / 4, 5 * weight, 5.0)
+        weights.append(weight)
+    return weights
+
+
+def _measure_time(compute, progress):
+    start = time.perf_counter()
+    compute(progress)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'questions':>10} {'dict bytes':>12} {'record bytes':>13} {'dict weights':>13} "
+          f"{'record weights':>15} {'vectorized':>11}")
+    for size in _SIZES:
+        dicts_bytes, dicts = _measure_memory(lambda: _make_progress(size))
+        records_bytes, records = _measure_memory(
+            lambda: {uid: ProgressRecord.from_dict(info) for uid, info in _make_progress(size).items()})
+        dicts_secs = _measure_time(_compute_weights_over_dicts, dicts)
+        records_secs = _measure_time(_compute_weights_over_records, records)
+        vectorized = "-"
+        if weight_engine.is_available():
+            vectorized_secs = _measure_time(
+                lambda p: weight_engine.compute_weights(list(p.values()), 1000000.0, WeightHandler._TIME_LIMITS, size),
+                records)
+            vectorized = f"{vectorized_secs:.3f}s"
+        print(f"{size:>10} {dicts_bytes // size:>10}/q {records_bytes // size:>11}/q {dicts_secs:>12.3f}s "
+              f"{records_secs:>14.3f}s {vectorized:>11}")
+
+
+if __name__ == "__main__":
+    main()
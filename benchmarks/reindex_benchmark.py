@@ -0,0 +1,32 @@
+"""
+Compares full rescan with rename-triggered incremental QuestionSelector.reload_index.
+Usage: python -m benchmarks.reindex_benchmark [files_count]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_vault import make_vault
+from question_selector import QuestionSelector
+
+
+def main():
+    files_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = make_vault(Path(tmp) / "vault", files_count)
+        start = time.perf_counter()
+        selector = QuestionSelector([vault], False, Path(tmp) / "save")
+        print(f"Initial scan of {files_count} files: {time.perf_counter() - start:.3f}s")
+        time.sleep(2.5)  # let directories leave "racy" window
+        selector.reload_index()
+        question = selector._wh.question_uids[0]
+        os.rename(question, question.with_name("renamed.md"))
+        start = time.perf_counter()
+        selector.reload_index()
+        print(f"Rename-triggered reload: {1000 * (time.perf_counter() - start):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Replays generated sessions through study loop states against synthetic vaults, as regression benchmark
+of the whole loop rather than of single operations.
+Usage: python -m benchmarks.replay_benchmark [--answers 1000000] [--sizes 1000 100000]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_vault import make_vault
+from headless_replay import SimulatedClock, generate_script, replay
+from question_selector import QuestionSelector
+
+_SIZES = (1000, 100000)
+_ANSWERS = 1000000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(_SIZES))
+    parser.add_argument("--answers", type=int, default=_ANSWERS)
+    parser.add_argument("--session_size", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"{'questions':>10} {'answers':>9} {'elapsed':>9} {'questions/s':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            vault = make_vault(Path(tmp) / "vault", size)
+            clock = SimulatedClock(time.time())
+            selector = QuestionSelector([vault], False, Path(tmp), session_size=args.session_size,
+                                        rng=random.Random(0), clock=clock)
+            results = replay(selector, generate_script(args.answers, random.Random(0)), clock)
+        print(f"{size:>10} {results['answers']:>9} {results['elapsed_secs']:>8.2f}s "
+              f"{results['questions_per_sec']:>12.0f}")
+        print(results["latency_report"])
+
+
+if __name__ == "__main__":
+    main()
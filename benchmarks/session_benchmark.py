@@ -0,0 +1,64 @@
+"""
+Measures per-question latency of drawing questions one at a time against serving them from planned sessions.
+Usage: python -m benchmarks.session_benchmark
+"""
+import random
+import time
+from pathlib import Path
+
+from session_queue import SessionQueue
+from weight_handler import WeightHandler
+
+_SIZES = (1000, 100000)
+_SESSION_SIZES = (20, 200)
+_QUESTIONS = 2000
+
+
+def _percentile(latencies, q):
+    return sorted(latencies)[int(q * (len(latencies) - 1))]
+
+
+def _make_weight_handler(size, seed=0):
+    rng = random.Random(seed)
+    question_uids_to_tags = {Path(f"vault/dir{i % 100}/question{i}.md"): "vault" for i in range(size)}
+    wh = WeightHandler(question_uids_to_tags, 1000000.0, None)
+    for uid in rng.sample(wh.question_uids, min(size, 100)):
+        wh.fail_on_question(uid)
+    return wh
+
+
+def _measure(next_question):
+    latencies = []
+    for _ in range(_QUESTIONS):
+        start = time.perf_counter()
+        next_question()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    print(f"{'questions':>10} {'mode':>12} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+    for size in _SIZES:
+        wh = _make_weight_handler(size)
+        rng = random.Random(0)
+        modes = {"one by one": lambda: wh.sample_question(rng)}
+        for session_size in _SESSION_SIZES:
+            queue = SessionQueue(rng)
+
+            def next_in_session(queue=queue, session_size=session_size):
+                question = queue.pop()
+                if question is None:
+                    queue.refill(wh.sample_distinct_questions(session_size, rng))
+                    question = queue.pop()
+                return question
+
+            modes[f"session {session_size}"] = next_in_session
+        for mode, next_question in modes.items():
+            latencies = _measure(next_question)
+            print(f"{size:>10} {mode:>12} " + " ".join(
+                f"{1e6 * secs:>7.1f}us" for secs in (sum(latencies) / len(latencies), _percentile(latencies, 0.5),
+                                                      _percentile(latencies, 0.99), max(latencies))))
+
+
+if __name__ == "__main__":
+    main()
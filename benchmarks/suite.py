@@ -0,0 +1,131 @@
+"""
+Times main operations of QuestionSelector on synthetic vaults of growing size and writes results as JSON,
+so they can be compared between commits. All timings are in seconds; per-operation timings are means.
+Usage: python -m benchmarks.suite [--sizes 1000 10000] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_vault import make_progress, make_vault, question_paths
+from progress_storage import PickleProgressStorage, SqliteProgressStorage
+from question_selector import QuestionSelector
+from vault_index import VaultIndex
+
+_SIZES = (1000, 10000, 100000, 1000000)
+_REPEATS = 1000
+# directories changed less than this ago are re-listed by every reload, see VaultIndex
+_RACY_WINDOW_SECS = 2.5
+
+
+def _time_once(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _time_repeated(fn, setup=None, repeats=_REPEATS):
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        timings.append(_time_once(fn))
+    timings.sort()
+    return {
+        "mean": statistics.fmean(timings),
+        "p50": timings[len(timings) // 2],
+        "p99": timings[int(0.99 * (len(timings) - 1))],
+    }
+
+
+def _make_save_dir(save_dir, question_uids, storage):
+    progress_data = make_progress(question_uids, time.time())
+    save_dir.mkdir(parents=True)
+    path_to_save_file = save_dir / "anki_progress.pkl"
+    if storage == "sqlite":
+        SqliteProgressStorage(path_to_save_file.with_suffix(".sqlite3")).save(progress_data)
+    else:
+        PickleProgressStorage(path_to_save_file).save(progress_data)
+
+
+def run_size(root, size, args):
+    vault = make_vault(root / "vault", size, answer_size_bytes=args.answer_size_bytes)
+    save_dir = root / "save"
+    _make_save_dir(save_dir, list(question_paths(vault, size)), args.storage)
+
+    def create_selector(rebuild_index):
+        return QuestionSelector([vault], False, save_dir, rebuild_index=rebuild_index,
+                                scan_workers=args.scan_workers, storage=args.storage)
+
+    results = {"startup_cold": _time_once(lambda: create_selector(True))}
+    selector = None
+
+    def create_warm_selector():
+        nonlocal selector
+        selector = create_selector(False)
+
+    results["startup_warm"] = _time_once(create_warm_selector)
+    results["load_next_question"] = _time_repeated(selector.load_next_question)
+    for name in ("success_on_current_question", "fail_on_current_question", "ambiguity_on_current_question"):
+        results[name] = _time_repeated(getattr(selector, name), setup=selector.load_next_question)
+    # reasks of the same question would multiply its weight until it overflows, so every one is of new question
+    results["reask_last_question"] = _time_repeated(selector.reask_last_question, setup=selector.load_next_question)
+    results["load_answer_for_current_question"] = _time_repeated(selector.load_answer_for_current_question)
+    results["get_statistics"] = _time_repeated(selector.get_statistics)
+    results["save_progress"] = _time_once(selector.save_progress)
+    time.sleep(_RACY_WINDOW_SECS)
+    selector.reload_index()
+    results["reload_index_unchanged"] = _time_once(selector.reload_index)
+    question = next(question_paths(vault, size))
+    os.rename(question, question.with_name("renamed.md"))
+    results["reload_index_after_rename"] = _time_once(selector.reload_index)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(_SIZES))
+    parser.add_argument("--answer_size_bytes", type=int, default=None)
+    parser.add_argument("--storage", choices=("pickle", "sqlite"), default="pickle")
+    parser.add_argument("--scan_workers", type=int, default=VaultIndex.DEFAULT_SCAN_WORKERS)
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "settings": vars(args),
+        "results": {},
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            report["results"][str(size)] = run_size(Path(tmp), size, args)
+        print(f"{size} questions: " + ", ".join(
+            f"{name} {result['mean'] if isinstance(result, dict) else result:.6f}s"
+            for name, result in report["results"][str(size)].items()))
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from weight_handler import WeightHandler
+
+
+def question_paths(root: Path, files_count: int, files_per_dir: int = 100, depth: int = 3) -> Iterator[Path]:
+    """Paths of questions created by make_vault, equal to question uids QuestionSelector assigns to them"""
+    for i in range(files_count):
+        dir_idx = i // files_per_dir
+        parts = [f"d{(dir_idx >> (4 * level)) % 16}" for level in range(depth)]
+        yield Path(os.path.join(root, *parts, f"leaf{dir_idx}", f"question {i}.md"))
+
+
+def make_vault(root: Path, files_count: int, files_per_dir: int = 100, depth: int = 3,
+               answer_size_bytes: Optional[int] = None) -> Path:
+    """
+    Creates directory tree with files_count .md files spread over nested directories.
+    Answers are one short line unless answer_size_bytes is given.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    line = "Some line of answer, with **markdown** in it\n"
+    for i, path in enumerate(question_paths(root, files_count, files_per_dir, depth)):
+        if i % files_per_dir == 0:
+            os.makedirs(path.parent, exist_ok=True)
+        with open(path, "w") as fh:
+            if answer_size_bytes is None:
+                fh.write(f"Answer to question {i}\n")
+            else:
+                fh.write((line * (answer_size_bytes // len(line) + 1))[:answer_size_bytes])
+    return root
+
+
+def make_progress(question_uids: List, now_ts: float, answered_fraction: float = 0.5, seed: int = 0) -> Dict:
+    """Progress data as if answered_fraction of questions was answered in previous sessions over last months"""
+    rng = random.Random(seed)
+    progress = {}
+    for uid in question_uids:
+        if rng.random() >= answered_fraction:
+            continue
+        successes = rng.randrange(10)
+        failures = rng.randrange(5)
+        info = {
+            "successes": successes,
+            "failures": failures,
+            "answered": successes + failures + rng.randrange(3),
+            "is_hot": rng.random() < 0.05,
+        }
+        if successes:
+            info["last_success_ts"] = now_ts - rng.uniform(0, 90 * 86400)
+        progress[uid] = info
+    return {"version": WeightHandler.CURRENT_PROGRESS_DATA_VERSION, "progress": progress}
@@ -0,0 +1,156 @@
+"""
+Drives study loop states with commands of a script instead of keyboard, with their output suppressed.
+Script is JSONL, one {"command": "c", "think_secs": 4.2} per line: it can be recorded with
+obsidian_anki.py --record_script or generated. Time spent thinking advances simulated clock
+instead of being waited out (unless --realtime), so weights develop as in real session at full speed.
+Usage: python headless_replay.py --questions_dirs PATH (--script PATH | --answers N) [--seed S]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, TextIO, Tuple
+
+from question_selector import QuestionSelector
+from states.state_enum import State
+from states.state_machine import create_state_machine
+from utils.latency_collector import LatencyCollector
+from utils.user_input import set_input, set_latency_collector
+
+_STATISTICS_EVERY = 50
+
+
+class ScriptEnded(Exception):
+    pass
+
+
+class SimulatedClock:
+    def __init__(self, now_ts: float):
+        self.now_ts = now_ts
+
+    def __call__(self) -> float:
+        return self.now_ts
+
+    def advance(self, secs: float):
+        self.now_ts += secs
+
+
+def read_script(fh: TextIO) -> Iterator[Tuple[str, float]]:
+    for line in fh:
+        if line.strip():
+            step = json.loads(line)
+            yield step["command"], step.get("think_secs", 0.0)
+
+
+def generate_script(answers: int, rng: random.Random, success_rate: float = 0.7,
+                    think_secs: float = 5.0) -> Iterator[Tuple[str, float]]:
+    """Every question is answered and graded; statistics are looked at now and then"""
+    for i in range(answers):
+        yield "c", rng.expovariate(1 / think_secs)
+        r = rng.random()
+        yield "y" if r < success_rate else "n" if r < (1 + success_rate) / 2 else "s", 1.0
+        if (i + 1) % _STATISTICS_EVERY == 0:
+            yield from (("s", 1.0), ("s", 2.0), ("c", 1.0))
+
+
+def replay_input(steps: Iterable[Tuple[str, float]], clock: SimulatedClock,
+                 realtime: bool = False) -> Callable[[str], str]:
+    steps = iter(steps)
+
+    def replayed_input(prompt: str = "") -> str:
+        try:
+            command, think_secs = next(steps)
+        except StopIteration:
+            raise ScriptEnded() from None
+        if realtime:
+            time.sleep(think_secs)
+        clock.advance(think_secs)
+        return command
+
+    return replayed_input
+
+
+def recording_input(fh: TextIO, input_fn: Callable[[str], str] = input) -> Callable[[str], str]:
+    """input() which also writes every command and time spent thinking on it to script"""
+    def recorded_input(prompt: str = "") -> str:
+        start = time.monotonic()
+        command = input_fn(prompt)
+        fh.write(json.dumps({"command": command, "think_secs": round(time.monotonic() - start, 3)}) + "\n")
+        return command
+
+    return recorded_input
+
+
+def replay(selector: QuestionSelector, steps: Iterable[Tuple[str, float]], clock: SimulatedClock,
+           realtime: bool = False) -> Dict:
+    """Selector should be created with the same clock"""
+    latency_collector = LatencyCollector()
+    state_machine = create_state_machine(selector, latency_collector)
+    set_latency_collector(latency_collector)
+    set_input(replay_input(steps, clock, realtime))
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            state_machine.start_main_loop()
+    except ScriptEnded:
+        pass
+    finally:
+        elapsed_secs = time.perf_counter() - start
+        set_input(None)
+        set_latency_collector(None)
+    latency = latency_collector.get_report()
+    questions = latency.get("state", {}).get(State.QUESTION_REQUIRED.name, {}).get("count", 0)
+    return {
+        "elapsed_secs": elapsed_secs,
+        "questions": questions,
+        "answers": selector.get_session_statistics()["answered"],
+        "questions_per_sec": questions / elapsed_secs if elapsed_secs > 0 else 0.0,
+        "latency": latency,
+        "latency_report": latency_collector.format_report(),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    script = parser.add_mutually_exclusive_group(required=True)
+    script.add_argument("--script", metavar="PATH", help="JSONL script to replay")
+    script.add_argument("--answers", metavar="N", type=int, help="Replay generated script of N answers")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of question draws and generated script")
+    parser.add_argument("--realtime", action="store_true", help="Actually wait while simulated user thinks")
+    parser.add_argument("--session_size", metavar="N", type=int, default=0)
+    parser.add_argument("--cooldown", metavar="K", type=int, default=1)
+    parser.add_argument("--save_data_dir", metavar="PATH", default=None,
+                        help="Progress to start from (default - empty progress in temporary directory)")
+    parser.add_argument("--report", metavar="PATH", default=None, help="Write results to this JSON file")
+    parser.add_argument("--questions_dirs", metavar="PATH", nargs="+", required=True)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        save_data_dir = Path(args.save_data_dir) if args.save_data_dir is not None else Path(tmp)
+        clock = SimulatedClock(time.time())
+        selector = QuestionSelector([Path(p) for p in args.questions_dirs], False, save_data_dir,
+                                    session_size=args.session_size, cooldown=args.cooldown,
+                                    rng=random.Random(args.seed), clock=clock)
+        with contextlib.ExitStack() as stack:
+            if args.script is not None:
+                steps = read_script(stack.enter_context(open(args.script)))
+            else:
+                steps = generate_script(args.answers, random.Random(args.seed))
+            results = replay(selector, steps, clock, args.realtime)
+    print(f"{results['answers']} answers to {results['questions']} questions in {results['elapsed_secs']:.2f}s: "
+          f"{results['questions_per_sec']:.0f} questions/s")
+    print(results.pop("latency_report"))
+    if args.report is not None:
+        with open(args.report, "w") as fh:
+            json.dump(dict(results, settings=vars(args)), fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import io
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from headless_replay import SimulatedClock, generate_script, read_script, recording_input, replay
+from question_selector import QuestionSelector
+
+
+class HeadlessReplayTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.vault = self.root / "vault"
+        self.vault.mkdir()
+        for i in range(20):
+            (self.vault / f"q{i}.md").write_text(f"answer {i}\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _replay(self, steps, seed=0):
+        clock = SimulatedClock(1000000.0)
+        selector = QuestionSelector([self.vault], False, self.root, rng=random.Random(seed), clock=clock)
+        return selector, replay(selector, steps, clock)
+
+    def test_generated_script_replayed(self):
+        selector, results = self._replay(generate_script(120, random.Random(0)))
+        self.assertEqual(results["answers"], 120)
+        # every 50th answer is followed by statistics, question shown after them is skipped
+        self.assertEqual(results["questions"], 123)
+        self.assertEqual(results["latency"]["state"]["ANSWER_DISPLAYED"]["count"], 120)
+        self.assertEqual(results["latency"]["state"]["STATISTICS_SHOWN"]["count"], 4)
+        self.assertGreater(results["questions_per_sec"], 0)
+
+    def test_replay_is_reproducible(self):
+        histories = []
+        for _ in range(2):
+            selector, _ = self._replay(generate_script(30, random.Random(1)), seed=1)
+            histories.append(list(selector.history))
+        self.assertEqual(histories[0], histories[1])
+
+    def test_recorded_script_replayed(self):
+        commands = iter(["c", "y", "c", "n", "x"])
+        script = io.StringIO()
+        record = recording_input(script, lambda prompt: next(commands))
+        for _ in range(5):
+            record("")
+        self.assertEqual([json.loads(line)["command"] for line in script.getvalue().splitlines()],
+                         ["c", "y", "c", "n", "x"])
+        script.seek(0)
+        selector, results = self._replay(read_script(script))
+        self.assertEqual(selector.get_session_statistics(), {"successes": 1, "failures": 1, "answered": 2})
+        self.assertEqual(results["questions"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,15 @@
 import argparse
+import asyncio
 from pathlib import Path
 
-from states.on_answer_displayed import get_on_answer_displayed
-from states.on_question_displayed import get_on_question_displayed
-from states.on_question_required import get_on_question_required
-from states.on_statistics_shown import get_on_statistics_shown
 from states.state_enum import State
-from utils.lite_state_machine import LiteStateMachine
+from states.state_machine import create_state_machine
+from utils.latency_collector import LatencyCollector
+from utils.user_input import set_input, set_latency_collector
+from headless_replay import recording_input
 from question_selector import QuestionSelector
+from study_server import StudyServer
+from vault_index import VaultIndex
 
 
 def parse_args():
@@ -15,10 +17,91 @@ def parse_args():
     parser.add_argument("--prune",
                         help="Remove old records from progress data when encountered",
                         action="store_true")
+    parser.add_argument("--journal",
+                        help="Append every answer to journal next to progress data, "
+                             "so progress survives crash or closed terminal",
+                        action="store_true")
+    parser.add_argument("--autosave_every",
+                        metavar="N",
+                        help="Save progress in background after every N answers (0 - only on exit)",
+                        type=int,
+                        default=0)
+    parser.add_argument("--session_size",
+                        metavar="N",
+                        help="Plan sessions of N distinct questions drawn at once "
+                             "(questions failed during session may be asked again in it); 0 - draw one at a time",
+                        type=int,
+                        default=0)
+    parser.add_argument("--cooldown",
+                        metavar="K",
+                        help="Do not ask any of K last shown questions again",
+                        type=int,
+                        default=1)
+    parser.add_argument("--tags",
+                        metavar="TAG",
+                        help="Ask only questions from these tags, i.e. names of questions directories "
+                             "(can be changed in statistics menu)",
+                        nargs="+",
+                        default=None)
+    parser.add_argument("--pager",
+                        help="Show long answers one screen at a time",
+                        action="store_true")
+    parser.add_argument("--async_runner",
+                        help="Run on asyncio event loop, so progress is autosaved and questions index is refreshed "
+                             "in background while waiting for input",
+                        action="store_true")
+    parser.add_argument("--autosave_secs",
+                        metavar="SECS",
+                        help="With --async_runner or --serve: save changed progress in background every SECS seconds",
+                        type=float,
+                        default=60.0)
+    parser.add_argument("--refresh_index_secs",
+                        metavar="SECS",
+                        help="With --async_runner or --serve: pick up added, removed and renamed questions "
+                             "every SECS seconds (0 - never)",
+                        type=float,
+                        default=60.0)
+    parser.add_argument("--watch",
+                        help="Watch questions directories (inotify on Linux, polling elsewhere), "
+                             "so added, removed and renamed questions are picked up on next question",
+                        action="store_true")
+    parser.add_argument("--serve",
+                        metavar="PORT",
+                        help="Serve questions to several users over HTTP/JSON instead of asking them here, "
+                             "see study_server.py",
+                        type=int,
+                        default=None)
+    parser.add_argument("--host",
+                        help="With --serve: address to listen on",
+                        default="127.0.0.1")
+    parser.add_argument("--latency_report",
+                        metavar="PATH",
+                        help="Measure latency of every state and transition (user wait apart from compute time), "
+                             "show it from statistics menu and write it to this JSON file on exit",
+                        default=None)
+    parser.add_argument("--record_script",
+                        metavar="PATH",
+                        help="Record commands and time spent thinking on them to this JSONL file, "
+                             "so session can be replayed by headless_replay.py",
+                        default=None)
     parser.add_argument("--save_data_dir",
                         metavar="PATH",
                         help="Save and locate statistics save file in this directory",
                         default=None)
+    parser.add_argument("--storage",
+                        help="Format of progress data: single pickle file or SQLite database "
+                             "(imports pickled progress on first run)",
+                        choices=("pickle", "sqlite"),
+                        default="pickle")
+    parser.add_argument("--rebuild_index",
+                        help="Ignore saved questions index and scan questions directories from scratch",
+                        action="store_true")
+    parser.add_argument("--scan_workers",
+                        metavar="N",
+                        help="Number of threads listing questions directories concurrently "
+                             "(speeds up network-mounted vaults)",
+                        type=int,
+                        default=VaultIndex.DEFAULT_SCAN_WORKERS)
     parser.add_argument("--questions_dirs",
                         metavar="PATH",
                         help="Directories to be recursively searched for .md files",
@@ -37,33 +120,98 @@ def validate_and_convert_args(args):
             raise OSError(f"Path does not exist: {dirpath}")
         if not dirpath.is_dir():
             raise OSError(f"Path is not a directory: {str(dirpath)}")
+    if args.scan_workers < 1:
+        raise ValueError(f"scan_workers should be positive: {args.scan_workers}")
+    if args.cooldown < 0:
+        raise ValueError(f"cooldown should not be negative: {args.cooldown}")
+    if args.session_size < 0:
+        raise ValueError(f"session_size should not be negative: {args.session_size}")
+    if args.autosave_secs <= 0:
+        raise ValueError(f"autosave_secs should be positive: {args.autosave_secs}")
+    if args.refresh_index_secs < 0:
+        raise ValueError(f"refresh_index_secs should not be negative: {args.refresh_index_secs}")
     try:
         args.save_data_dir = Path(args.save_data_dir) if args.save_data_dir is not None else None
     except Exception as e:
         raise ValueError(f"Could not convert save_data_dir to path: {args.save_data_dir}") from e
 
 
+def add_background_tasks(state_machine, qselector, args):
+    def autosave(state, context):
+        qselector.autosave()
+
+    def refresh_index(state, context):
+        # tasks run while user input is awaited; question on screen is kept, even if its file was renamed
+        if state in (State.QUESTION_DISPLAYED, State.ANSWER_DISPLAYED, State.STATISTICS_SHOWN):
+            qselector.reload_index(keep_current_question=True)
+
+    state_machine.add_background_task(autosave, args.autosave_secs)
+    if args.refresh_index_secs > 0:
+        state_machine.add_background_task(refresh_index, args.refresh_index_secs)
+
+
+def serve(args):
+    try:
+        server = StudyServer(args.paths_to_questions, args.save_data_dir or Path("."), args.scan_workers,
+                             args.storage, args.session_size, args.cooldown)
+    except RuntimeError as e:
+        print(f"{str(e)}; specified paths: {', '.join(args.questions_dirs)}")
+        return -1
+    try:
+        asyncio.run(server.run(args.host, args.serve, args.autosave_secs, args.refresh_index_secs))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
 def main():
     args = parse_args()
     validate_and_convert_args(args)
+    if args.serve is not None:
+        return serve(args)
 
     try:
-        qselector = QuestionSelector(args.paths_to_questions, args.prune, args.save_data_dir)
+        qselector = QuestionSelector(args.paths_to_questions, args.prune, args.save_data_dir,
+                                     args.rebuild_index, args.scan_workers, args.journal,
+                                     args.storage, args.autosave_every, args.session_size,
+                                     args.cooldown, args.tags, watch=args.watch)
     except RuntimeError as e:
         print(f"{str(e)}; specified paths: {', '.join(args.questions_dirs)}")
         return -1
-    state_machine = LiteStateMachine(State.QUESTION_REQUIRED)
-    state_machine.set_head_step_cb(lambda s, c: s != State.EXITING)
-    state_machine.set_on_state_cb(State.QUESTION_REQUIRED, get_on_question_required(qselector))
-    state_machine.set_on_state_cb(State.QUESTION_DISPLAYED, get_on_question_displayed(qselector))
-    state_machine.set_on_state_cb(State.ANSWER_DISPLAYED, get_on_answer_displayed(qselector))
-    state_machine.set_on_state_cb(State.STATISTICS_SHOWN, get_on_statistics_shown(qselector))
-    state_machine.set_on_state_cb(State.EXITING, lambda s, c: exit(0))
-    state_machine.set_default_on_transition_cb(lambda tup, c: None)
-
-    state_machine.start_main_loop()
-
-    qselector.save_progress()
+    except ValueError as e:
+        # unknown --tags
+        print(f"{str(e)}; tags are names of questions directories having questions: "
+              f"{', '.join(sorted({p.stem for p in args.paths_to_questions}))}")
+        return -1
+    latency_collector = LatencyCollector() if args.latency_report is not None else None
+    set_latency_collector(latency_collector)
+    state_machine = create_state_machine(qselector, latency_collector, args.pager, args.async_runner)
+    if args.async_runner:
+        add_background_tasks(state_machine, qselector, args)
+    script_fh = None
+    if args.record_script is not None:
+        try:
+            script_fh = open(args.record_script, "w")
+        except OSError:
+            print(f"WARNING: Could not record script to {args.record_script}")
+        else:
+            set_input(recording_input(script_fh))
+
+    try:
+        state_machine.start_main_loop()
+    finally:
+        # progress is saved whatever stopped the loop
+        if script_fh is not None:
+            set_input(None)
+            script_fh.close()
+        qselector.close()
+        qselector.save_progress()
+        qselector.save_index()
+    if latency_collector is not None:
+        try:
+            latency_collector.dump(args.latency_report)
+        except OSError:
+            print(f"WARNING: Could not write latency report to {args.latency_report}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""
+Append-only log of answers given since last progress checkpoint.
+Journal is split into generations: file "<save file stem>.journal.<generation>" holds answers
+that are not yet included into checkpoint saved with "journal_generation" <= generation.
+Every record has fixed size: event (1 byte), digest of question uid (16 bytes), timestamp (8 bytes).
+"""
+import hashlib
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from weight_handler import ProgressEvent
+
+
+class ProgressJournal:
+    _RECORD = struct.Struct("<B16sd")
+
+    def __init__(self, path_to_save_file: Path):
+        self._dir = path_to_save_file.parent
+        self._prefix = f"{path_to_save_file.stem}.journal."
+        self._fh = None
+        self.generation: Optional[int] = None
+        self.size = 0
+
+    @staticmethod
+    def uid_digest(uid) -> bytes:
+        return hashlib.blake2b(str(uid).encode("utf-8"), digest_size=16).digest()
+
+    def _path(self, generation: int) -> Path:
+        return self._dir.joinpath(f"{self._prefix}{generation}")
+
+    def existing_generations(self) -> List[int]:
+        generations = []
+        for path in self._dir.glob(f"{self._prefix}*"):
+            suffix = path.name[len(self._prefix):]
+            if suffix.isdigit():
+                generations.append(int(suffix))
+        return sorted(generations)
+
+    def read_events(self, from_generation: int, known_uids: Iterable) -> Iterator[Tuple[ProgressEvent, object, float]]:
+        """Yields events from journals not included into checkpoint; records of unknown questions are skipped"""
+        generations = [g for g in self.existing_generations() if g >= from_generation]
+        if not generations:
+            return
+        uids_by_digest: Dict[bytes, object] = {ProgressJournal.uid_digest(uid): uid for uid in known_uids}
+        for generation in generations:
+            with open(self._path(generation), "rb") as fh:
+                data = fh.read()
+            # trailing partial record may be left by crash in the middle of write
+            usable_size = len(data) - len(data) % ProgressJournal._RECORD.size
+            for event, digest, ts in ProgressJournal._RECORD.iter_unpack(data[:usable_size]):
+                uid = uids_by_digest.get(digest)
+                if uid is not None:
+                    yield ProgressEvent(event), uid, ts
+
+    def open(self, generation: int):
+        self.close()
+        self._fh = open(self._path(generation), "ab")
+        self.generation = generation
+        self.size = self._fh.tell()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def append(self, event: ProgressEvent, uid, ts: float):
+        record = ProgressJournal._RECORD.pack(event, ProgressJournal.uid_digest(uid), ts)
+        self._fh.write(record)
+        # flushing to OS is enough to survive crash of process or closed terminal
+        self._fh.flush()
+        self.size += len(record)
+
+    def remove_older_than(self, generation: int):
+        for g in self.existing_generations():
+            if g < generation:
+                try:
+                    self._path(g).unlink()
+                except OSError:
+                    print(f"WARNING: Could not remove journal {self._path(g)}")
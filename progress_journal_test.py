@@ -0,0 +1,80 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from progress_journal import ProgressJournal
+from question_selector import QuestionSelector
+from weight_handler import ProgressEvent
+
+
+class ProgressJournalTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.path_to_save_file = self.root / "anki_progress.pkl"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_events_read_back(self):
+        journal = ProgressJournal(self.path_to_save_file)
+        journal.open(0)
+        journal.append(ProgressEvent.SUCCESS, Path("q1.md"), 100.5)
+        journal.append(ProgressEvent.FAILURE, Path("q2.md"), 0.0)
+        journal.append(ProgressEvent.REASK, Path("q1.md"), 0.0)
+        journal.close()
+        self.assertEqual(journal.size, 75)
+        events = list(ProgressJournal(self.path_to_save_file).read_events(0, [Path("q1.md"), Path("q2.md")]))
+        self.assertEqual(events, [
+            (ProgressEvent.SUCCESS, Path("q1.md"), 100.5),
+            (ProgressEvent.FAILURE, Path("q2.md"), 0.0),
+            (ProgressEvent.REASK, Path("q1.md"), 0.0),
+        ])
+
+    def test_unknown_questions_and_partial_records_skipped(self):
+        journal = ProgressJournal(self.path_to_save_file)
+        journal.open(3)
+        journal.append(ProgressEvent.SUCCESS, Path("q1.md"), 1.0)
+        journal.append(ProgressEvent.SUCCESS, Path("removed.md"), 1.0)
+        journal.close()
+        with open(self.root / "anki_progress.journal.3", "ab") as fh:
+            fh.write(b"\x01\x02\x03")
+        events = list(journal.read_events(0, [Path("q1.md")]))
+        self.assertEqual(events, [(ProgressEvent.SUCCESS, Path("q1.md"), 1.0)])
+
+    def test_generations_before_checkpoint_skipped(self):
+        journal = ProgressJournal(self.path_to_save_file)
+        for generation in (1, 2):
+            journal.open(generation)
+            journal.append(ProgressEvent.AMBIGUITY, Path(f"q{generation}.md"), 0.0)
+        journal.close()
+        self.assertEqual(journal.existing_generations(), [1, 2])
+        events = list(journal.read_events(2, [Path("q1.md"), Path("q2.md")]))
+        self.assertEqual(events, [(ProgressEvent.AMBIGUITY, Path("q2.md"), 0.0)])
+        journal.remove_older_than(2)
+        self.assertEqual(journal.existing_generations(), [2])
+
+    def test_answers_survive_crash(self):
+        vault = self.root / "vault"
+        vault.mkdir()
+        for i in range(3):
+            (vault / f"q{i}.md").write_text("answer")
+        selector = QuestionSelector([vault], False, self.root, with_journal=True)
+        for _ in range(2):
+            selector.load_next_question()
+            selector.success_on_current_question()
+        selector.load_next_question()
+        selector.fail_on_current_question()
+        selector._journal.close()
+        # no save_progress - process was killed
+        restored_selector = QuestionSelector([vault], False, self.root, with_journal=True)
+        self.assertEqual(restored_selector.get_statistics(), {"successes": 2, "failures": 1, "answered": 3})
+        restored_selector.save_progress()
+        restored_selector._journal.close()
+        restored_again = QuestionSelector([vault], False, self.root, with_journal=True)
+        self.assertEqual(restored_again.get_statistics(), {"successes": 2, "failures": 1, "answered": 3})
+        restored_again._journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+from typing import Dict, Optional, Union
+
+
+class ProgressRecord:
+    """
+    Progress of single question. Takes about third of memory of equivalent dict and its fields
+    are accessed without hashing. Converts losslessly to and from dict layout described in
+    weight_handler.py: fields missing in dict are stored as None.
+    """
+    __slots__ = ("successes", "failures", "answered", "last_success_ts", "is_hot")
+
+    def __init__(self, successes: Optional[int] = None, failures: Optional[int] = None,
+                 answered: Optional[int] = None, last_success_ts: Optional[float] = None,
+                 is_hot: Optional[bool] = None):
+        self.successes = successes
+        self.failures = failures
+        self.answered = answered
+        self.last_success_ts = last_success_ts
+        self.is_hot = is_hot
+
+    @staticmethod
+    def from_dict(info: Dict) -> "ProgressRecord":
+        return ProgressRecord(info.get("successes"), info.get("failures"), info.get("answered"),
+                              info.get("last_success_ts"), info.get("is_hot"))
+
+    def to_dict(self) -> Dict:
+        return {k: getattr(self, k) for k in ProgressRecord.__slots__ if getattr(self, k) is not None}
+
+    def copy(self) -> "ProgressRecord":
+        return ProgressRecord(self.successes, self.failures, self.answered, self.last_success_ts, self.is_hot)
+
+    def __eq__(self, other):
+        if not isinstance(other, ProgressRecord):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in ProgressRecord.__slots__)
+
+    def __repr__(self):
+        return f"ProgressRecord({self.to_dict()})"
+
+
+def as_dict(info: Union[ProgressRecord, Dict]) -> Dict:
+    """Progress snapshots hold records, storages persist dict layout"""
+    return info.to_dict() if isinstance(info, ProgressRecord) else info
+
+
+EMPTY_RECORD = ProgressRecord()
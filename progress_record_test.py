@@ -0,0 +1,37 @@
+import unittest
+
+from progress_record import ProgressRecord, as_dict
+
+
+class ProgressRecordTest(unittest.TestCase):
+    def test_dict_round_trip(self):
+        info = {
+            "successes": 1,
+            "failures": 2,
+            "answered": 4,
+            "last_success_ts": 1000000.5,
+            "is_hot": True
+        }
+        self.assertEqual(ProgressRecord.from_dict(info).to_dict(), info)
+
+    def test_missing_fields_kept_missing(self):
+        record = ProgressRecord.from_dict({"successes": 3})
+        self.assertIsNone(record.failures)
+        self.assertEqual(record.to_dict(), {"successes": 3})
+        self.assertEqual(ProgressRecord.from_dict({}).to_dict(), {})
+
+    def test_copy_is_independent(self):
+        record = ProgressRecord(1, 0, 1, 100.0, False)
+        copied = record.copy()
+        self.assertEqual(copied, record)
+        copied.failures = 1
+        self.assertNotEqual(copied, record)
+        self.assertEqual(record.failures, 0)
+
+    def test_as_dict(self):
+        self.assertEqual(as_dict(ProgressRecord(successes=1)), {"successes": 1})
+        self.assertEqual(as_dict({"failures": 1}), {"failures": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
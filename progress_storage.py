@@ -0,0 +1,292 @@
+"""
+Storages of progress data, see weight_handler.py for layout.
+Every storage loads whole progress dict and saves it given set of question uids changed
+since last save (None means "everything might have changed").
+Storages with SAVES_CHANGES_ONLY read nothing but changed records from progress dict being saved,
+so it may contain only them.
+Several sessions may share one storage: merge_and_save combines changes made since last save
+with whatever other sessions have saved meanwhile (see merge_record), under exclusive lock.
+"""
+import os
+import pickle
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple, Union
+
+from progress_record import ProgressRecord, as_dict
+from weight_handler import WeightHandler
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_COUNTERS = ("successes", "failures", "answered")
+_MAX_SQLITE_VARIABLES = 500
+
+
+def merge_record(on_disk: Optional[Dict], at_save: Optional[Union[ProgressRecord, Dict]],
+                 current: Optional[Union[ProgressRecord, Dict]]) -> Optional[Dict]:
+    """
+    Record to be saved, given record on disk, record as it was when this session last loaded or saved it
+    and record now. Counters are summed as deltas since then, last_success_ts takes the max
+    and is_hot is taken from this session only if it changed it. None - record should be removed.
+    """
+    if current is None:
+        return None
+    current = as_dict(current)
+    if on_disk is None:
+        return current
+    at_save = as_dict(at_save) if at_save is not None else {}
+    merged = dict(on_disk)
+    for field in _COUNTERS:
+        if field in current or field in at_save:
+            merged[field] = on_disk.get(field, 0) + current.get(field, 0) - at_save.get(field, 0)
+    if current.get("last_success_ts") is not None:
+        merged["last_success_ts"] = max(current["last_success_ts"], on_disk.get("last_success_ts", float("-inf")))
+    if current.get("is_hot") != at_save.get("is_hot"):
+        if "is_hot" in current:
+            merged["is_hot"] = current["is_hot"]
+        else:
+            merged.pop("is_hot", None)
+    return merged
+
+
+@contextmanager
+def _locked(path_to_lock_file: Path):
+    """Advisory lock held by one process at a time; no-op where fcntl is not available"""
+    if fcntl is None:
+        yield
+        return
+    with open(path_to_lock_file, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class PickleProgressStorage:
+    """Whole progress is pickled into single file, so any save rewrites every record"""
+    SAVES_CHANGES_ONLY = False
+
+    def __init__(self, path_to_save_file: Path):
+        self.path_to_save_file = path_to_save_file
+        # (st_mtime_ns, st_size, st_ino) of file as this session last loaded or saved it;
+        # while file has it, no other session saved meanwhile and there is nothing to merge;
+        # None after merge, since then file differs from progress in memory
+        self._stamp: Optional[Tuple[int, int, int]] = None
+
+    def load(self) -> Optional[Dict]:
+        if self.path_to_save_file.exists():
+            with open(self.path_to_save_file, "rb") as fh:
+                self._stamp = PickleProgressStorage._to_stamp(os.fstat(fh.fileno()))
+                anki_progress = pickle.load(fh)
+                if type(anki_progress) is not dict:
+                    print("WARNING: progress data is corrupted, starting from scratch")
+                return anki_progress
+        return None
+
+    def merge_and_save(self, progress_data: Dict, changes: Dict[Path, Optional[ProgressRecord]]) -> bool:
+        """changes - changed question uids mapped to their records as of last save"""
+        try:
+            with _locked(self._path_to_lock_file()):
+                if self._stamp is not None and self._stamp == self._current_stamp():
+                    return self._write(progress_data)
+                on_disk = self._load_current_version()
+                if on_disk is None:
+                    return self._write(progress_data)
+                progress = on_disk["progress"]
+                for uid, at_save in changes.items():
+                    merged = merge_record(progress.get(uid), at_save, progress_data["progress"].get(uid))
+                    if merged is None:
+                        progress.pop(uid, None)
+                    else:
+                        progress[uid] = merged
+                is_saved = self._write(dict(progress_data, progress=progress))
+                # file now has records of other sessions which progress in memory lacks,
+                # so fast path would drop them on next save
+                self._stamp = None
+                return is_saved
+        except OSError:
+            print("WARNING: Could not save progress data")
+            return False
+
+    def _load_current_version(self) -> Optional[Dict]:
+        try:
+            with open(self.path_to_save_file, "rb") as fh:
+                on_disk = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            print("WARNING: saved progress data is corrupted, overwriting it")
+            return None
+        if type(on_disk) is not dict or on_disk.get("version") != WeightHandler.CURRENT_PROGRESS_DATA_VERSION:
+            return None
+        return on_disk
+
+    def save(self, progress_data: Dict, dirty_uids: Optional[Set] = None) -> bool:
+        try:
+            with _locked(self._path_to_lock_file()):
+                return self._write(progress_data)
+        except OSError:
+            print("WARNING: Could not save progress data")
+            return False
+
+    def _current_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            return PickleProgressStorage._to_stamp(os.stat(self.path_to_save_file))
+        except OSError:
+            return None
+
+    @staticmethod
+    def _to_stamp(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _path_to_lock_file(self) -> Path:
+        return self.path_to_save_file.with_name(self.path_to_save_file.name + ".lock")
+
+    def _write(self, progress_data: Dict) -> bool:
+        # written to temporary file first, so crash in the middle does not corrupt last save
+        path_to_tmp_file = self.path_to_save_file.with_name(self.path_to_save_file.name + ".tmp")
+        try:
+            progress_data = dict(progress_data,
+                                 progress={uid: as_dict(info) for uid, info in progress_data["progress"].items()})
+            with open(path_to_tmp_file, "wb") as fh:
+                pickle.dump(progress_data, fh)
+            os.replace(path_to_tmp_file, self.path_to_save_file)
+            # written under lock, so this is the stamp of this save
+            self._stamp = self._current_stamp()
+            return True
+        except OSError:
+            print("WARNING: Could not save progress data")
+            return False
+
+
+class SqliteProgressStorage:
+    """
+    One row per question, keyed by question uid. Only changed rows are written, in single transaction,
+    so save cost depends on number of questions answered in session rather than on vault size.
+    """
+    SAVES_CHANGES_ONLY = True
+    _FIELDS = ("successes", "failures", "answered", "last_success_ts", "is_hot")
+
+    def __init__(self, path_to_db: Path, path_to_legacy_save_file: Optional[Path] = None):
+        self.path_to_db = path_to_db
+        self._path_to_legacy_save_file = path_to_legacy_save_file
+
+    def _connect(self):
+        # connection is not shared, so saves may happen on background thread
+        conn = sqlite3.connect(self.path_to_db)
+        conn.execute("CREATE TABLE IF NOT EXISTS progress ("
+                     "uid TEXT PRIMARY KEY, successes INTEGER, failures INTEGER, answered INTEGER, "
+                     "last_success_ts REAL, is_hot INTEGER)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        return conn
+
+    def load(self) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if "version" not in meta:
+                return self._import_legacy_progress()
+            progress = {}
+            for uid, *values in conn.execute(f"SELECT uid, {', '.join(self._FIELDS)} FROM progress"):
+                progress[Path(uid)] = self._row_to_record(values)
+            result = {"version": meta["version"], "progress": progress}
+            if "journal_generation" in meta:
+                result["journal_generation"] = meta["journal_generation"]
+            return result
+        finally:
+            conn.close()
+
+    def _import_legacy_progress(self) -> Optional[Dict]:
+        if self._path_to_legacy_save_file is None:
+            return None
+        legacy_progress = PickleProgressStorage(self._path_to_legacy_save_file).load()
+        if type(legacy_progress) is not dict:
+            return None
+        print(f"Importing progress data from {self._path_to_legacy_save_file}")
+        progress_data = {
+            "version": WeightHandler.CURRENT_PROGRESS_DATA_VERSION,
+            "progress": {uid: info.to_dict() for uid, info in WeightHandler._migrate_progress(legacy_progress).items()}
+        }
+        if not self.save(progress_data):
+            return None
+        return progress_data
+
+    def merge_and_save(self, progress_data: Dict, changes: Dict[Path, Optional[ProgressRecord]]) -> bool:
+        """changes - changed question uids mapped to their records as of last save"""
+        progress = progress_data["progress"]
+        try:
+            conn = self._connect()
+            try:
+                # write lock is taken right away, so no other session writes between reading and writing records
+                conn.isolation_level = None
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    on_disk = self._select(conn, list(changes))
+                    merged = {uid: merge_record(on_disk.get(uid), at_save, progress.get(uid))
+                              for uid, at_save in changes.items()}
+                    self._write(conn, dict(progress_data, progress=merged), merged.keys())
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error:
+            print("WARNING: Could not save progress data")
+            return False
+
+    def _select(self, conn, uids) -> Dict[Path, Dict]:
+        on_disk = {}
+        for start in range(0, len(uids), _MAX_SQLITE_VARIABLES):
+            chunk = [str(uid) for uid in uids[start:start + _MAX_SQLITE_VARIABLES]]
+            rows = conn.execute(f"SELECT uid, {', '.join(self._FIELDS)} FROM progress "
+                                f"WHERE uid IN ({', '.join('?' * len(chunk))})", chunk)
+            for uid, *values in rows:
+                on_disk[Path(uid)] = self._row_to_record(values)
+        return on_disk
+
+    def _row_to_record(self, values) -> Dict:
+        info = {k: v for k, v in zip(self._FIELDS, values) if v is not None}
+        if "is_hot" in info:
+            info["is_hot"] = bool(info["is_hot"])
+        return info
+
+    def save(self, progress_data: Dict, dirty_uids: Optional[Set] = None) -> bool:
+        progress = progress_data["progress"]
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    if dirty_uids is None:
+                        conn.execute("DELETE FROM progress")
+                        dirty_uids = progress.keys()
+                    self._write(conn, progress_data, dirty_uids)
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error:
+            print("WARNING: Could not save progress data")
+            return False
+
+    def _write(self, conn, progress_data: Dict, dirty_uids):
+        progress = progress_data["progress"]
+        rows = []
+        for uid in dirty_uids:
+            info = progress.get(uid)
+            if info is None:
+                conn.execute("DELETE FROM progress WHERE uid = ?", (str(uid),))
+            else:
+                info = as_dict(info)
+                rows.append((str(uid), *(info.get(k) for k in self._FIELDS)))
+        conn.executemany(f"INSERT OR REPLACE INTO progress (uid, {', '.join(self._FIELDS)}) "
+                         f"VALUES (?, ?, ?, ?, ?, ?)", rows)
+        meta = [("version", progress_data["version"])]
+        if "journal_generation" in progress_data:
+            meta.append(("journal_generation", progress_data["journal_generation"]))
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta)
@@ -0,0 +1,142 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from progress_record import ProgressRecord
+from progress_storage import PickleProgressStorage, SqliteProgressStorage, merge_record
+
+
+class ProgressStorageTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.progress_data = {
+            "version": 3,
+            "progress": {
+                Path("path/question1.md"): {
+                    "successes": 1,
+                    "failures": 2,
+                    "answered": 4,
+                    "last_success_ts": 1000000.5,
+                    "is_hot": True
+                },
+                Path("path/question2.md"): {
+                    "successes": 3,
+                    "failures": 0,
+                    "answered": 3,
+                }
+            }
+        }
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_pickle_round_trip(self):
+        storage = PickleProgressStorage(self.root / "anki_progress.pkl")
+        self.assertIsNone(storage.load())
+        self.assertTrue(storage.save(self.progress_data))
+        self.assertEqual(storage.load(), self.progress_data)
+
+    def test_sqlite_round_trip(self):
+        storage = SqliteProgressStorage(self.root / "anki_progress.sqlite3")
+        self.assertIsNone(storage.load())
+        self.progress_data["journal_generation"] = 7
+        self.assertTrue(storage.save(self.progress_data))
+        self.assertEqual(storage.load(), self.progress_data)
+
+    def test_sqlite_writes_only_dirty_records(self):
+        storage = SqliteProgressStorage(self.root / "anki_progress.sqlite3")
+        storage.save(self.progress_data)
+        progress = self.progress_data["progress"]
+        progress[Path("path/question1.md")]["successes"] = 100
+        progress[Path("path/question2.md")]["successes"] = 100
+        del progress[Path("path/question2.md")]
+        progress[Path("path/question3.md")] = {"successes": 0, "failures": 1, "answered": 1}
+        storage.save(self.progress_data, {Path("path/question2.md"), Path("path/question3.md")})
+        loaded_progress = storage.load()["progress"]
+        self.assertEqual(sorted(loaded_progress), [Path("path/question1.md"), Path("path/question3.md")])
+        self.assertEqual(loaded_progress[Path("path/question1.md")]["successes"], 1)
+        self.assertEqual(loaded_progress[Path("path/question3.md")]["failures"], 1)
+
+    def test_sqlite_imports_legacy_pickle(self):
+        path_to_legacy_save_file = self.root / "anki_progress.pkl"
+        with open(path_to_legacy_save_file, "wb") as fh:
+            pickle.dump({
+                "version": 1,
+                "progress": {
+                    Path("path/question1.md"): {
+                        "successes": 1,
+                        "failures": 2,
+                        "last_answered_ts": 1000000,
+                    }
+                }
+            }, fh)
+        storage = SqliteProgressStorage(self.root / "anki_progress.sqlite3", path_to_legacy_save_file)
+        expected = {
+            "version": 3,
+            "progress": {
+                Path("path/question1.md"): {
+                    "successes": 1,
+                    "failures": 2,
+                    "answered": 3,
+                    "last_success_ts": 1000000,
+                }
+            }
+        }
+        self.assertEqual(storage.load(), expected)
+        # imported once, pickle is not needed anymore
+        path_to_legacy_save_file.unlink()
+        self.assertEqual(storage.load(), expected)
+
+    def test_merge_record(self):
+        on_disk = {"successes": 3, "failures": 1, "answered": 5, "last_success_ts": 200.0, "is_hot": True}
+        at_save = ProgressRecord(1, 1, 2, 100.0, True)
+        current = ProgressRecord(2, 2, 4, 150.0, True)
+        self.assertEqual(merge_record(on_disk, at_save, current),
+                         {"successes": 4, "failures": 2, "answered": 7, "last_success_ts": 200.0, "is_hot": True})
+        # is_hot is taken from this session only if it changed it
+        current.is_hot = False
+        self.assertFalse(merge_record(on_disk, at_save, current)["is_hot"])
+        self.assertEqual(merge_record(None, at_save, current), current.to_dict())
+        self.assertEqual(merge_record({"failures": 1}, None, ProgressRecord(successes=1, last_success_ts=1.0)),
+                         {"successes": 1, "failures": 1, "last_success_ts": 1.0})
+        self.assertIsNone(merge_record(on_disk, at_save, None))
+
+    def test_concurrent_sessions_merged(self):
+        uid1, uid2 = Path("path/question1.md"), Path("path/question2.md")
+        for create_storage in (lambda: PickleProgressStorage(self.root / "anki_progress.pkl"),
+                               lambda: SqliteProgressStorage(self.root / "anki_progress.sqlite3")):
+            storage, other_storage = create_storage(), create_storage()
+            storage.save(self.progress_data)
+            at_load = storage.load()["progress"]
+            other_storage.load()
+            # another session answered question1 twice and saved first
+            other = dict(at_load[uid1], successes=3, answered=6)
+            self.assertTrue(other_storage.merge_and_save({"version": 3, "progress": {**at_load, uid1: other}},
+                                                         {uid1: at_load[uid1]}))
+            # this session answered question1 and question2 once
+            mine = {uid1: dict(at_load[uid1], failures=3, answered=5), uid2: dict(at_load[uid2], successes=4)}
+            progress_data = {"version": 3, "progress": {**at_load, **mine}}
+            self.assertTrue(storage.merge_and_save(progress_data, {uid: at_load[uid] for uid in mine}))
+            saved = storage.load()["progress"]
+            self.assertEqual(saved[uid1], dict(at_load[uid1], successes=3, failures=3, answered=7))
+            self.assertEqual(saved[uid2], dict(at_load[uid2], successes=4))
+
+    def test_pickle_not_reread_when_saved_by_this_session_only(self):
+        storage = PickleProgressStorage(self.root / "anki_progress.pkl")
+        storage.save(self.progress_data)
+        storage.load()
+        with mock.patch.object(storage, "_load_current_version") as load_current_version:
+            self.assertTrue(storage.merge_and_save(self.progress_data, {}))
+            self.assertTrue(storage.merge_and_save(self.progress_data, {}))
+        load_current_version.assert_not_called()
+        PickleProgressStorage(self.root / "anki_progress.pkl").save(self.progress_data)
+        with mock.patch.object(storage, "_load_current_version", return_value=None) as load_current_version:
+            self.assertTrue(storage.merge_and_save(self.progress_data, {}))
+        load_current_version.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,81 +1,275 @@
+import os
 import pickle
 import random
+import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Callable, Optional, Iterator, Deque, List, Dict
 
-from weight_handler import WeightHandler
+from answer_cache import AnswerCache
+from progress_journal import ProgressJournal
+from progress_record import ProgressRecord
+from progress_storage import PickleProgressStorage, SqliteProgressStorage
+from session_queue import SessionQueue
+from vault_index import IndexChanges, VaultIndex
+from vault_watcher import VaultWatcher, create_watcher
+from weight_handler import QuestionSlots, WeightHandler, ProgressEvent
 
 
 class QuestionSelector:
     _MAX_HISTORY = 10
+    _JOURNAL_COMPACTION_THRESHOLD_BYTES = 1 << 20
 
     def __init__(self, paths_to_questions: List[Path],
                  with_prune: bool,
-                 path_to_save_data_dir: Optional[Path] = None):
+                 path_to_save_data_dir: Optional[Path] = None,
+                 rebuild_index: bool = False,
+                 scan_workers: int = VaultIndex.DEFAULT_SCAN_WORKERS,
+                 with_journal: bool = False,
+                 storage: str = "pickle",
+                 autosave_every: int = 0,
+                 session_size: int = 0,
+                 cooldown: int = 1,
+                 tags: Optional[List[str]] = None,
+                 rng: random.Random = random,
+                 clock: Callable[[], float] = time.time,
+                 shared_questions: Optional[QuestionSlots] = None,
+                 answers: Optional[AnswerCache] = None,
+                 watch: bool = False):
+        """
+        Questions and answer cache may be shared between selectors, see study_server.py; shared questions are
+        kept up to date by their owner, who passes their changes to on_shared_questions_changed.
+        With watch questions directories are watched in background and changes are patched in on next draw.
+        """
         self._paths_to_questions = paths_to_questions
+        # seeded rng and simulated clock make sessions reproducible, see headless_replay.py
+        self._rng = rng
+        self._clock = clock
         self._with_prune = with_prune
         self._path_to_save_file = QuestionSelector._resolve_path_to_save_file(path_to_save_data_dir)
+        self._path_to_index_file = self._path_to_save_file.with_name("anki_index.pkl")
+        self._storage = self._create_storage(storage)
+        # changes of failed save, they are merged into the next one
+        self._unsaved_changes: Dict[Path, Optional[ProgressRecord]] = {}
         progress = self._load_saved_progress()
         self.current_question_path: Optional[Path] = None
-        self.history: List[Path] = []
-        self._wh: Optional[WeightHandler] = None
-        self._reload_index_impl(progress)
+        self.history: Deque[Path] = deque(maxlen=QuestionSelector._MAX_HISTORY)
+        # recently shown questions, they are not drawn again until cooldown is over
+        self._cooldown = cooldown
+        self._cooling_down: Deque[Path] = deque()
+        self._answers = answers if answers is not None else AnswerCache()
+        self._scan_workers = scan_workers
+        self._watcher: Optional[VaultWatcher] = None
+        self._index: Optional[VaultIndex] = None
+        if shared_questions is not None:
+            if watch:
+                raise ValueError("Shared questions can not be watched")
+            self._questions = shared_questions
+        else:
+            self._index = VaultIndex(paths_to_questions, scan_workers)
+            if watch:
+                # started before scan, so changes made during it are not missed
+                self._watcher = create_watcher([str(p) for p in paths_to_questions])
+            self._questions = QuestionSlots(self._load_questions_list(rebuild_index))
+        self._wh = WeightHandler(self._questions, self._clock(), progress)
+        self._journal: Optional[ProgressJournal] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._autosave_every = autosave_every
+        self._answers_since_save = 0
+        self._session_size = session_size
+        self._session: Optional[SessionQueue] = SessionQueue(rng) if session_size > 0 else None
+        try:
+            # checked before journal is opened, it may start background save
+            self.set_tags_filter(tags)
+        except ValueError:
+            self.close()
+            raise
+        if with_journal:
+            self._open_journal(progress)
+        if self._with_prune:
+            self._wh.prune_progress_info()
 
-    def _load_questions_list(self) -> Dict[Path, str]:
-        result = {}
-        for dirpath in self._paths_to_questions:
-            result.update({p: dirpath.stem for p in dirpath.rglob("*.md")})
-        return result
+    def _load_questions_list(self, rebuild_index: bool) -> Dict[Path, str]:
+        # index saved by previous run lets us re-list only directories changed since then
+        if not rebuild_index and self._path_to_index_file.exists():
+            try:
+                with open(self._path_to_index_file, "rb") as fh:
+                    if not self._index.load_state(pickle.load(fh)):
+                        print("WARNING: saved questions index is outdated, rebuilding it")
+            except Exception:
+                print("WARNING: saved questions index is corrupted, rebuilding it")
+                self._index = VaultIndex(self._paths_to_questions, self._scan_workers)
+        # warm start without changes leaves saved index as it is
+        if self._index.rescan():
+            self.save_index()
+        return self._index.questions()
 
     def load_next_question(self):
-        def _get_distinct_from_last_question():
-            question = random.choices(self._wh.question_uids, weights=self._wh.weights)[0]
-            if self.history:
-                while question == self.history[-1]:
-                    question = random.choices(self._wh.question_uids, weights=self._wh.weights)[0]
-            return question, self._wh.question_uids_to_tags[question]
+        def _get_next_in_session():
+            # batch is drawn without questions in cooldown, but answered questions may re-enter it
+            excluded = set(self._cooling_down)
+            question = self._session.pop(excluded)
+            if question is None:
+                self._session.refill(self._wh.sample_distinct_questions(self._session_size, self._rng))
+                question = self._session.pop(excluded) or self._session.pop()
+            return question
 
+        self.sync_index()
         if self.current_question_path:
             self.history.append(self.current_question_path)
-        if len(self.history) > QuestionSelector._MAX_HISTORY:
-            self.history.pop(0)
-        self.current_question_path, tag = _get_distinct_from_last_question()
-        return self.current_question_path.stem, tag
+        for question, old_weight in self._wh.advance_time(self._clock()):
+            self._on_weight_changed(question, old_weight)
+        self._ensure_question_to_draw()
+        if self._session is not None:
+            self.current_question_path = _get_next_in_session()
+        else:
+            # questions in cooldown have no weight in sampler, so single draw is enough
+            self.current_question_path = self._wh.sample_question(self._rng)
+        self._start_cooldown(self.current_question_path)
+        self._answers.prefetch(self.current_question_path)
+        return self.current_question_path.stem, self._wh.question_uids_to_tags[self.current_question_path]
 
     def load_answer_for_current_question(self):
         try:
-            with open(self.current_question_path, "r") as fh:
-                return fh.readlines()
+            return self._answers.load(self.current_question_path)
         except OSError as e:
             raise OSError(f"Could not read answer for question {str(self.current_question_path)}: {str(e)}")
 
-    def reload_index(self):
-        self._reload_index_impl(self._wh.get_savable_progress())
+    def stream_answer_for_current_question(self) -> Iterator[str]:
+        try:
+            yield from self._answers.stream(self.current_question_path)
+        except OSError as e:
+            raise OSError(f"Could not read answer for question {str(self.current_question_path)}: {str(e)}")
 
-    def _reload_index_impl(self, progress):
-        question_uids_to_tags = self._load_questions_list()
-        self._wh = WeightHandler(question_uids_to_tags, time.time(), progress)
+    def reload_index(self, keep_current_question: bool = False):
+        """
+        Only added, removed and renamed files are patched in, weights of other questions are kept.
+        Current question is dropped unless asked to keep it and it is still there (possibly renamed).
+        """
+        if self._index is None:
+            raise RuntimeError("Shared questions are reloaded by their owner")
+        self._apply_index_changes(self._index.rescan(), keep_current_question)
+
+    def sync_index(self) -> bool:
+        """Patches in changes seen by watcher since last call, only changed directories are re-listed"""
+        if self._watcher is None:
+            return False
+        dirpaths, needs_full_rescan = self._watcher.take_changes()
+        if needs_full_rescan:
+            changes = self._index.rescan()
+        elif dirpaths:
+            changes = self._index.rescan_dirs(dirpaths)
+        else:
+            return False
+        if changes:
+            self._apply_index_changes(changes, keep_current_question=True)
+        return bool(changes)
+
+    def close(self):
+        """Stops watcher, if any"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def on_shared_questions_changed(self, changes: IndexChanges):
+        """Owner has applied changes to shared questions already, session and history of this selector follow"""
+        self._on_questions_changed(changes, keep_current_question=True)
+
+    def _apply_index_changes(self, changes: IndexChanges, keep_current_question: bool):
+        self._questions.apply_changes(changes)
+        self._on_questions_changed(changes, keep_current_question)
+        if not self._wh.question_uids:
+            raise RuntimeError("No questions loaded")
+
+    def _on_questions_changed(self, changes: IndexChanges, keep_current_question: bool):
+        removed = set(changes.removed)
+        self._answers.invalidate(list(changes.removed) + list(changes.renamed))
+        if self._session is not None:
+            for old_uid, (new_uid, _) in changes.renamed.items():
+                self._session.rename(old_uid, new_uid)
+            for uid in changes.removed:
+                self._session.remove(uid)
         if self._with_prune:
-            self._wh.prune_progress_info()
-        self.current_question_path: Optional[Path] = None
+            self._wh.prune_progress_info(changes.removed)
+        self.history = deque((changes.renamed[q][0] if q in changes.renamed else q for q in self.history),
+                             maxlen=QuestionSelector._MAX_HISTORY)
+        self._cooling_down = deque(changes.renamed[q][0] if q in changes.renamed else q
+                                   for q in self._cooling_down if q not in removed)
+        self._end_cooldowns()
+        current = self.current_question_path
+        if keep_current_question and current is not None and current not in removed:
+            self.current_question_path = changes.renamed[current][0] if current in changes.renamed else current
+        else:
+            self.current_question_path = None
+
+    def get_tags(self) -> List[str]:
+        return sorted(self._wh.get_statistics_by_tag())
+
+    def get_tags_filter(self) -> Optional[List[str]]:
+        return self._tags_filter
+
+    def set_tags_filter(self, tags: Optional[List[str]]):
+        """Questions are asked only from given tags (None or empty - from all), weights and progress are kept"""
+        if tags:
+            unknown_tags = set(tags) - set(self.get_tags())
+            if unknown_tags:
+                raise ValueError(f"Unknown tags: {', '.join(sorted(unknown_tags))}")
+        self._tags_filter = sorted(set(tags)) if tags else None
+        self._wh.set_tags_filter(self._tags_filter)
+        if self._session is not None:
+            # planned questions may be out of new filter, next session is drawn right away
+            self._session.refill([])
+
+    def _ensure_question_to_draw(self):
+        # questions with filtered tags may be all in cooldown or all removed from vault
+        while not self._wh.can_sample_question() and self._cooling_down:
+            self._wh.resume_question(self._cooling_down.popleft())
+        if not self._wh.can_sample_question() and self._tags_filter is not None:
+            print(f"WARNING: no questions left with tags {', '.join(self._tags_filter)}, asking all questions")
+            self.set_tags_filter(None)
+
+    def _start_cooldown(self, question):
+        if self._cooldown > 0 and question not in self._cooling_down:
+            self._cooling_down.append(question)
+            self._wh.suspend_question(question)
+            self._end_cooldowns()
+
+    def _end_cooldowns(self):
+        while len(self._cooling_down) > self._cooldown:
+            self._wh.resume_question(self._cooling_down.popleft())
 
     def success_on_current_question(self):
-        self._wh.success_on_question(self.current_question_path, time.time())
+        ts = self._clock()
+        old_weight = self._wh.get_weight(self.current_question_path)
+        self._wh.success_on_question(self.current_question_path, ts)
+        self._on_answer(ProgressEvent.SUCCESS, self.current_question_path, old_weight, ts)
 
     def fail_on_current_question(self):
+        old_weight = self._wh.get_weight(self.current_question_path)
         self._wh.fail_on_question(self.current_question_path)
+        self._on_answer(ProgressEvent.FAILURE, self.current_question_path, old_weight)
 
     def ambiguity_on_current_question(self):
+        old_weight = self._wh.get_weight(self.current_question_path)
         self._wh.ambiguity_on_question(self.current_question_path)
+        self._on_answer(ProgressEvent.AMBIGUITY, self.current_question_path, old_weight)
 
     def reask_last_question(self):
         if self.history:
+            old_weight = self._wh.get_weight(self.history[-1])
             self._wh.reask(self.history[-1])
+            self._on_answer(ProgressEvent.REASK, self.history[-1], old_weight)
 
     def get_statistics(self):
         return self._wh.get_statistics()
 
+    def get_statistics_by_tag(self):
+        return self._wh.get_statistics_by_tag()
+
+    def get_session_statistics(self):
+        return self._wh.get_session_statistics()
+
     @staticmethod
     def _resolve_path_to_save_file(path_to_save_data_dir):
         if path_to_save_data_dir is not None:
@@ -89,19 +283,100 @@ class QuestionSelector:
             path_to_save_data = path_to_save_data_dir.joinpath("anki_progress.pkl")
         return path_to_save_data
 
+    def _create_storage(self, storage: str):
+        if storage == "pickle":
+            return PickleProgressStorage(self._path_to_save_file)
+        if storage == "sqlite":
+            return SqliteProgressStorage(self._path_to_save_file.with_suffix(".sqlite3"), self._path_to_save_file)
+        raise ValueError(f"Unknown progress storage: {storage}")
+
     def _load_saved_progress(self):
-        if self._path_to_save_file.exists():
-            with open(self._path_to_save_file, "rb") as fh:
-                anki_progress = pickle.load(fh)
-                if type(anki_progress) is not dict:
-                    print("WARNING: progress data is corrupted, starting from scratch")
-                return anki_progress
-        return None
-
-    def save_progress(self):
-        progress_data = self._wh.get_savable_progress()
+        return self._storage.load()
+
+    def save_index(self):
+        if self._index is None:
+            return
+        # written to temporary file first, so crash in the middle does not corrupt saved index
+        path_to_tmp_file = self._path_to_index_file.with_name(self._path_to_index_file.name + ".tmp")
         try:
-            with open(self._path_to_save_file, "wb") as fh:
-                pickle.dump(progress_data, fh)
+            with open(path_to_tmp_file, "wb") as fh:
+                pickle.dump(self._index.get_savable_state(), fh)
+            os.replace(path_to_tmp_file, self._path_to_index_file)
         except OSError:
-            print("WARNING: Could not save progress data")
+            print("WARNING: Could not save questions index")
+
+    def save_progress(self, background: bool = False):
+        """Snapshot of progress is taken right away, writing it can be left to background thread"""
+        # previous write should finish first: changes it failed to save are merged into this one
+        self._wait_for_writer()
+        changes = self._wh.take_changes_since_save()
+        # records as of last save are older in changes of failed save, so they take precedence
+        changes.update(self._unsaved_changes)
+        self._unsaved_changes = {}
+        generation = None
+        if self._journal is not None:
+            # answers given from now on go to new journal, old ones are folded into checkpoint
+            generation = self._journal.generation + 1
+            self._journal.open(generation)
+        snapshot_uids = changes.keys() if self._storage.SAVES_CHANGES_ONLY else None
+        progress_data = self._wh.get_savable_progress(snapshot_uids)
+        if generation is not None:
+            progress_data["journal_generation"] = generation
+
+        def write_progress():
+            # other sessions may have saved the same progress meanwhile, their changes are kept
+            is_saved = self._storage.merge_and_save(progress_data, changes)
+            if not is_saved:
+                self._unsaved_changes = changes
+            if is_saved and generation is not None:
+                self._journal.remove_older_than(generation)
+
+        if background:
+            self._writer_thread = threading.Thread(target=write_progress, daemon=True)
+            self._writer_thread.start()
+        else:
+            write_progress()
+
+    def autosave(self) -> bool:
+        """Saves progress in background if it changed since last save and previous save is finished"""
+        if self._is_writer_busy() or not (self._unsaved_changes or self._wh.has_dirty_question_uids()):
+            return False
+        self._answers_since_save = 0
+        self.save_progress(background=True)
+        return True
+
+    def _is_writer_busy(self):
+        return self._writer_thread is not None and self._writer_thread.is_alive()
+
+    def _wait_for_writer(self):
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+            self._writer_thread = None
+
+    def _open_journal(self, progress):
+        self._journal = ProgressJournal(self._path_to_save_file)
+        # answers journaled after last checkpoint are restored, i.e. they survive crash of previous session
+        checkpoint_generation = progress.get("journal_generation", 0) if progress else 0
+        generations = self._journal.existing_generations()
+        self._wh.replay_progress_events(
+            self._journal.read_events(checkpoint_generation, self._wh.get_known_question_uids()))
+        self._journal.open(max(generations + [checkpoint_generation]))
+        if any(g >= checkpoint_generation for g in generations):
+            self.save_progress(background=True)
+
+    def _on_weight_changed(self, question, old_weight: float):
+        if self._session is not None:
+            self._session.on_weight_changed(question, old_weight, self._wh.get_weight(question))
+
+    def _on_answer(self, event: ProgressEvent, question, old_weight: float, ts: float = 0.0):
+        self._on_weight_changed(question, old_weight)
+        if self._journal is not None:
+            self._journal.append(event, question, ts)
+            should_save = self._journal.size > QuestionSelector._JOURNAL_COMPACTION_THRESHOLD_BYTES
+        else:
+            self._answers_since_save += 1
+            should_save = 0 < self._autosave_every <= self._answers_since_save
+        # if previous save is still running, this one will be done a little later
+        if should_save and not self._is_writer_busy():
+            self._answers_since_save = 0
+            self.save_progress(background=True)
@@ -0,0 +1,184 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from question_selector import QuestionSelector
+
+
+class QuestionSelectorTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.vault = self.root / "vault"
+        self.vault.mkdir()
+        for i in range(5):
+            (self.vault / f"q{i}.md").write_text(f"answer {i}\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _answer(self, selector, count):
+        for _ in range(count):
+            selector.load_next_question()
+            selector.success_on_current_question()
+
+    def test_autosave_in_background(self):
+        for storage in ("pickle", "sqlite"):
+            save_dir = self.root / storage
+            selector = QuestionSelector([self.vault], False, save_dir, storage=storage, autosave_every=3)
+            self._answer(selector, 2)
+            self.assertIsNone(selector._writer_thread)
+            self._answer(selector, 1)
+            selector._wait_for_writer()
+            saved = QuestionSelector([self.vault], False, save_dir, storage=storage)
+            self.assertEqual(saved.get_statistics()["successes"], 3)
+            self._answer(selector, 1)
+            selector.save_progress()
+            saved = QuestionSelector([self.vault], False, save_dir, storage=storage)
+            self.assertEqual(saved.get_statistics()["successes"], 4)
+
+    def test_session_serves_distinct_questions(self):
+        selector = QuestionSelector([self.vault], False, self.root, session_size=5)
+        questions = []
+        for _ in range(5):
+            questions.append(selector.load_next_question()[0])
+            selector.success_on_current_question()
+        self.assertEqual(sorted(questions), [f"q{i}" for i in range(5)])
+        selector.load_next_question()
+        selector.fail_on_current_question()
+        # next batch is drawn without question in cooldown, failed question becomes hot and may come back
+        queued = list(selector._session)
+        self.assertEqual(len(set(queued)), len(queued))
+        self.assertEqual(len([q for q in queued if q != selector.current_question_path]), 3)
+        self.assertNotIn(selector.history[-1], queued)
+
+    def test_cooldown_excludes_recent_questions(self):
+        selector = QuestionSelector([self.vault], False, self.root, cooldown=3)
+        for _ in range(50):
+            selector.load_next_question()
+            recent = list(selector.history)[-3:] + [selector.current_question_path]
+            self.assertEqual(len(set(recent)), len(recent))
+            selector.ambiguity_on_current_question()
+            selector.reask_last_question()
+
+    def test_cooldown_longer_than_vault(self):
+        selector = QuestionSelector([self.vault], False, self.root, cooldown=100)
+        questions = [selector.load_next_question()[0] for _ in range(10)]
+        self.assertEqual(questions[5:], questions[:5])
+        self.assertEqual(len(set(questions)), 5)
+
+    def test_tags_filter(self):
+        other_vault = self.root / "other"
+        other_vault.mkdir()
+        (other_vault / "other.md").write_text("other answer\n")
+        selector = QuestionSelector([self.vault, other_vault], False, self.root, cooldown=3, tags=["other"])
+        self.assertEqual(selector.get_tags(), ["other", "vault"])
+        for _ in range(3):
+            self.assertEqual(selector.load_next_question(), ("other", "other"))
+            selector.fail_on_current_question()
+        selector.set_tags_filter(["vault"])
+        self.assertEqual({selector.load_next_question()[1] for _ in range(20)}, {"vault"})
+        selector.set_tags_filter(None)
+        self.assertEqual({selector.load_next_question()[1] for _ in range(100)}, {"vault", "other"})
+        self.assertRaises(ValueError, selector.set_tags_filter, ["unknown"])
+        self.assertEqual(selector.get_statistics()["failures"], 3)
+
+    def test_renamed_answer_restores_index(self):
+        selector = QuestionSelector([self.vault], False, self.root)
+        question, _ = selector.load_next_question()
+        self.assertEqual(selector.load_answer_for_current_question(), [f"answer {question[1]}\n"])
+        renamed = self.vault / "renamed.md"
+        (self.vault / f"{question}.md").rename(renamed)
+        self.assertRaises(OSError, selector.load_answer_for_current_question)
+        selector.reload_index()
+        self.assertIn(renamed, selector._wh.question_uids)
+        self.assertIsNone(selector.current_question_path)
+
+    def test_index_saved_only_when_changed(self):
+        QuestionSelector([self.vault], False, self.root)
+        path_to_index_file = self.root / "anki_index.pkl"
+        saved = path_to_index_file.stat()
+        QuestionSelector([self.vault], False, self.root)
+        self.assertEqual(path_to_index_file.stat().st_ino, saved.st_ino)
+        (self.vault / "new.md").write_text("new answer\n")
+        QuestionSelector([self.vault], False, self.root)
+        self.assertNotEqual(path_to_index_file.stat().st_ino, saved.st_ino)
+        self.assertEqual([p.name for p in self.root.iterdir() if p.name.endswith(".tmp")], [])
+
+    def test_reload_index_keeps_current_question(self):
+        selector = QuestionSelector([self.vault], False, self.root)
+        question, _ = selector.load_next_question()
+        renamed = self.vault / "renamed.md"
+        (self.vault / f"{question}.md").rename(renamed)
+        selector.reload_index(keep_current_question=True)
+        self.assertEqual(selector.current_question_path, renamed)
+        renamed.unlink()
+        selector.reload_index(keep_current_question=True)
+        self.assertIsNone(selector.current_question_path)
+
+    def test_autosave_only_when_changed(self):
+        selector = QuestionSelector([self.vault], False, self.root)
+        self.assertFalse(selector.autosave())
+        self._answer(selector, 2)
+        self.assertTrue(selector.autosave())
+        selector._wait_for_writer()
+        self.assertFalse(selector.autosave())
+        saved = QuestionSelector([self.vault], False, self.root)
+        self.assertEqual(saved.get_statistics()["successes"], 2)
+
+    def test_sessions_sharing_save_dir_merged(self):
+        for storage in ("pickle", "sqlite"):
+            save_dir = self.root / storage
+            first = QuestionSelector([self.vault], False, save_dir, storage=storage)
+            second = QuestionSelector([self.vault], False, save_dir, storage=storage)
+            self._answer(first, 3)
+            self._answer(second, 2)
+            first.save_progress()
+            second.save_progress()
+            self._answer(first, 1)
+            first.save_progress()
+            # no other session saved since, but progress of second one is still not in memory of first one
+            self._answer(first, 1)
+            first.save_progress()
+            saved = QuestionSelector([self.vault], False, save_dir, storage=storage)
+            self.assertEqual(saved.get_statistics(), {"successes": 7, "failures": 0, "answered": 7})
+
+    def _sync_until(self, selector, condition, timeout_secs=2.0):
+        deadline = time.monotonic() + timeout_secs
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            selector.sync_index()
+            time.sleep(0.01)
+
+    def test_watched_changes_patched_in(self):
+        selector = QuestionSelector([self.vault], False, self.root, watch=True)
+        try:
+            selector.load_next_question()
+            selector.fail_on_current_question()
+            current = selector.current_question_path
+            renamed = self.vault / "sub" / "renamed.md"
+            renamed.parent.mkdir()
+            current.rename(renamed)
+            added = self.vault / "new.md"
+            added.write_text("new answer\n")
+            self._sync_until(selector, lambda: {renamed, added} <= set(selector._wh.question_uids))
+            self.assertNotIn(current, selector._wh.question_uids)
+            self.assertEqual(selector.current_question_path, renamed)
+            self.assertEqual(selector._wh.get_savable_progress()["progress"][renamed].failures, 1)
+            renamed.unlink()
+            self._sync_until(selector, lambda: renamed not in selector._wh.question_uids)
+        finally:
+            selector.close()
+
+    def test_unknown_tags_leave_nothing_running(self):
+        threads = threading.active_count()
+        with self.assertRaises(ValueError):
+            QuestionSelector([self.vault], False, self.root, with_journal=True, tags=["unknown"], watch=True)
+        self.assertEqual(threading.active_count(), threads)
+        self.assertEqual(list(self.root.glob("*.journal.*")), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
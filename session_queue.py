@@ -0,0 +1,78 @@
+"""
+Questions planned for session: ordered batch of distinct questions drawn without replacement,
+see WeightHandler.sample_distinct_questions. Every question comes with its key - arrival time in race
+of exponential clocks ticking with rates equal to question weights. Memorylessness of exponential
+distribution lets the queue be repaired when weights change instead of being drawn anew.
+"""
+import bisect
+import random
+from typing import Container, List, Tuple
+
+
+class SessionQueue:
+    # question answered during session is queued again only if it became much more likely to be asked
+    _REENTER_WEIGHT_RATIO = 2.0
+
+    def __init__(self, rng: random.Random = random):
+        self._rng = rng
+        self._keys: List[float] = []
+        self._uids: List = []
+        # arrival time of last served question and of last question in batch
+        self._clock = 0.0
+        self._threshold = 0.0
+
+    def __len__(self):
+        return len(self._uids)
+
+    def __iter__(self):
+        return iter(self._uids)
+
+    def refill(self, drawn: List[Tuple[float, object]]):
+        self._keys = [key for key, _ in drawn]
+        self._uids = [uid for _, uid in drawn]
+        self._clock = 0.0
+        self._threshold = self._keys[-1] if self._keys else 0.0
+
+    def pop(self, excluded: Container = ()):
+        """Returns next question not in excluded (e.g. recently asked ones); None if there is no such question"""
+        # questions are distinct, so at most len(excluded) + 1 of them are looked at
+        for i in range(len(self._uids)):
+            if self._uids[i] not in excluded:
+                self._clock = max(self._clock, self._keys[i])
+                del self._keys[i]
+                return self._uids.pop(i)
+        return None
+
+    def on_weight_changed(self, uid, old_weight: float, new_weight: float):
+        if uid in self._uids:
+            i = self._uids.index(uid)
+            key = self._keys[i]
+            del self._keys[i]
+            del self._uids[i]
+            if new_weight <= 0.0:
+                return
+            # clock has not arrived yet, so time left to arrival is exponential and scales inversely with rate
+            key = self._clock + max(0.0, key - self._clock) * old_weight / new_weight
+        elif new_weight >= old_weight * SessionQueue._REENTER_WEIGHT_RATIO:
+            key = self._clock + self._rng.expovariate(new_weight)
+        else:
+            return
+        # question that would not make it into batch arrives in some later session
+        if key <= self._threshold:
+            self._insert(key, uid)
+
+    def remove(self, uid):
+        if uid in self._uids:
+            i = self._uids.index(uid)
+            del self._keys[i]
+            del self._uids[i]
+
+    def rename(self, old_uid, new_uid):
+        self.remove(new_uid)
+        if old_uid in self._uids:
+            self._uids[self._uids.index(old_uid)] = new_uid
+
+    def _insert(self, key: float, uid):
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._uids.insert(i, uid)
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from session_queue import SessionQueue
+
+
+class SessionQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = SessionQueue(random.Random(0))
+        self.queue.refill([(1.0, "q1"), (2.0, "q2"), (3.0, "q3"), (4.0, "q4")])
+
+    def test_served_in_key_order(self):
+        self.assertEqual([self.queue.pop() for _ in range(4)], ["q1", "q2", "q3", "q4"])
+        self.assertIsNone(self.queue.pop())
+
+    def test_excluded_questions_skipped(self):
+        self.assertEqual(self.queue.pop({"q1"}), "q2")
+        self.assertEqual(self.queue.pop({"q1", "q3"}), "q4")
+        self.assertEqual(self.queue.pop({"q2"}), "q1")
+        queue = SessionQueue()
+        queue.refill([(1.0, "q1")])
+        self.assertIsNone(queue.pop({"q1"}))
+        self.assertEqual(queue.pop(), "q1")
+
+    def test_queued_question_moved_when_weight_changes(self):
+        self.queue.pop()
+        # 2 time units left to arrival of q3, twice the rate - one unit
+        self.queue.on_weight_changed("q3", 1.0, 2.0)
+        self.assertEqual(list(self.queue), ["q2", "q3", "q4"])
+        self.assertEqual(self.queue._keys[1], 2.0)
+        # four times lower rate - arrives after batch ends
+        self.queue.on_weight_changed("q2", 1.0, 0.25)
+        self.assertEqual(list(self.queue), ["q3", "q4"])
+
+    def test_answered_question_queued_again_if_weight_grows(self):
+        self.queue.pop()
+        self.queue.on_weight_changed("q1", 1.0, 1.5)
+        self.assertEqual(len(self.queue), 3)
+        self.queue.on_weight_changed("q1", 1.0, 1000.0)
+        self.assertEqual(list(self.queue), ["q1", "q2", "q3", "q4"])
+        self.assertEqual(self.queue.pop({"q1"}), "q2")
+
+    def test_remove_and_rename(self):
+        self.queue.remove("q2")
+        self.queue.rename("q3", "renamed")
+        self.queue.rename("unknown", "q4")
+        self.assertEqual(list(self.queue), ["q1", "renamed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 from states.state_enum import State
-from utils.function_selector import FunctionSelector
+from utils.function_selector import AmbiguousCommand, FunctionSelector
+from utils.user_input import async_user_input, user_input
 
 
-def get_on_answer_displayed(selector):
+def get_on_answer_displayed(selector, asynchronous=False):
     def yes(*args, **kwargs):
         ctx = kwargs["context"]
         ctx["right_answers_streak"] = ctx.get("right_answers_streak", 0) + 1
@@ -41,14 +42,24 @@ def get_on_answer_displayed(selector):
         lambda *args, **kwargs: print(function_selector.get_help()),
         "Show this hint")
 
-    def on_answer_displayed(state, context):
-        print("\n---")
-        command = input(f"Was your answer right? {function_selector.get_hint()}\n")
+    def handle_command(command, context):
         try:
             return function_selector(command, context=context)
+        except AmbiguousCommand as e:
+            print(str(e))
         except StopIteration:
             print(f"Unknown command: {command}")
             print(function_selector.get_help())
         return None
 
-    return on_answer_displayed
\ No newline at end of file
+    def on_answer_displayed(state, context):
+        print("\n---")
+        command = user_input(f"Was your answer right? {function_selector.get_hint()}\n")
+        return handle_command(command, context)
+
+    async def on_answer_displayed_async(state, context):
+        print("\n---")
+        command = await async_user_input(f"Was your answer right? {function_selector.get_hint()}\n")
+        return handle_command(command, context)
+
+    return on_answer_displayed_async if asynchronous else on_answer_displayed
@@ -1,24 +1,64 @@
+import inspect
+import shutil
+import sys
+
 from states.state_enum import State
-from utils.function_selector import FunctionSelector
+from utils.function_selector import AmbiguousCommand, FunctionSelector
+from utils.user_input import async_user_input, user_input
+from utils.pager import async_write_paged, write_paged
+
+
+def get_on_question_displayed(selector, with_pager=False, asynchronous=False):
+    more_prompt = "-- more: Enter - next page, q - skip rest of answer --"
+
+    def ask_more():
+        return user_input(more_prompt).strip().lower() != "q"
+
+    async def ask_more_async():
+        return (await async_user_input(more_prompt)).strip().lower() != "q"
 
+    def is_question_left():
+        # file may have been renamed while question was shown
+        selector.sync_index()
+        if selector.current_question_path is None:
+            print("WARNING: Question was removed while program was running")
+            return False
+        return True
+
+    def get_page_lines():
+        # last line of the screen is left for pager prompt
+        return shutil.get_terminal_size().lines - 1 if with_pager else 0
+
+    def restore_index(e):
+        print(f"WARNING: {str(e)}")
+        print("Have you renamed file while program was running?")
+        print("Restoring index...")
+        selector.reload_index()
+        return State.QUESTION_REQUIRED
 
-def get_on_question_displayed(selector):
     def show_answer(*args, **kwargs):
+        if not is_question_left():
+            return State.QUESTION_REQUIRED
         try:
-            for line in selector.load_answer_for_current_question():
-                print(line, end="")
+            write_paged(selector.stream_answer_for_current_question(), sys.stdout, get_page_lines(), ask_more)
             return State.ANSWER_DISPLAYED
         except OSError as e:
-            print(f"WARNING: {str(e)}")
-            print("Have you renamed file while program was running?")
-            print("Restoring index...")
-            selector.reload_index()
+            return restore_index(e)
+
+    async def show_answer_async(*args, **kwargs):
+        if not is_question_left():
             return State.QUESTION_REQUIRED
+        try:
+            await async_write_paged(selector.stream_answer_for_current_question(), sys.stdout, get_page_lines(),
+                                    ask_more_async)
+            return State.ANSWER_DISPLAYED
+        except OSError as e:
+            return restore_index(e)
 
     function_selector = FunctionSelector()
     function_selector.set_on_command_function(
         ("c", "continue"),
-        show_answer,
+        show_answer_async if asynchronous else show_answer,
         "Show answer for displayed question")
     function_selector.set_on_command_function(
         ("n", "next"),
@@ -37,14 +77,26 @@ def get_on_question_displayed(selector):
         lambda *args, **kwargs: print(function_selector.get_help()),
         "Show this hint")
 
-    def on_question_displayed(state, context):
-        print("\n---")
-        command = input(f"Continue? {function_selector.get_hint()}\n")
+    def handle_command(command, context):
         try:
             return function_selector(command, context=context)
+        except AmbiguousCommand as e:
+            print(str(e))
         except StopIteration:
             print(f"Unknown command: {command}")
             print(function_selector.get_help())
         return None
 
-    return on_question_displayed
\ No newline at end of file
+    def on_question_displayed(state, context):
+        print("\n---")
+        command = user_input(f"Continue? {function_selector.get_hint()}\n")
+        return handle_command(command, context)
+
+    async def on_question_displayed_async(state, context):
+        print("\n---")
+        command = await async_user_input(f"Continue? {function_selector.get_hint()}\n")
+        # commands waiting for user are coroutines too
+        result = handle_command(command, context)
+        return await result if inspect.isawaitable(result) else result
+
+    return on_question_displayed_async if asynchronous else on_question_displayed
@@ -1,14 +1,53 @@
+import inspect
+
 from states.state_enum import State
-from utils.function_selector import FunctionSelector
+from utils.function_selector import AmbiguousCommand, FunctionSelector
+from utils.user_input import async_user_input, user_input
 
 
-def get_on_statistics_shown(selector):
-    def pretty_print_statistics(*args, **kwargs):
-        statistics = selector.get_statistics()
+def get_on_statistics_shown(selector, latency_collector=None, asynchronous=False):
+    def print_answers(statistics):
         print("Total answered questions: ", statistics["answered"])
         print("Correctly: ", statistics["successes"])
         print("Somewhat correctly: ", statistics["answered"] - statistics["failures"] - statistics["successes"])
         print("Incorrectly: ", statistics["failures"])
+
+    def pretty_print_statistics(*args, **kwargs):
+        print_answers(selector.get_statistics())
+        print("\nThis session:")
+        print_answers(selector.get_session_statistics())
+        statistics_by_tag = selector.get_statistics_by_tag()
+        if statistics_by_tag:
+            print("\nBy tag (questions, answered, correctly, incorrectly):")
+            for tag, statistics in sorted(statistics_by_tag.items()):
+                print(f"{tag}: {statistics['questions']}, {statistics['answered']}, "
+                      f"{statistics['successes']}, {statistics['failures']}")
+        return None
+
+    tags_prompt = "Tags separated by commas (empty - all tags): "
+
+    def print_tags():
+        statistics_by_tag = selector.get_statistics_by_tag()
+        print("Known tags (questions): " + ", ".join(f"{tag} ({statistics_by_tag[tag]['questions']})"
+                                                     for tag in selector.get_tags()))
+        tags_filter = selector.get_tags_filter()
+        print(f"Asking questions from: {', '.join(tags_filter) if tags_filter else 'all tags'}")
+
+    def set_tags(line):
+        tags = [tag.strip() for tag in line.split(",")]
+        try:
+            selector.set_tags_filter([tag for tag in tags if tag])
+        except ValueError as e:
+            print(str(e))
+
+    def choose_tags(*args, **kwargs):
+        print_tags()
+        set_tags(user_input(tags_prompt))
+        return None
+
+    async def choose_tags_async(*args, **kwargs):
+        print_tags()
+        set_tags(await async_user_input(tags_prompt))
         return None
 
     function_selector = FunctionSelector()
@@ -20,6 +59,15 @@ def get_on_statistics_shown(selector):
         ("r", "reask"),
         lambda *args, **kwargs: selector.reask_last_question(),
         "Reask last question after a little while (stacks)")
+    function_selector.set_on_command_function(
+        ("t", "tags"),
+        choose_tags_async if asynchronous else choose_tags,
+        "Ask only questions with chosen tags")
+    if latency_collector is not None:
+        function_selector.set_on_command_function(
+            ("l", "latency"),
+            lambda *args, **kwargs: print(latency_collector.format_report()),
+            "Show where time goes: calls and latency of every state and transition")
     function_selector.set_on_command_function(
         ("c", "continue"),
         lambda *args, **kwargs: State.QUESTION_REQUIRED,
@@ -29,21 +77,36 @@ def get_on_statistics_shown(selector):
         lambda *args, **kwargs: print(function_selector.get_help()),
         "Show this hint")
 
-    def on_question_displayed(state, context):
+    def print_history():
         print("\n---")
         if selector.history:
             print("\nLast answered questions:")
-            for question in selector.history[::-1]:
+            for question in reversed(selector.history):
                 print(question)
         else:
             print("\nNo questions yet been answered")
         print("\n---")
-        command = input(f"What to do next? {function_selector.get_hint()}\n")
+
+    def handle_command(command, context):
         try:
             return function_selector(command, context=context)
+        except AmbiguousCommand as e:
+            print(str(e))
         except StopIteration:
             print(f"Unknown command: {command}")
             print(function_selector.get_help())
         return None
 
-    return on_question_displayed
\ No newline at end of file
+    def on_question_displayed(state, context):
+        print_history()
+        command = user_input(f"What to do next? {function_selector.get_hint()}\n")
+        return handle_command(command, context)
+
+    async def on_question_displayed_async(state, context):
+        print_history()
+        command = await async_user_input(f"What to do next? {function_selector.get_hint()}\n")
+        # commands waiting for user are coroutines too
+        result = handle_command(command, context)
+        return await result if inspect.isawaitable(result) else result
+
+    return on_question_displayed_async if asynchronous else on_question_displayed
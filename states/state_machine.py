@@ -0,0 +1,23 @@
+from states.on_answer_displayed import get_on_answer_displayed
+from states.on_question_displayed import get_on_question_displayed
+from states.on_question_required import get_on_question_required
+from states.on_statistics_shown import get_on_statistics_shown
+from states.state_enum import State
+from utils.async_lite_state_machine import AsyncLiteStateMachine
+from utils.lite_state_machine import LiteStateMachine
+
+
+def create_state_machine(qselector, latency_collector=None, with_pager=False, asynchronous=False):
+    state_machine = AsyncLiteStateMachine(State.QUESTION_REQUIRED) if asynchronous \
+        else LiteStateMachine(State.QUESTION_REQUIRED)
+    state_machine.set_latency_collector(latency_collector)
+    state_machine.set_head_step_cb(lambda s, c: s != State.EXITING)
+    state_machine.set_on_state_cb(State.QUESTION_REQUIRED, get_on_question_required(qselector))
+    state_machine.set_on_state_cb(State.QUESTION_DISPLAYED, get_on_question_displayed(qselector, with_pager,
+                                                                                   asynchronous))
+    state_machine.set_on_state_cb(State.ANSWER_DISPLAYED, get_on_answer_displayed(qselector, asynchronous))
+    state_machine.set_on_state_cb(State.STATISTICS_SHOWN, get_on_statistics_shown(qselector, latency_collector,
+                                                                                 asynchronous))
+    state_machine.set_on_state_cb(State.EXITING, lambda s, c: exit(0))
+    state_machine.set_default_on_transition_cb(lambda tup, c: None)
+    return state_machine
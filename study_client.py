@@ -0,0 +1,125 @@
+"""
+Client of study_server.py and load generator measuring its request latency:
+every simulated user keeps own connection and answers questions as fast as it can.
+Usage: python study_client.py --port PORT [--users 300] [--rounds 20] [--report PATH]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+_GRADES = ("success", "success", "failure", "ambiguity")
+_STATISTICS_EVERY = 10
+
+
+class StudyClient:
+    """HTTP/1.1 client reusing single connection"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str):
+        self._reader = reader
+        self._writer = writer
+        self._host = host
+
+    @staticmethod
+    async def connect(host: str, port: int) -> "StudyClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return StudyClient(reader, writer, host)
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, Dict]:
+        data = json.dumps(body).encode() if body is not None else b""
+        self._writer.write(f"{method} {path} HTTP/1.1\r\n"
+                           f"Host: {self._host}\r\n"
+                           f"Content-Type: application/json\r\n"
+                           f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length)) if length else {}
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def simulate_user(host: str, port: int, user: str, rounds: int, rng: random.Random,
+                        latencies: Dict[str, List[float]]):
+    client = await StudyClient.connect(host, port)
+
+    async def timed(name, method, action, body=None):
+        start = time.perf_counter()
+        status, response = await client.request(method, f"/users/{user}/{action}", body)
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"{method} {action} of {user} failed with {status}: {response.get('error')}")
+        return response
+
+    try:
+        for i in range(rounds):
+            await timed("next", "POST", "next")
+            await timed("answer", "GET", "answer")
+            await timed("grade", "POST", "grade", {"grade": rng.choice(_GRADES)})
+            if (i + 1) % _STATISTICS_EVERY == 0:
+                await timed("statistics", "GET", "statistics")
+    finally:
+        await client.close()
+
+
+def _summarize(latencies: List[float]) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "mean": sum(latencies) / len(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+        "max": latencies[-1],
+    }
+
+
+async def run_load(host: str, port: int, users: int, rounds: int, seed: int = 0) -> Dict:
+    latencies: Dict[str, List[float]] = {}
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_user(host, port, f"user{i}", rounds, random.Random(rng.random()), latencies)
+                           for i in range(users)))
+    elapsed_secs = time.perf_counter() - start
+    return {
+        "elapsed_secs": elapsed_secs,
+        "requests_per_sec": sum(map(len, latencies.values())) / elapsed_secs,
+        "latency": {name: _summarize(values) for name, values in latencies.items()},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--users", type=int, default=300, help="Number of concurrent simulated users")
+    parser.add_argument("--rounds", type=int, default=20, help="Questions answered by every user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", metavar="PATH", default=None, help="Write results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = asyncio.run(run_load(args.host, args.port, args.users, args.rounds, args.seed))
+    print(f"{args.users} users: {results['requests_per_sec']:.0f} requests/s in {results['elapsed_secs']:.2f}s")
+    print(f"{'request':>12} {'count':>7} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+    for name, summary in results["latency"].items():
+        print(f"{name:>12} {summary['count']:>7} " + " ".join(
+            f"{1000 * summary[k]:>7.2f}ms" for k in ("mean", "p50", "p99", "max")))
+    if args.report is not None:
+        with open(args.report, "w") as fh:
+            json.dump(dict(results, settings=vars(args)), fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
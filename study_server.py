@@ -0,0 +1,300 @@
+"""
+Several users studying from one vault in one process: HTTP/JSON server on asyncio.
+Vault index, questions and answer cache are shared, while every user has own QuestionSelector,
+i.e. own progress (saved in usual format under <save_data_dir>/users/<user>), history and session.
+Index is rescanned periodically and its changes are applied to shared questions once, for all users.
+
+    POST /users/<user>/next        -> {"question": ..., "tag": ...}
+    GET  /users/<user>/answer      -> {"answer": ...}
+    POST /users/<user>/grade       <- {"grade": "success" | "failure" | "ambiguity"}
+    POST /users/<user>/reask
+    GET  /users/<user>/statistics  -> {"total": ..., "session": ..., "by_tag": ..., "history": [...]}
+
+Requests of every user are served one at a time; answers are read and selectors are created
+off event loop thread, the latter under lock guarding shared questions.
+"""
+import asyncio
+import json
+import re
+import signal
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from answer_cache import AnswerCache
+from question_selector import QuestionSelector
+from vault_index import VaultIndex
+from weight_handler import QuestionSlots
+
+_USER_NAME = re.compile(r"[A-Za-z0-9_\-]{1,64}")
+_MAX_BODY_BYTES = 1 << 16
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _User:
+    __slots__ = ("selector", "lock", "is_graded")
+
+    def __init__(self, selector: QuestionSelector):
+        self.selector = selector
+        self.lock = asyncio.Lock()
+        # question drawn last is graded once
+        self.is_graded = False
+
+
+class StudyServer:
+    def __init__(self, paths_to_questions: List[Path], path_to_save_data_dir: Path,
+                 scan_workers: int = VaultIndex.DEFAULT_SCAN_WORKERS,
+                 storage: str = "pickle", session_size: int = 0, cooldown: int = 1):
+        self._paths_to_questions = paths_to_questions
+        self._path_to_save_data_dir = path_to_save_data_dir
+        self._storage = storage
+        self._session_size = session_size
+        self._cooldown = cooldown
+        self._index = VaultIndex(paths_to_questions, scan_workers)
+        self._index.rescan()
+        if not self._index.questions():
+            raise RuntimeError("No questions loaded")
+        self._questions = QuestionSlots(self._index.questions())
+        self._answers = AnswerCache()
+        # selectors are created on executor threads, shared questions are not changed meanwhile;
+        # waiting for it does not block event loop, unlike threading lock would
+        self._questions_lock = asyncio.Lock()
+        self._users: Dict[str, _User] = {}
+        self._creating: Dict[str, asyncio.Future] = {}
+
+    async def get_user(self, user: str) -> _User:
+        state = self._users.get(user)
+        if state is not None:
+            return state
+        if not _USER_NAME.fullmatch(user):
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Bad user name: {user}")
+        creation = self._creating.get(user)
+        if creation is None:
+            creation = asyncio.ensure_future(self._create_user(user))
+            creation.add_done_callback(lambda f: self._creating.pop(user))
+            self._creating[user] = creation
+        # user is created even if request is cancelled, other requests of this user may wait for it
+        return await asyncio.shield(creation)
+
+    async def _create_user(self, user: str) -> _User:
+        async with self._questions_lock:
+            # progress is loaded and weights computed off event loop thread, so other users are served meanwhile
+            selector = await asyncio.get_running_loop().run_in_executor(None, self._create_selector, user)
+            # registered before lock is released, so changes of questions made after creation reach it
+            state = self._users[user] = _User(selector)
+        return state
+
+    def _create_selector(self, user: str) -> QuestionSelector:
+        return QuestionSelector(
+            self._paths_to_questions, False, self._path_to_save_data_dir / "users" / user,
+            storage=self._storage, session_size=self._session_size, cooldown=self._cooldown,
+            shared_questions=self._questions, answers=self._answers)
+
+    def _selectors(self) -> List[QuestionSelector]:
+        return [state.selector for state in self._users.values()]
+
+    def autosave(self):
+        for selector in self._selectors():
+            selector.autosave()
+
+    def save_all(self):
+        for selector in self._selectors():
+            selector.save_progress()
+
+    async def refresh_index(self) -> bool:
+        """Rescans index off event loop thread and patches its changes into questions of every user"""
+        changes = await asyncio.get_running_loop().run_in_executor(None, self._index.rescan)
+        if not changes:
+            return False
+        async with self._questions_lock:
+            self._questions.apply_changes(changes)
+            for state in self._users.values():
+                state.selector.on_shared_questions_changed(changes)
+        if not len(self._questions):
+            print("WARNING: All questions were removed from vault")
+        return True
+
+    async def handle(self, method: str, path: str, body: Optional[Dict]) -> Dict:
+        parts = path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "users":
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown path: {path}")
+        _, user, action = parts
+        handler = self._ROUTES.get((method, action))
+        if handler is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown request: {method} {path}")
+        state = await self.get_user(user)
+        async with state.lock:
+            return await handler(self, state, body or {})
+
+    async def _next(self, state: _User, body: Dict) -> Dict:
+        if not len(self._questions):
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "No questions loaded")
+        question, tag = state.selector.load_next_question()
+        state.is_graded = False
+        return {"question": question, "tag": tag}
+
+    async def _answer(self, state: _User, body: Dict) -> Dict:
+        selector = state.selector
+        self._require_question(selector)
+        try:
+            # file is read off event loop thread, it may take a while for large answers
+            lines = await asyncio.get_running_loop().run_in_executor(
+                None, selector.load_answer_for_current_question)
+        except OSError as e:
+            raise HttpError(HTTPStatus.GONE, str(e))
+        return {"answer": "".join(lines)}
+
+    async def _grade(self, state: _User, body: Dict) -> Dict:
+        selector = state.selector
+        self._require_question(selector)
+        if state.is_graded:
+            raise HttpError(HTTPStatus.CONFLICT, "Question is graded already, request next one first")
+        grades = {
+            "success": selector.success_on_current_question,
+            "failure": selector.fail_on_current_question,
+            "ambiguity": selector.ambiguity_on_current_question,
+        }
+        grade = grades.get(body.get("grade"))
+        if grade is None:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"grade should be one of: {', '.join(grades)}")
+        grade()
+        state.is_graded = True
+        return {"session": selector.get_session_statistics()}
+
+    async def _reask(self, state: _User, body: Dict) -> Dict:
+        self._require_question(state.selector)
+        state.selector.reask_last_question()
+        return {}
+
+    async def _statistics(self, state: _User, body: Dict) -> Dict:
+        selector = state.selector
+        return {
+            "total": selector.get_statistics(),
+            "session": selector.get_session_statistics(),
+            "by_tag": selector.get_statistics_by_tag(),
+            "history": [str(q) for q in reversed(selector.history)],
+        }
+
+    @staticmethod
+    def _require_question(selector: QuestionSelector):
+        if selector.current_question_path is None:
+            raise HttpError(HTTPStatus.CONFLICT, "No question is asked, request next one first")
+
+    _ROUTES = {
+        ("POST", "next"): _next,
+        ("GET", "answer"): _answer,
+        ("POST", "grade"): _grade,
+        ("POST", "reask"): _reask,
+        ("GET", "statistics"): _statistics,
+    }
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 with keep-alive, one request at a time"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, response = HTTPStatus.OK, await self.handle(method, path, body)
+                except HttpError as e:
+                    status, response = e.status, {"error": str(e)}
+                except Exception as e:
+                    print(f"WARNING: {method} {path} failed: {e!r}")
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)}
+                _write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as e:
+            _write_response(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def _refresh_periodically(self, interval_secs: float):
+        while True:
+            await asyncio.sleep(interval_secs)
+            try:
+                await self.refresh_index()
+            except Exception as e:
+                print(f"WARNING: Refreshing questions index failed: {e!r}")
+
+    async def run(self, host: str, port: int, autosave_secs: float = 60.0, refresh_index_secs: float = 60.0):
+        """Serves until interrupted or terminated, then saves progress of every user"""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # not supported on this platform, KeyboardInterrupt still stops server
+        # hundreds of users may connect at once
+        server = await asyncio.start_server(self.serve_connection, host, port, backlog=1024)
+        print(f"Serving {len(self._index.questions())} questions on "
+              + ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets))
+        refresh = None
+        if refresh_index_secs > 0:
+            refresh = asyncio.create_task(self._refresh_periodically(refresh_index_secs))
+        try:
+            async with server:
+                while not stop.is_set():
+                    try:
+                        await asyncio.wait_for(stop.wait(), autosave_secs)
+                    except asyncio.TimeoutError:
+                        self.autosave()
+        finally:
+            if refresh is not None:
+                refresh.cancel()
+            self.save_all()
+            print(f"Progress of {len(self._users)} users saved")
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Optional[Dict], bool]]:
+    """None if connection was closed between requests"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+    if length > _MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large")
+    body = None
+    if length:
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Request body is not JSON")
+        if not isinstance(body, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Request body should be JSON object")
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method, target.partition("?")[0], body, keep_alive
+
+
+def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, response: Dict, keep_alive: bool):
+    body = json.dumps(response).encode()
+    writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                 f"Content-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n"
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
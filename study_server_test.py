@@ -0,0 +1,131 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from question_selector import QuestionSelector
+from study_client import StudyClient, run_load
+from study_server import StudyServer
+
+
+class StudyServerTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.vault = self.root / "vault"
+        self.vault.mkdir()
+        for i in range(10):
+            (self.vault / f"q{i}.md").write_text(f"answer {i}\n")
+        self.server = StudyServer([self.vault], self.root / "save")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, coroutine_fn):
+        async def run():
+            server = await asyncio.start_server(self.server.serve_connection, "127.0.0.1", 0)
+            async with server:
+                return await coroutine_fn(server.sockets[0].getsockname()[1])
+
+        return asyncio.run(run())
+
+    def test_users_have_own_progress(self):
+        async def study(port):
+            alice = await StudyClient.connect("127.0.0.1", port)
+            bob = await StudyClient.connect("127.0.0.1", port)
+            status, question = await alice.request("POST", "/users/alice/next")
+            self.assertEqual(status, 200)
+            status, answer = await alice.request("GET", "/users/alice/answer")
+            self.assertEqual(answer["answer"], f"answer {question['question'][1]}\n")
+            status, response = await alice.request("POST", "/users/alice/grade", {"grade": "success"})
+            self.assertEqual(response["session"], {"successes": 1, "failures": 0, "answered": 1})
+            self.assertEqual((await bob.request("POST", "/users/bob/grade", {"grade": "success"}))[0], 409)
+            await bob.request("POST", "/users/bob/next")
+            self.assertEqual((await bob.request("POST", "/users/bob/grade", {"grade": "nope"}))[0], 400)
+            await bob.request("POST", "/users/bob/grade", {"grade": "failure"})
+            await bob.request("POST", "/users/bob/next")
+            status, statistics = await bob.request("GET", "/users/bob/statistics")
+            self.assertEqual(statistics["total"], {"successes": 0, "failures": 1, "answered": 1})
+            self.assertEqual(len(statistics["history"]), 1)
+            self.assertEqual((await bob.request("GET", "/users/bob/unknown"))[0], 404)
+            self.assertEqual((await bob.request("GET", "/users/b.b/statistics"))[0], 400)
+            await alice.close()
+            await bob.close()
+
+        self._run(study)
+        self.server.save_all()
+        alice = QuestionSelector([self.vault], False, self.root / "save" / "users" / "alice")
+        self.assertEqual(alice.get_statistics(), {"successes": 1, "failures": 0, "answered": 1})
+
+    def test_load_generator(self):
+        results = self._run(lambda port: run_load("127.0.0.1", port, users=20, rounds=10))
+        self.assertEqual(results["latency"]["grade"]["count"], 200)
+        self.assertEqual(results["latency"]["statistics"]["count"], 20)
+        self.assertEqual(len(self.server._users), 20)
+
+    def test_question_graded_once(self):
+        async def study(port):
+            alice = await StudyClient.connect("127.0.0.1", port)
+            await alice.request("POST", "/users/alice/next")
+            self.assertEqual((await alice.request("POST", "/users/alice/grade", {"grade": "success"}))[0], 200)
+            self.assertEqual((await alice.request("POST", "/users/alice/grade", {"grade": "success"}))[0], 409)
+            await alice.request("POST", "/users/alice/next")
+            status, response = await alice.request("POST", "/users/alice/grade", {"grade": "failure"})
+            self.assertEqual(status, 200)
+            self.assertEqual(response["session"], {"successes": 1, "failures": 1, "answered": 2})
+            await alice.close()
+
+        self._run(study)
+
+    def test_refreshed_index_reaches_every_user(self):
+        async def study(port):
+            alice = await StudyClient.connect("127.0.0.1", port)
+            bob = await StudyClient.connect("127.0.0.1", port)
+            question = (await alice.request("POST", "/users/alice/next"))[1]["question"]
+            await bob.request("POST", "/users/bob/next")
+            (self.vault / f"{question}.md").rename(self.vault / "renamed.md")
+            (self.vault / "new.md").write_text("new answer\n")
+            self.assertTrue(await self.server.refresh_index())
+            status, answer = await alice.request("GET", "/users/alice/answer")
+            self.assertEqual(answer["answer"], f"answer {question[1]}\n")
+            await alice.close()
+            await bob.close()
+
+        self._run(study)
+        alice, bob = (self.server._users[user].selector for user in ("alice", "bob"))
+        self.assertEqual(alice.current_question_path, self.vault / "renamed.md")
+        # questions are shared, while weights are own
+        self.assertIs(alice._wh.question_uids, bob._wh.question_uids)
+        self.assertIsNot(alice._wh.weights, bob._wh.weights)
+        self.assertEqual(len(bob._wh.weights), 11)
+        self.assertIn(self.vault / "new.md", bob._wh.question_uids_to_tags)
+
+    def test_refresh_waits_for_user_creation_without_blocking_loop(self):
+        create_selector = self.server._create_selector
+
+        def slow_create_selector(user):
+            time.sleep(0.3)
+            return create_selector(user)
+
+        self.server._create_selector = slow_create_selector
+        (self.vault / "new.md").write_text("new answer\n")
+
+        async def study():
+            creation = asyncio.ensure_future(self.server.get_user("alice"))
+            await asyncio.sleep(0.05)
+            refresh = asyncio.ensure_future(self.server.refresh_index())
+            start = time.monotonic()
+            await asyncio.sleep(0.05)
+            self.assertLess(time.monotonic() - start, 0.2)
+            self.assertFalse(refresh.done())
+            state = await creation
+            self.assertTrue(await refresh)
+            return state
+
+        alice = asyncio.run(study())
+        self.assertEqual(len(alice.selector._wh.weights), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
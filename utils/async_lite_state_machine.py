@@ -0,0 +1,88 @@
+"""
+LiteStateMachine running on asyncio event loop. Registration API and semantics are the same,
+but callbacks may also be coroutine functions: while one awaits (e.g. user input, see async_user_input)
+background tasks get to run. Everything runs on event loop thread, so background tasks never
+interleave with callbacks in the middle of their synchronous parts.
+"""
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Union
+
+from utils.lite_state_machine import LiteStateMachine
+
+
+class _Halt(Exception):
+    """Carries StopIteration out of coroutines, which would turn it into RuntimeError"""
+
+
+async def _resolve(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class AsyncLiteStateMachine(LiteStateMachine):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._background_tasks: List[Tuple[Callable[[Any, Dict[Any, Any]], Union[Awaitable, None]], float]] = []
+
+    def add_background_task(self, cb: Callable[[Any, Dict[Any, Any]], Union[Awaitable, None]], interval_secs: float):
+        """
+        cb(current_state, context) is called every interval_secs while main loop is running.
+        Exceptions are reported and do not stop either the task or main loop.
+        """
+        if interval_secs <= 0:
+            raise ValueError(f"interval_secs should be positive: {interval_secs}")
+        self._background_tasks.append((cb, interval_secs))
+
+    async def _call_async(self, kind: str, key: Any, cb: Callable[..., Any], *args):
+        try:
+            if self._latency_collector is None:
+                return await _resolve(cb(*args))
+            return await self._latency_collector.measure_async(kind, key, cb, *args)
+        except StopIteration as si:
+            raise _Halt(si) from None
+        except RuntimeError as e:
+            if isinstance(e.__cause__, StopIteration):
+                raise _Halt(e.__cause__) from None
+            raise
+
+    async def _run_periodically(self, cb, interval_secs: float):
+        while True:
+            await asyncio.sleep(interval_secs)
+            try:
+                await _resolve(cb(self._current_state, self._context))
+            except Exception as e:
+                print(f"WARNING: Background task {getattr(cb, '__name__', cb)} failed: {e!r}")
+
+    async def run_main_loop(self):
+        tasks = [asyncio.ensure_future(self._run_periodically(cb, interval_secs))
+                 for cb, interval_secs in self._background_tasks]
+        try:
+            while True:
+                if self._head_step_cb:
+                    should_continue = await _resolve(self._head_step_cb(self._current_state, self._context))
+                    if not should_continue:
+                        break
+
+                new_state = await self._call_async("state", self._current_state, self._get_state_cb(),
+                                                   self._current_state, self._context)
+
+                if new_state is None:
+                    new_state = self._current_state
+                transition_key = (self._current_state, new_state)
+                await self._call_async("transition", transition_key, self._get_transition_cb(transition_key),
+                                       transition_key, self._context)
+
+                self._current_state = new_state
+        except (StopIteration, _Halt) as si:
+            if isinstance(si, _Halt):
+                si = si.args[0]
+            print(f"HALT: State machine is stopped with 'StopIteration': {si}, use head step instead")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start_main_loop(self):
+        asyncio.run(self.run_main_loop())
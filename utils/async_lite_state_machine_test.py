@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from enum import Enum
+
+import timeout_decorator
+from async_lite_state_machine import AsyncLiteStateMachine
+from latency_collector import LatencyCollector
+
+
+class States(str, Enum):
+    BEGIN = "BEGIN"
+    STATE1 = "STATE1"
+    STATE2 = "STATE2"
+
+
+class AsyncLiteStateMachineTest(unittest.TestCase):
+    @timeout_decorator.timeout(1.0, timeout_exception=StopIteration)
+    def test_sync_and_coroutine_callbacks_mixed(self):
+        trace = []
+
+        async def begin(s, c):
+            await asyncio.sleep(0)
+            trace.append(s)
+            return States.STATE1
+
+        def state1(s, c):
+            trace.append(s)
+            return States.STATE2
+
+        async def transition(key, c):
+            trace.append(key)
+
+        sm = AsyncLiteStateMachine(States.BEGIN)
+        sm.set_on_state_cb(States.BEGIN, begin)
+        sm.set_on_state_cb(States.STATE1, state1)
+        sm.set_head_step_cb(lambda s, c: s != States.STATE2)
+        sm.set_on_transition_cb((States.BEGIN, States.STATE1), transition)
+        sm.set_default_on_transition_cb(lambda key, c: trace.append(key))
+        sm.start_main_loop()
+        self.assertEqual([States.BEGIN, (States.BEGIN, States.STATE1),
+                          States.STATE1, (States.STATE1, States.STATE2)], trace)
+
+    @timeout_decorator.timeout(1.0, timeout_exception=StopIteration)
+    def test_background_tasks_run_while_callback_awaits(self):
+        ticks = []
+
+        async def wait_for_ticks(s, c):
+            while len(ticks) < 3:
+                await asyncio.sleep(0.001)
+            return States.STATE1
+
+        sm = AsyncLiteStateMachine(States.BEGIN)
+        sm.set_on_state_cb(States.BEGIN, wait_for_ticks)
+        sm.set_head_step_cb(lambda s, c: s != States.STATE1)
+        sm.set_default_on_transition_cb(lambda key, c: None)
+        sm.add_background_task(lambda s, c: ticks.append(s), 0.001)
+        sm.add_background_task(lambda s, c: 1 / 0, 0.001)
+        sm.start_main_loop()
+        self.assertEqual(ticks[:3], [States.BEGIN] * 3)
+        self.assertRaises(ValueError, sm.add_background_task, lambda s, c: None, 0)
+
+    @timeout_decorator.timeout(1.0, timeout_exception=StopIteration)
+    def test_stop_iteration_stops_state_machine(self):
+        async def stop(s, c):
+            raise StopIteration("stop")
+
+        for cb in (lambda s, c: exec('raise StopIteration("stop")'), stop):
+            sm = AsyncLiteStateMachine(States.BEGIN, {"test": "nochange"})
+            sm.set_on_state_cb(States.BEGIN, cb)
+            sm.set_default_on_transition_cb(lambda key, c: None)
+            sm.start_main_loop()
+            self.assertEqual({"test": "nochange"}, sm.get_context())
+
+    @timeout_decorator.timeout(1.0, timeout_exception=StopIteration)
+    def test_latency_of_coroutine_callbacks_measured(self):
+        now = 0.0
+        collector = LatencyCollector(clock=lambda: now)
+
+        async def think(s, c):
+            nonlocal now
+            with collector.user_wait():
+                await asyncio.sleep(0)
+                now += 2.0
+            now += 0.5
+            return States.STATE1
+
+        sm = AsyncLiteStateMachine(States.BEGIN)
+        sm.set_latency_collector(collector)
+        sm.set_on_state_cb(States.BEGIN, think)
+        sm.set_head_step_cb(lambda s, c: s != States.STATE1)
+        sm.set_default_on_transition_cb(lambda key, c: None)
+        sm.start_main_loop()
+        entry = collector.get_report()["state"]["BEGIN"]
+        self.assertEqual(entry["count"], 1)
+        self.assertAlmostEqual(entry["compute_secs"], 0.5)
+        self.assertAlmostEqual(entry["wait_secs"], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
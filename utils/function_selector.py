@@ -1,41 +1,72 @@
-from collections import OrderedDict
 from io import StringIO
-from typing import Dict, Tuple, Callable, Any, Iterable, Optional
+from typing import Dict, List, Tuple, Callable, Any, Iterable, Optional
+
+
+class AmbiguousCommand(StopIteration):
+    """Input is prefix of aliases of several commands"""
 
 
 class FunctionSelector:
+    """
+    Commands are looked up by any of their aliases or by any unambiguous prefix of them, e.g. "cont" for "continue",
+    case insensitive. Every prefix of every alias is hashed on registration (flattened trie), so lookup
+    takes single hashing of input.
+    """
     def __init__(self):
-        self._functions: OrderedDict[Tuple[str], Tuple[Callable[..., Any], Optional[str]]] = OrderedDict()
+        self._commands: List[Tuple[Tuple[str, ...], Callable[..., Any], Optional[str]]] = []
+        self._aliases: Dict[str, int] = {}
+        # prefix -> indices of commands having alias with this prefix
+        self._prefixes: Dict[str, Tuple[int, ...]] = {}
+        self._hint: Optional[str] = None
+        self._help: Optional[str] = None
 
     def set_on_command_function(self, inputs: Iterable[str], fn: Callable[..., Any], hint: Optional[str] = None):
         inputs = tuple(i.lower() for i in inputs)
-        for existing_input_variants in self._functions.keys():
-            for v in existing_input_variants:
-                if any((new_input == v) for new_input in inputs):
-                    raise RuntimeError(f"{inputs} intersects with "
-                                       f"already registered input {existing_input_variants}")
-        self._functions[inputs] = (fn, hint)
+        for new_input in inputs:
+            if new_input in self._aliases:
+                raise RuntimeError(f"{inputs} intersects with "
+                                   f"already registered input {self._commands[self._aliases[new_input]][0]}")
+        idx = len(self._commands)
+        self._commands.append((inputs, fn, hint))
+        for new_input in inputs:
+            self._aliases[new_input] = idx
+            for end in range(1, len(new_input)):
+                commands = self._prefixes.get(new_input[:end], ())
+                if idx not in commands:
+                    self._prefixes[new_input[:end]] = commands + (idx,)
+        self._hint = None
+        self._help = None
 
     def __call__(self, input_string: str, *args, **kwargs):
         input_string = input_string.lower()
-        for input_variants, (fn, _) in self._functions.items():
-            if any(input_string == v for v in input_variants):
-                return fn(*args, **kwargs)
-        raise StopIteration("Not found")
+        idx = self._aliases.get(input_string)
+        if idx is None:
+            commands = self._prefixes.get(input_string)
+            if commands is None:
+                raise StopIteration("Not found")
+            if len(commands) > 1:
+                raise AmbiguousCommand(f"Ambiguous command: {input_string} could be "
+                                       + " or ".join(self._commands[i][0][-1] for i in commands))
+            idx = commands[0]
+        return self._commands[idx][1](*args, **kwargs)
 
     def get_hint(self) -> str:
-        return "(" + "/".join(input_variants[0] for input_variants in self._functions.keys()) + ")"
+        if self._hint is None:
+            self._hint = "(" + "/".join(input_variants[0] for input_variants, _, _ in self._commands) + ")"
+        return self._hint
 
     def get_help(self) -> str:
-        ss = StringIO()
-        ss.write("Known commands:\n")
-        for input_variants, (_, hint) in self._functions.items():
-            for v in input_variants[:-1]:
-                ss.write(v)
-                ss.write(", ")
-            ss.write(input_variants[-1])
-            if hint is not None:
-                ss.write(" - ")
-                ss.write(hint)
-            ss.write("\n")
-        return ss.getvalue()
+        if self._help is None:
+            ss = StringIO()
+            ss.write("Known commands:\n")
+            for input_variants, _, hint in self._commands:
+                for v in input_variants[:-1]:
+                    ss.write(v)
+                    ss.write(", ")
+                ss.write(input_variants[-1])
+                if hint is not None:
+                    ss.write(" - ")
+                    ss.write(hint)
+                ss.write("\n")
+            self._help = ss.getvalue()
+        return self._help
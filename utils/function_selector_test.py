@@ -1,6 +1,6 @@
 import unittest
 
-from function_selector import FunctionSelector
+from function_selector import AmbiguousCommand, FunctionSelector
 
 
 class FunctionSelectorTest(unittest.TestCase):
@@ -24,6 +24,33 @@ class FunctionSelectorTest(unittest.TestCase):
         for command in ("Y", "yolo", "YOLO"):
             self.assertEqual(FunctionSelectorTest._fs_ut(command), 1)
 
+    def test_unambiguous_prefixes(self):
+        for command in ("no", "NOP"):
+            self.assertEqual(FunctionSelectorTest._fs_ut(command), 0)
+        self.assertEqual(FunctionSelectorTest._fs_ut("yol"), 1)
+
+    def test_ambiguous_prefix_raises(self):
+        fs = FunctionSelector()
+        fs.set_on_command_function(("st", "stats"), lambda *args, **kwargs: 0)
+        fs.set_on_command_function(("sk", "skip"), lambda *args, **kwargs: 1)
+        fs.set_on_command_function(("s", "statistics"), lambda *args, **kwargs: 2)
+        self.assertEqual(fs("s"), 2)
+        self.assertEqual(fs("sk"), 1)
+        self.assertEqual(fs("stati"), 2)
+        for command in ("sta", "stat"):
+            with self.assertRaises(AmbiguousCommand):
+                fs(command)
+        self.assertRaises(StopIteration, fs, "stop")
+
+    def test_hint_and_help_updated_on_registration(self):
+        fs = FunctionSelector()
+        fs.set_on_command_function(("c", "continue"), lambda *args, **kwargs: 0, "Continue")
+        self.assertEqual(fs.get_hint(), "(c)")
+        self.assertEqual(fs.get_help(), "Known commands:\nc, continue - Continue\n")
+        fs.set_on_command_function(("x", "exit"), lambda *args, **kwargs: 1)
+        self.assertEqual(fs.get_hint(), "(c/x)")
+        self.assertEqual(fs.get_help(), "Known commands:\nc, continue - Continue\nx, exit\n")
+
     def test_invalid_inputs_raises(self):
         for command in ("123", "n   ", "yyyy", "p", ""):
             with self.assertRaises(StopIteration):
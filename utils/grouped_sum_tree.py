@@ -0,0 +1,110 @@
+import random
+from typing import Collection, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from utils.sum_tree import SumTree
+
+
+class GroupedSumTree:
+    """
+    Weights indexed by slot and split into groups, each group has its own SumTree.
+    Draws may be restricted to a subset of groups: group is picked proportionally to its total weight,
+    then element within group's tree. Draw costs O(#groups + log n), choosing subset costs nothing.
+    """
+    def __init__(self, weights: Iterable[float] = (), groups: Iterable[Hashable] = ()):
+        self._trees: Dict[Hashable, SumTree] = {}
+        # slots of group elements in order of their indices in group's tree and location of every slot
+        self._slots_in_group: Dict[Hashable, List[int]] = {}
+        self._locations: List[Tuple[Hashable, int]] = []
+        weights_in_group: Dict[Hashable, List[float]] = {}
+        for i, (weight, group) in enumerate(zip(weights, groups)):
+            slots = self._slots_in_group.setdefault(group, [])
+            self._locations.append((group, len(slots)))
+            slots.append(i)
+            weights_in_group.setdefault(group, []).append(weight)
+        for group, group_weights in weights_in_group.items():
+            self._trees[group] = SumTree(group_weights)
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __getitem__(self, i: int) -> float:
+        group, j = self._locations[i]
+        return self._trees[group][j]
+
+    def group_of(self, i: int) -> Hashable:
+        return self._locations[i][0]
+
+    def total(self, groups: Optional[Collection[Hashable]] = None) -> float:
+        return sum(tree.total() for _, tree in self._selected(groups))
+
+    def has_positive(self, groups: Optional[Collection[Hashable]] = None) -> bool:
+        """Whether anything can be drawn; exact, unlike comparing total with zero"""
+        return any(tree.positive_count() for _, tree in self._selected(groups))
+
+    def update(self, i: int, weight: float):
+        group, j = self._locations[i]
+        self._trees[group].update(j, weight)
+
+    def append(self, weight: float, group: Hashable):
+        self._locations.append(self._append_to_group(len(self._locations), weight, group))
+
+    def swap_remove(self, i: int):
+        """Removes slot i, last slot takes its place"""
+        self._remove_from_group(i)
+        last = len(self._locations) - 1
+        if i != last:
+            group, j = self._locations[last]
+            self._slots_in_group[group][j] = i
+            self._locations[i] = (group, j)
+        self._locations.pop()
+
+    def set_group(self, i: int, group: Hashable):
+        if self._locations[i][0] == group:
+            return
+        weight = self[i]
+        self._remove_from_group(i)
+        self._locations[i] = self._append_to_group(i, weight, group)
+
+    def sample(self, rng: random.Random = random, groups: Optional[Collection[Hashable]] = None) -> int:
+        # rounding errors may leave positive total in group without positive weights
+        selected = [(group, tree, tree.total()) for group, tree in self._selected(groups) if tree.positive_count()]
+        value = rng.random() * sum(total for _, _, total in selected)
+        chosen = None
+        for group, tree, total in selected:
+            if total > 0.0:
+                chosen = (group, tree)
+                if value < total:
+                    break
+                value -= total
+        if chosen is None:
+            raise ValueError("Can not sample from groups with zero total weight")
+        group, tree = chosen
+        return self._slots_in_group[group][tree.sample(rng)]
+
+    def _selected(self, groups: Optional[Collection[Hashable]]):
+        if groups is None:
+            return self._trees.items()
+        return [(group, self._trees[group]) for group in groups if group in self._trees]
+
+    def _append_to_group(self, i: int, weight: float, group: Hashable) -> Tuple[Hashable, int]:
+        tree = self._trees.get(group)
+        if tree is None:
+            tree = self._trees[group] = SumTree()
+            self._slots_in_group[group] = []
+        tree.append(weight)
+        self._slots_in_group[group].append(i)
+        return group, len(tree) - 1
+
+    def _remove_from_group(self, i: int):
+        group, j = self._locations[i]
+        tree = self._trees[group]
+        slots = self._slots_in_group[group]
+        last_j = len(slots) - 1
+        if j != last_j:
+            # last element of group takes freed place in group's tree
+            moved = slots[last_j]
+            tree.update(j, tree[last_j])
+            slots[j] = moved
+            self._locations[moved] = (group, j)
+        tree.pop()
+        slots.pop()
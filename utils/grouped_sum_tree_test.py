@@ -0,0 +1,65 @@
+import random
+import unittest
+
+from grouped_sum_tree import GroupedSumTree
+
+
+class GroupedSumTreeTest(unittest.TestCase):
+    def _assert_consistent(self, tree, weights, groups):
+        self.assertEqual(len(tree), len(weights))
+        self.assertEqual([tree[i] for i in range(len(tree))], weights)
+        self.assertEqual([tree.group_of(i) for i in range(len(tree))], groups)
+        for group in set(groups):
+            expected = sum(w for w, g in zip(weights, groups) if g == group)
+            self.assertAlmostEqual(tree.total([group]), expected)
+
+    def test_updates_and_removals(self):
+        weights = [1.0, 2.0, 3.0, 4.0, 5.0]
+        groups = ["a", "b", "a", "b", "a"]
+        tree = GroupedSumTree(weights, groups)
+        self._assert_consistent(tree, weights, groups)
+        tree.update(1, 10.0)
+        weights[1] = 10.0
+        tree.append(6.0, "c")
+        weights.append(6.0)
+        groups.append("c")
+        self._assert_consistent(tree, weights, groups)
+        tree.swap_remove(0)
+        weights[0], groups[0] = weights.pop(), groups.pop()
+        self._assert_consistent(tree, weights, groups)
+        tree.set_group(2, "b")
+        groups[2] = "b"
+        self._assert_consistent(tree, weights, groups)
+        tree.swap_remove(4)
+        weights.pop()
+        groups.pop()
+        self._assert_consistent(tree, weights, groups)
+        self.assertAlmostEqual(tree.total(), sum(weights))
+
+    def test_sample_within_groups(self):
+        tree = GroupedSumTree([1.0, 100.0, 1.0, 0.0], ["a", "b", "a", "c"])
+        rng = random.Random(0)
+        self.assertEqual({tree.sample(rng, ["a", "unknown"]) for _ in range(100)}, {0, 2})
+        samples = [tree.sample(rng) for _ in range(1000)]
+        self.assertGreater(samples.count(1), 900)
+        self.assertNotIn(3, samples)
+        self.assertRaises(ValueError, tree.sample, rng, ["c"])
+        self.assertRaises(ValueError, tree.sample, rng, [])
+
+    def test_group_with_rounding_residue_only(self):
+        weights = [0.8958, 159.54, 25.0, 1.0]
+        tree = GroupedSumTree(weights, ["a", "a", "a", "b"])
+        for i in (1, 0, 2):
+            tree.update(i, 3.7 * weights[i])
+        for i in (1, 0, 2):
+            tree.update(i, 0.0)
+        self.assertGreater(tree.total(["a"]), 0.0)
+        self.assertFalse(tree.has_positive(["a"]))
+        self.assertTrue(tree.has_positive())
+        rng = random.Random(0)
+        self.assertRaises(ValueError, tree.sample, rng, ["a"])
+        self.assertEqual({tree.sample(rng) for _ in range(100)}, {3})
+
+
+if __name__ == '__main__':
+    unittest.main()
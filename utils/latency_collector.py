@@ -0,0 +1,108 @@
+import bisect
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from io import StringIO
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _key_name(key: Any) -> str:
+    if isinstance(key, tuple):
+        return " -> ".join(_key_name(k) for k in key)
+    return getattr(key, "name", str(key))
+
+
+class _Entry:
+    __slots__ = ("count", "compute_secs", "wait_secs", "max_compute_secs", "compute_histogram", "wait_histogram")
+
+    def __init__(self, buckets_count: int):
+        self.count = 0
+        self.compute_secs = 0.0
+        self.wait_secs = 0.0
+        self.max_compute_secs = 0.0
+        self.compute_histogram: List[int] = [0] * buckets_count
+        self.wait_histogram: List[int] = [0] * buckets_count
+
+
+class LatencyCollector:
+    """
+    Call counts and latency histograms of callbacks keyed by (kind, key), e.g. ("state", State.QUESTION_REQUIRED).
+    Time callback spends waiting for user (inside user_wait) is accounted separately from compute time.
+    """
+    # upper bounds of histogram buckets, the last bucket is unbounded
+    BUCKETS_SECS = (1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._waited_secs = 0.0
+
+    @contextmanager
+    def user_wait(self):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self._waited_secs += self._clock() - start
+
+    def measure(self, kind: str, key: Any, fn: Callable[..., Any], *args, **kwargs):
+        waited_secs_before = self._waited_secs
+        start = self._clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed_secs = self._clock() - start
+            wait_secs = self._waited_secs - waited_secs_before
+            self.record(kind, key, elapsed_secs - wait_secs, wait_secs)
+
+    async def measure_async(self, kind: str, key: Any, fn: Callable[..., Any], *args, **kwargs):
+        """As measure, but fn may be coroutine function; its result is awaited"""
+        waited_secs_before = self._waited_secs
+        start = self._clock()
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            elapsed_secs = self._clock() - start
+            wait_secs = self._waited_secs - waited_secs_before
+            self.record(kind, key, elapsed_secs - wait_secs, wait_secs)
+
+    def record(self, kind: str, key: Any, compute_secs: float, wait_secs: float = 0.0):
+        entry = self._entries.get((kind, _key_name(key)))
+        if entry is None:
+            entry = self._entries[(kind, _key_name(key))] = _Entry(len(LatencyCollector.BUCKETS_SECS) + 1)
+        entry.count += 1
+        entry.compute_secs += compute_secs
+        entry.wait_secs += wait_secs
+        entry.max_compute_secs = max(entry.max_compute_secs, compute_secs)
+        entry.compute_histogram[bisect.bisect_left(LatencyCollector.BUCKETS_SECS, compute_secs)] += 1
+        entry.wait_histogram[bisect.bisect_left(LatencyCollector.BUCKETS_SECS, wait_secs)] += 1
+
+    def get_report(self) -> Dict[str, Dict[str, Dict]]:
+        report = {"buckets_secs": list(LatencyCollector.BUCKETS_SECS)}
+        for (kind, key), entry in self._entries.items():
+            report.setdefault(kind, {})[key] = {
+                "count": entry.count,
+                "compute_secs": entry.compute_secs,
+                "wait_secs": entry.wait_secs,
+                "max_compute_secs": entry.max_compute_secs,
+                "compute_histogram": list(entry.compute_histogram),
+                "wait_histogram": list(entry.wait_histogram),
+            }
+        return report
+
+    def format_report(self) -> str:
+        ss = StringIO()
+        ss.write(f"{'callback':<50} {'calls':>7} {'compute mean':>13} {'compute max':>12} {'wait mean':>10}\n")
+        by_compute_time = sorted(self._entries.items(), key=lambda item: item[1].compute_secs, reverse=True)
+        for (kind, key), entry in by_compute_time:
+            ss.write(f"{kind + ' ' + key:<50} {entry.count:>7} {1000 * entry.compute_secs / entry.count:>11.2f}ms "
+                     f"{1000 * entry.max_compute_secs:>10.2f}ms {entry.wait_secs / entry.count:>9.2f}s\n")
+        return ss.getvalue()
+
+    def dump(self, path):
+        with open(path, "w") as fh:
+            json.dump(self.get_report(), fh, indent=2)
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from enum import Enum
+
+import timeout_decorator
+from latency_collector import LatencyCollector
+from lite_state_machine import LiteStateMachine
+
+
+class States(str, Enum):
+    BEGIN = "BEGIN"
+    END = "END"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LatencyCollectorTest(unittest.TestCase):
+    def test_wait_accounted_apart_from_compute(self):
+        clock = FakeClock()
+        collector = LatencyCollector(clock)
+
+        def callback():
+            clock.now += 0.002
+            with collector.user_wait():
+                clock.now += 5.0
+            clock.now += 0.003
+            return "result"
+
+        self.assertEqual(collector.measure("state", States.BEGIN, callback), "result")
+        collector.record("state", States.BEGIN, 0.5)
+        report = collector.get_report()["state"]["BEGIN"]
+        self.assertEqual(report["count"], 2)
+        self.assertAlmostEqual(report["compute_secs"], 0.505)
+        self.assertAlmostEqual(report["wait_secs"], 5.0)
+        self.assertAlmostEqual(report["max_compute_secs"], 0.5)
+        self.assertEqual(report["compute_histogram"], [0, 0, 1, 0, 1, 0, 0])
+        self.assertEqual(report["wait_histogram"], [1, 0, 0, 0, 0, 1, 0])
+
+    @timeout_decorator.timeout(0.1, timeout_exception=StopIteration)
+    def test_state_machine_callbacks_measured(self):
+        collector = LatencyCollector()
+        sm = LiteStateMachine(States.BEGIN)
+        sm.set_latency_collector(collector)
+        sm.set_on_state_cb(States.BEGIN, lambda s, c: States.END)
+        sm.set_head_step_cb(lambda s, c: s != States.END)
+        sm.set_default_on_transition_cb(lambda t, c: None)
+        sm.start_main_loop()
+        report = collector.get_report()
+        self.assertEqual(report["state"]["BEGIN"]["count"], 1)
+        self.assertEqual(report["transition"]["BEGIN -> END"]["count"], 1)
+        self.assertIn("transition BEGIN -> END", collector.format_report())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "latency.json")
+            collector.dump(path)
+            with open(path) as fh:
+                self.assertEqual(json.load(fh), report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ class LiteStateMachine(object):
         self._default_on_state_cb = None
         self._on_transition_cbs = {}
         self._default_on_transition_cb = None
+        self._latency_collector = None
 
     def get_context(self):
         return self._context
@@ -41,6 +42,32 @@ class LiteStateMachine(object):
             raise RuntimeError("Default transition callback is already registered")
         self._default_on_transition_cb = cb
 
+    def set_latency_collector(self, latency_collector):
+        """Opt-in: latency_collector.measure(kind, key, cb, *args) is used to call state and transition callbacks"""
+        self._latency_collector = latency_collector
+
+    def _call(self, kind: str, key: Any, cb: Callable[..., Any], *args):
+        if self._latency_collector is None:
+            return cb(*args)
+        return self._latency_collector.measure(kind, key, cb, *args)
+
+    def _get_state_cb(self) -> Callable[[Any, Dict[Any, Any]], Any]:
+        if self._current_state not in self._on_state_cbs:
+            if self._default_on_state_cb:
+                return self._default_on_state_cb
+            raise RuntimeError(f"HALT: No callback for state {self._current_state} "
+                               f"and no default callback")
+        return self._on_state_cbs[self._current_state]
+
+    def _get_transition_cb(self, transition_key: Tuple[Any, Any]) -> Callable[[Any, Dict[Any, Any]], None]:
+        if transition_key not in self._on_transition_cbs:
+            if self._default_on_transition_cb:
+                return self._default_on_transition_cb
+            raise RuntimeError(f"HALT: No callback for transition "
+                               f"{transition_key[0]} -> {transition_key[1]} "
+                               f"and no default transition")
+        return self._on_transition_cbs[transition_key]
+
     def start_main_loop(self):
         try:
             while True:
@@ -49,27 +76,14 @@ class LiteStateMachine(object):
                     if not should_continue:
                         break
 
-                if self._current_state not in self._on_state_cbs:
-                    if self._default_on_state_cb:
-                        new_state = self._default_on_state_cb(self._current_state, self._context)
-                    else:
-                        raise RuntimeError(f"HALT: No callback for state {self._current_state} "
-                                           f"and no default callback")
-                else:
-                    new_state = self._on_state_cbs[self._current_state](self._current_state, self._context)
+                new_state = self._call("state", self._current_state, self._get_state_cb(),
+                                       self._current_state, self._context)
 
                 if new_state is None:
                     new_state = self._current_state
                 transition_key = (self._current_state, new_state)
-                if transition_key not in self._on_transition_cbs:
-                    if self._default_on_transition_cb:
-                        self._default_on_transition_cb(transition_key, self._context)
-                    else:
-                        raise RuntimeError(f"HALT: No callback for transition "
-                                           f"{self._current_state} -> {new_state} "
-                                           f"and no default transition")
-                else:
-                    self._on_transition_cbs[transition_key](transition_key, self._context)
+                self._call("transition", transition_key, self._get_transition_cb(transition_key),
+                           transition_key, self._context)
 
                 self._current_state = new_state
         except StopIteration as si:
@@ -0,0 +1,65 @@
+from typing import Awaitable, Callable, Iterable, Iterator, Optional, TextIO
+
+
+def _find_nth_newline(text: str, n: int) -> int:
+    pos = -1
+    for _ in range(n):
+        pos = text.find("\n", pos + 1)
+        if pos < 0:
+            break
+    return pos
+
+
+def _write_pages(chunks: Iterable[str], out: TextIO, page_lines: int, block_size: int) -> Iterator[None]:
+    """Yields every time page_lines lines are written, see write_paged"""
+    block = []
+    block_len = 0
+    lines_left = page_lines
+
+    def flush():
+        nonlocal block, block_len
+        if block:
+            out.write("".join(block))
+            block = []
+            block_len = 0
+        out.flush()
+
+    for chunk in chunks:
+        while page_lines > 0:
+            end = _find_nth_newline(chunk, lines_left)
+            if end < 0:
+                lines_left -= chunk.count("\n")
+                break
+            block.append(chunk[:end + 1])
+            flush()
+            yield
+            chunk = chunk[end + 1:]
+            lines_left = page_lines
+        block.append(chunk)
+        block_len += len(chunk)
+        if block_len >= block_size:
+            flush()
+    flush()
+
+
+def write_paged(chunks: Iterable[str], out: TextIO, page_lines: int = 0,
+                ask_more: Optional[Callable[[], bool]] = None, block_size: int = 1 << 16) -> bool:
+    """
+    Writes text chunks to out in blocks of at least block_size characters, so long texts take few writes.
+    If page_lines is positive, output stops after every page_lines lines until ask_more() returns True.
+    Returns False if output was stopped by ask_more(), True if everything was written.
+    """
+    for _ in _write_pages(chunks, out, page_lines, block_size):
+        if not ask_more():
+            return False
+    return True
+
+
+async def async_write_paged(chunks: Iterable[str], out: TextIO, page_lines: int = 0,
+                            ask_more: Optional[Callable[[], Awaitable[bool]]] = None,
+                            block_size: int = 1 << 16) -> bool:
+    """As write_paged, but ask_more() is awaited, e.g. event loop keeps running while user reads the page"""
+    for _ in _write_pages(chunks, out, page_lines, block_size):
+        if not await ask_more():
+            return False
+    return True
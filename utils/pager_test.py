@@ -0,0 +1,64 @@
+import asyncio
+import io
+import unittest
+
+from pager import async_write_paged, write_paged
+
+
+class CountingStringIO(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+class PagerTest(unittest.TestCase):
+    def test_chunks_written_in_blocks(self):
+        out = CountingStringIO()
+        chunks = ["0123456789"] * 100
+        self.assertTrue(write_paged(chunks, out, block_size=250))
+        self.assertEqual(out.getvalue(), "".join(chunks))
+        self.assertEqual(out.writes, 4)
+
+    def test_pages(self):
+        text = "".join(f"line {i}\n" for i in range(7))
+        chunks = [text[i:i + 4] for i in range(0, len(text), 4)]
+        pages = []
+        out = io.StringIO()
+
+        def ask_more():
+            pages.append(out.getvalue())
+            return True
+
+        self.assertTrue(write_paged(chunks, out, page_lines=3, ask_more=ask_more))
+        self.assertEqual(pages, [
+            "line 0\nline 1\nline 2\n",
+            "line 0\nline 1\nline 2\nline 3\nline 4\nline 5\n",
+        ])
+        self.assertEqual(out.getvalue(), text)
+
+    def test_stopped_by_user(self):
+        out = io.StringIO()
+        text = "a\nb\nc\nd\n"
+        self.assertFalse(write_paged([text], out, page_lines=2, ask_more=lambda: False))
+        self.assertEqual(out.getvalue(), "a\nb\n")
+
+    def test_async_pages(self):
+        out = io.StringIO()
+        answers = [True, False]
+
+        async def ask_more():
+            await asyncio.sleep(0)
+            return answers.pop(0)
+
+        text = "a\nb\nc\nd\ne\n"
+        self.assertFalse(asyncio.run(async_write_paged([text], out, page_lines=2, ask_more=ask_more)))
+        self.assertEqual(out.getvalue(), "a\nb\nc\nd\n")
+        self.assertTrue(asyncio.run(async_write_paged([text], io.StringIO())))
+
+
+if __name__ == '__main__':
+    unittest.main()
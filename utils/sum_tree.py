@@ -0,0 +1,112 @@
+import random
+from typing import Iterable, List
+
+
+class SumTree:
+    """
+    Fenwick (binary indexed) tree over non-negative weights.
+    Point updates, appends and weighted draws cost O(log n), removing last element is O(1).
+    """
+    # float deltas accumulate rounding errors, so tree is rebuilt from weights once in a while
+    _MIN_UPDATES_BEFORE_REBUILD = 1024
+
+    def __init__(self, weights: Iterable[float] = ()):
+        self._weights: List[float] = [float(w) for w in weights]
+        self._tree: List[float] = []
+        self._updates_since_rebuild = 0
+        # exact, unlike total: total of zeroed weights may be left positive by rounding errors
+        self._positive_count = sum(1 for w in self._weights if w > 0.0)
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __getitem__(self, i: int) -> float:
+        return self._weights[i]
+
+    def positive_count(self) -> int:
+        """Number of elements with positive weight, i.e. whether anything can be drawn"""
+        return self._positive_count
+
+    def rebuild(self):
+        n = len(self._weights)
+        tree = [0.0] + self._weights
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+        self._updates_since_rebuild = 0
+
+    def total(self) -> float:
+        return self.prefix_sum(len(self._weights))
+
+    def prefix_sum(self, count: int) -> float:
+        result = 0.0
+        while count > 0:
+            result += self._tree[count]
+            count -= count & -count
+        return result
+
+    def update(self, i: int, weight: float):
+        weight = float(weight)
+        delta = weight - self._weights[i]
+        self._positive_count += (weight > 0.0) - (self._weights[i] > 0.0)
+        self._weights[i] = weight
+        if delta == 0.0:
+            return
+        n = len(self._weights)
+        i += 1
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild > max(n, SumTree._MIN_UPDATES_BEFORE_REBUILD):
+            self.rebuild()
+
+    def append(self, weight: float):
+        weight = float(weight)
+        self._weights.append(weight)
+        self._positive_count += weight > 0.0
+        n = len(self._weights)
+        # node n covers (n - lowbit(n), n]; its children are already in the tree
+        node_value = weight
+        j, stop = n - 1, n - (n & -n)
+        while j > stop:
+            node_value += self._tree[j]
+            j -= j & -j
+        self._tree.append(node_value)
+
+    def pop(self) -> float:
+        # last node is not included into any other node, so it can be just dropped
+        self._tree.pop()
+        weight = self._weights.pop()
+        self._positive_count -= weight > 0.0
+        return weight
+
+    def find(self, value: float) -> int:
+        """Returns index i such that prefix_sum(i) <= value < prefix_sum(i + 1)"""
+        n = len(self._weights)
+        pos = 0
+        step = 1 << (n.bit_length() - 1) if n else 0
+        while step:
+            nxt = pos + step
+            if nxt <= n and self._tree[nxt] <= value:
+                pos = nxt
+                value -= self._tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+    def sample(self, rng: random.Random = random) -> int:
+        total = self.total()
+        if total <= 0.0 or not self._positive_count:
+            raise ValueError("Can not sample from tree with zero total weight")
+        i = self.find(rng.random() * total)
+        if self._weights[i] <= 0.0:
+            # accumulated rounding error led us to empty slot
+            self.rebuild()
+            total = self.total()
+            if total <= 0.0:
+                raise ValueError("Can not sample from tree with zero total weight")
+            i = self.find(rng.random() * total)
+        return i
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from sum_tree import SumTree
+
+
+class SumTreeTest(unittest.TestCase):
+    def test_prefix_sums(self):
+        weights = [1.0, 2.0, 0.0, 4.0, 8.0, 16.0, 32.0]
+        tree = SumTree(weights)
+        for count in range(len(weights) + 1):
+            self.assertEqual(tree.prefix_sum(count), sum(weights[:count]))
+        self.assertEqual(tree.total(), 63.0)
+
+    def test_update(self):
+        tree = SumTree([1.0] * 10)
+        tree.update(3, 5.0)
+        tree.update(9, 0.0)
+        self.assertEqual(tree[3], 5.0)
+        self.assertEqual(tree.total(), 13.0)
+        self.assertEqual(tree.prefix_sum(4), 8.0)
+
+    def test_append_and_pop(self):
+        tree = SumTree()
+        weights = []
+        for w in range(1, 20):
+            tree.append(float(w))
+            weights.append(float(w))
+            for count in range(len(weights) + 1):
+                self.assertEqual(tree.prefix_sum(count), sum(weights[:count]))
+        while weights:
+            self.assertEqual(tree.pop(), weights.pop())
+            self.assertEqual(tree.total(), sum(weights))
+
+    def test_find(self):
+        tree = SumTree([1.0, 0.0, 2.0, 3.0])
+        self.assertEqual(tree.find(0.0), 0)
+        self.assertEqual(tree.find(0.999), 0)
+        self.assertEqual(tree.find(1.0), 2)
+        self.assertEqual(tree.find(2.999), 2)
+        self.assertEqual(tree.find(3.0), 3)
+        self.assertEqual(tree.find(5.999), 3)
+
+    def test_zero_weights_never_sampled(self):
+        tree = SumTree([0.0, 1.0, 0.0, 1.0, 0.0])
+        rng = random.Random(0)
+        for _ in range(1000):
+            self.assertIn(tree.sample(rng), (1, 3))
+
+    def test_sample_distribution(self):
+        tree = SumTree([1.0, 3.0])
+        rng = random.Random(0)
+        hits = sum(tree.sample(rng) for _ in range(10000))
+        self.assertAlmostEqual(hits / 10000, 0.75, delta=0.02)
+
+    def test_zero_total_raises(self):
+        with self.assertRaises(ValueError):
+            SumTree([0.0, 0.0]).sample()
+
+    def test_rounding_residue_of_zeroed_weights_raises(self):
+        weights = [0.8958, 159.54, 25.0]
+        tree = SumTree(weights)
+        for i in (1, 0, 2):
+            tree.update(i, 3.7 * weights[i])
+        for i in (1, 0, 2):
+            tree.update(i, 0.0)
+        self.assertGreater(tree.total(), 0.0)
+        self.assertEqual(tree.positive_count(), 0)
+        with self.assertRaises(ValueError):
+            tree.sample()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+input() which lets time spent waiting for user be told apart from compute time, see LatencyCollector.
+Input itself can be replaced, e.g. by commands of replayed script, see headless_replay.py.
+"""
+import asyncio
+from typing import Callable, Optional
+
+from utils.latency_collector import LatencyCollector
+
+_latency_collector: Optional[LatencyCollector] = None
+_input: Callable[[str], str] = input
+
+
+def set_latency_collector(latency_collector: Optional[LatencyCollector]):
+    global _latency_collector
+    _latency_collector = latency_collector
+
+
+def set_input(input_fn: Optional[Callable[[str], str]]):
+    """None restores input()"""
+    global _input
+    _input = input if input_fn is None else input_fn
+
+
+def user_input(prompt: str = "") -> str:
+    if _latency_collector is None:
+        return _input(prompt)
+    with _latency_collector.user_wait():
+        return _input(prompt)
+
+
+async def async_user_input(prompt: str = "") -> str:
+    """As user_input, but event loop keeps running (e.g. background tasks) while user is thinking"""
+    loop = asyncio.get_running_loop()
+    if _latency_collector is None:
+        return await loop.run_in_executor(None, _input, prompt)
+    with _latency_collector.user_wait():
+        return await loop.run_in_executor(None, _input, prompt)
@@ -0,0 +1,281 @@
+import os
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class DirListing:
+    """Cached content of single directory: .md files (name -> inode) and subdirectories"""
+    __slots__ = ("mtime_ns", "files", "subdirs", "is_racy")
+
+    def __init__(self, mtime_ns: int, files: Dict[str, int], subdirs: List[str], is_racy: bool):
+        self.mtime_ns = mtime_ns
+        self.files = files
+        self.subdirs = subdirs
+        # directory modified right before listing may be modified again within same mtime tick,
+        # such listing is not trusted on next scan (same trick as "racy git" one)
+        self.is_racy = is_racy
+
+
+class IndexChanges(NamedTuple):
+    added: Dict[Path, str]
+    removed: List[Path]
+    renamed: Dict[Path, Tuple[Path, str]]
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.renamed)
+
+
+class VaultIndex:
+    """
+    Keeps list of .md files under questions directories.
+    Rescans re-list only directories whose mtime changed, so cost is proportional to number of
+    directories (one stat each) plus number of changed entries, not to number of files.
+    """
+    _RACY_WINDOW_NS = 2 * 10 ** 9
+    CURRENT_INDEX_DATA_VERSION = 1
+    DEFAULT_SCAN_WORKERS = 8
+
+    def __init__(self, paths_to_questions: List[Path], scan_workers: int = DEFAULT_SCAN_WORKERS):
+        self._scan_workers = scan_workers
+        self._roots = [str(p) for p in paths_to_questions]
+        self._tags = [p.stem for p in paths_to_questions]
+        self._roots_overlap = any(
+            i != j and (a == b or a.startswith(os.path.join(b, "")))
+            for i, a in enumerate(self._roots) for j, b in enumerate(self._roots))
+        self._listings: List[Dict[str, DirListing]] = [{} for _ in self._roots]
+        self._questions: Dict[Path, str] = {}
+
+    def get_savable_state(self) -> Dict:
+        return {
+            "version": VaultIndex.CURRENT_INDEX_DATA_VERSION,
+            "roots": self._roots,
+            "listings": [
+                {d: (listing.mtime_ns, listing.files, listing.subdirs, listing.is_racy)
+                 for d, listing in listings.items()}
+                for listings in self._listings
+            ]
+        }
+
+    def load_state(self, state: Optional[Dict]) -> bool:
+        """Restores listings saved by previous run, following rescan will re-list only changed directories"""
+        if not state or state.get("version") != VaultIndex.CURRENT_INDEX_DATA_VERSION:
+            return False
+        if state["roots"] != self._roots:
+            return False
+        self._listings = [{d: DirListing(*fields) for d, fields in listings.items()}
+                          for listings in state["listings"]]
+        self._questions = {}
+        for listings, tag in zip(self._listings, self._tags):
+            for dirpath, listing in listings.items():
+                dir_path = Path(dirpath)
+                self._questions.update({dir_path / name: tag for name in listing.files})
+        return True
+
+    def questions(self) -> Dict[Path, str]:
+        return dict(self._questions)
+
+    def scan(self) -> Dict[Path, str]:
+        self.rescan()
+        return self.questions()
+
+    def rescan(self) -> IndexChanges:
+        scan_start_ns = time.time_ns()
+        if self._scan_workers > 1:
+            visited = self._walk_concurrently(scan_start_ns)
+        else:
+            visited = self._walk(scan_start_ns)
+        new_listings: List[Dict[str, DirListing]] = [{} for _ in self._roots]
+        added_files: Dict[str, Tuple[int, int]] = {}
+        removed_files: Dict[str, Tuple[int, int]] = {}
+        for root_idx, dirpath, listing, added, removed in visited:
+            new_listings[root_idx][dirpath] = listing
+            added_files.update((path, (inode, root_idx)) for path, inode in added)
+            removed_files.update((path, (inode, root_idx)) for path, inode in removed)
+        for root_idx, (old_listings, listings) in enumerate(zip(self._listings, new_listings)):
+            for dirpath, listing in old_listings.items():
+                if dirpath not in listings:
+                    removed_files.update((os.path.join(dirpath, name), (inode, root_idx))
+                                         for name, inode in listing.files.items())
+        self._listings = new_listings
+        return self._resolve_changes(added_files, removed_files)
+
+    def rescan_dirs(self, dirpaths: Iterable[str]) -> IndexChanges:
+        """
+        Like rescan, but only given directories (e.g. ones watcher saw changes in) are re-listed, whatever
+        their mtime, along with directories created in them. Directories not known to index are skipped:
+        they are listed when their parent is.
+        """
+        scan_start_ns = time.time_ns()
+        added_files: Dict[str, Tuple[int, int]] = {}
+        removed_files: Dict[str, Tuple[int, int]] = {}
+        for dirpath in dirpaths:
+            for root_idx in range(len(self._roots)):
+                if dirpath in self._listings[root_idx]:
+                    self._relist(root_idx, dirpath, scan_start_ns, added_files, removed_files)
+        return self._resolve_changes(added_files, removed_files)
+
+    def _relist(self, root_idx: int, dirpath: str, scan_start_ns: int,
+                added_files: Dict[str, Tuple[int, int]], removed_files: Dict[str, Tuple[int, int]]):
+        listings = self._listings[root_idx]
+        old_listing = listings.pop(dirpath, None)
+        try:
+            listing = VaultIndex._list_dir(dirpath, os.stat(dirpath).st_mtime_ns, scan_start_ns)
+        except OSError:
+            listing = None
+        old_files = old_listing.files if old_listing is not None else {}
+        files = listing.files if listing is not None else {}
+        added_files.update((os.path.join(dirpath, name), (inode, root_idx))
+                           for name, inode in files.items() if name not in old_files)
+        removed_files.update((os.path.join(dirpath, name), (inode, root_idx))
+                             for name, inode in old_files.items() if name not in files)
+        old_subdirs = set(old_listing.subdirs) if old_listing is not None else set()
+        subdirs = set(listing.subdirs) if listing is not None else set()
+        if listing is not None:
+            listings[dirpath] = listing
+        for subdir in old_subdirs - subdirs:
+            self._forget_tree(root_idx, os.path.join(dirpath, subdir), removed_files)
+        for subdir in subdirs - old_subdirs:
+            self._relist(root_idx, os.path.join(dirpath, subdir), scan_start_ns, added_files, removed_files)
+
+    def _forget_tree(self, root_idx: int, dirpath: str, removed_files: Dict[str, Tuple[int, int]]):
+        stack = [dirpath]
+        while stack:
+            path = stack.pop()
+            listing = self._listings[root_idx].pop(path, None)
+            if listing is not None:
+                removed_files.update((os.path.join(path, name), (inode, root_idx))
+                                     for name, inode in listing.files.items())
+                stack.extend(os.path.join(path, subdir) for subdir in listing.subdirs)
+
+    def _walk(self, scan_start_ns: int):
+        visited = []
+        stack = [(root_idx, root) for root_idx, root in reversed(list(enumerate(self._roots)))]
+        while stack:
+            root_idx, dirpath = stack.pop()
+            listing, added, removed = VaultIndex._visit_dir(
+                dirpath, self._listings[root_idx].get(dirpath), scan_start_ns)
+            if listing is not None:
+                visited.append((root_idx, dirpath, listing, added, removed))
+                stack.extend((root_idx, os.path.join(dirpath, subdir)) for subdir in reversed(listing.subdirs))
+        return visited
+
+    def _walk_concurrently(self, scan_start_ns: int):
+        # every directory is a separate task, so single huge root is walked concurrently as well;
+        # stat and scandir release GIL, which lets I/O of several directories overlap
+        visited = []
+        done: "queue.Queue[Future]" = queue.Queue()
+        pending: Dict[Future, Tuple[int, str]] = {}
+        with ThreadPoolExecutor(self._scan_workers) as executor:
+            def submit(root_idx: int, dirpath: str):
+                future = executor.submit(VaultIndex._visit_dir, dirpath, self._listings[root_idx].get(dirpath),
+                                         scan_start_ns)
+                pending[future] = (root_idx, dirpath)
+                future.add_done_callback(done.put)
+
+            try:
+                for root_idx, root in enumerate(self._roots):
+                    submit(root_idx, root)
+                while pending:
+                    future = done.get()
+                    root_idx, dirpath = pending.pop(future)
+                    # exception of worker is raised here rather than lost with its thread
+                    listing, added, removed = future.result()
+                    if listing is not None:
+                        visited.append((root_idx, dirpath, listing, added, removed))
+                        for subdir in listing.subdirs:
+                            submit(root_idx, os.path.join(dirpath, subdir))
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        return visited
+
+    @staticmethod
+    def _visit_dir(dirpath: str, listing: Optional[DirListing], scan_start_ns: int):
+        try:
+            mtime_ns = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return None, (), ()
+        if listing is not None and not listing.is_racy and listing.mtime_ns == mtime_ns:
+            return listing, (), ()
+        fresh_listing = VaultIndex._list_dir(dirpath, mtime_ns, scan_start_ns)
+        if fresh_listing is None:
+            return None, (), ()
+        old_files = listing.files if listing is not None else {}
+        added = [(os.path.join(dirpath, name), inode)
+                 for name, inode in fresh_listing.files.items() if name not in old_files]
+        removed = [(os.path.join(dirpath, name), inode)
+                   for name, inode in old_files.items() if name not in fresh_listing.files]
+        return fresh_listing, added, removed
+
+    @staticmethod
+    def _list_dir(dirpath: str, mtime_ns: int, scan_start_ns: int) -> Optional[DirListing]:
+        files = {}
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        files[entry.name] = entry.inode()
+        except OSError:
+            return None
+        return DirListing(mtime_ns, files, subdirs, mtime_ns > scan_start_ns - VaultIndex._RACY_WINDOW_NS)
+
+    def _resolve_tag(self, path: str, root_idx: int, is_added: bool) -> Optional[str]:
+        if not self._roots_overlap:
+            return self._tags[root_idx] if is_added else None
+        # when roots overlap, last one wins
+        dirpath, name = os.path.split(path)
+        for i in reversed(range(len(self._roots))):
+            listing = self._listings[i].get(dirpath)
+            if listing is not None and name in listing.files:
+                return self._tags[i]
+        return None
+
+    def _resolve_changes(self, added_files: Dict[str, Tuple[int, int]],
+                         removed_files: Dict[str, Tuple[int, int]]) -> IndexChanges:
+        dir_paths: Dict[str, Path] = {}
+
+        def to_path(path: str) -> Path:
+            # joining to cached parent is much cheaper than parsing full path
+            dirpath, name = os.path.split(path)
+            dir_path = dir_paths.get(dirpath)
+            if dir_path is None:
+                dir_path = dir_paths[dirpath] = Path(dirpath)
+            return dir_path / name
+
+        added: Dict[str, Tuple[Path, str]] = {}
+        removed: List[Path] = []
+        removed_by_inode: Dict[int, Path] = {}
+        candidates = [(path, root_idx, True) for path, (_, root_idx) in added_files.items()]
+        candidates.extend((path, root_idx, False) for path, (_, root_idx) in removed_files.items()
+                          if path not in added_files)
+        for path, root_idx, is_added in candidates:
+            tag = self._resolve_tag(path, root_idx, is_added)
+            uid = to_path(path)
+            old_tag = self._questions.get(uid)
+            if tag is None and old_tag is not None:
+                del self._questions[uid]
+                inode = removed_files[path][0]
+                if inode:
+                    removed_by_inode[inode] = uid
+                else:
+                    removed.append(uid)
+            elif tag is not None and tag != old_tag:
+                self._questions[uid] = tag
+                added[path] = (uid, tag)
+        changes = IndexChanges({}, removed, {})
+        for path, (uid, tag) in added.items():
+            # file moved within vault keeps its inode
+            old_uid = removed_by_inode.pop(added_files[path][0], None) if path in added_files else None
+            if old_uid is not None:
+                changes.renamed[old_uid] = (uid, tag)
+            else:
+                changes.added[uid] = tag
+        changes.removed.extend(removed_by_inode.values())
+        return changes
@@ -0,0 +1,148 @@
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from vault_index import VaultIndex
+
+
+class VaultIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.vault1 = self.root / "vault1"
+        self.vault2 = self.root / "vault2"
+        for path in ("vault1/q1.md", "vault1/a/q2.md", "vault1/a/b/c/q3.md", "vault1/a/not_question.txt",
+                     "vault2/q4.md", "vault2/d/q5.md"):
+            self._touch(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, relpath):
+        path = self.root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relpath)
+        return path
+
+    def test_scan_same_as_rglob(self):
+        roots = [self.vault1, self.vault2]
+        expected = {}
+        for dirpath in roots:
+            expected.update({p: dirpath.stem for p in dirpath.rglob("*.md")})
+        self.assertEqual(VaultIndex(roots, scan_workers=1).scan(), expected)
+
+    def test_concurrent_scan_same_as_rglob(self):
+        roots = [self.vault1, self.vault2, self.vault1 / "a"]
+        expected = {}
+        for dirpath in roots:
+            expected.update({p: dirpath.stem for p in dirpath.rglob("*.md")})
+        self.assertEqual(VaultIndex(roots, scan_workers=4).scan(), expected)
+
+    def test_concurrent_rescan_detects_changes(self):
+        index = VaultIndex([self.vault1, self.vault2], scan_workers=4)
+        index.scan()
+        added = self._touch("vault1/a/b/c/d/new.md")
+        os.rename(self.vault1 / "a/q2.md", self.vault2 / "d/q2_renamed.md")
+        changes = index.rescan()
+        self.assertEqual(changes.added, {added: "vault1"})
+        self.assertEqual(changes.renamed, {self.vault1 / "a/q2.md": (self.vault2 / "d/q2_renamed.md", "vault2")})
+
+    def test_concurrent_scan_raises_worker_exception(self):
+        visit_dir = VaultIndex._visit_dir
+
+        def failing_visit_dir(dirpath, listing, scan_start_ns):
+            if dirpath.endswith("b"):
+                raise PermissionError(dirpath)
+            return visit_dir(dirpath, listing, scan_start_ns)
+
+        index = VaultIndex([self.vault1, self.vault2], scan_workers=4)
+        with mock.patch.object(VaultIndex, "_visit_dir", staticmethod(failing_visit_dir)):
+            self.assertRaises(PermissionError, index.rescan)
+
+    def test_rescan_without_changes_is_empty(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        self.assertFalse(index.rescan())
+
+    def test_rescan_detects_added_and_removed(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        added = self._touch("vault1/a/b/new.md")
+        os.remove(self.vault2 / "d/q5.md")
+        changes = index.rescan()
+        self.assertEqual(changes.added, {added: "vault1"})
+        self.assertEqual(changes.removed, [self.vault2 / "d/q5.md"])
+        self.assertEqual(changes.renamed, {})
+        self.assertIn(added, index.questions())
+        self.assertNotIn(self.vault2 / "d/q5.md", index.questions())
+
+    def test_rescan_detects_rename(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        os.rename(self.vault1 / "a/q2.md", self.vault2 / "d/q2_renamed.md")
+        changes = index.rescan()
+        self.assertEqual(changes.added, {})
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(changes.renamed, {self.vault1 / "a/q2.md": (self.vault2 / "d/q2_renamed.md", "vault2")})
+
+    def test_rescan_detects_removed_directory(self):
+        index = VaultIndex([self.vault1])
+        index.scan()
+        os.remove(self.vault1 / "a/b/c/q3.md")
+        os.rmdir(self.vault1 / "a/b/c")
+        changes = index.rescan()
+        self.assertEqual(changes.removed, [self.vault1 / "a/b/c/q3.md"])
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        index = VaultIndex([self.vault1])
+        index.scan()
+        for listing in index._listings[0].values():
+            listing.is_racy = False
+        listing_before = index._listings[0][str(self.vault1 / "a")]
+        index.rescan()
+        self.assertIs(index._listings[0][str(self.vault1 / "a")], listing_before)
+
+    def test_saved_state_restored(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        state = pickle.loads(pickle.dumps(index.get_savable_state()))
+        added = self._touch("vault2/d/new.md")
+        restored_index = VaultIndex([self.vault1, self.vault2])
+        self.assertTrue(restored_index.load_state(state))
+        changes = restored_index.rescan()
+        self.assertEqual(changes.added, {added: "vault2"})
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(restored_index.questions(), VaultIndex([self.vault1, self.vault2]).scan())
+
+    def test_saved_state_for_other_roots_rejected(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        self.assertFalse(VaultIndex([self.vault1]).load_state(index.get_savable_state()))
+        self.assertFalse(VaultIndex([self.vault1]).load_state({"version": 100500}))
+
+    def test_rescan_dirs_lists_only_given_directories(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        added = self._touch("vault1/a/new.md")
+        not_listed = self._touch("vault2/d/not_listed.md")
+        changes = index.rescan_dirs([str(self.vault1 / "a"), str(self.root / "unknown")])
+        self.assertEqual(changes.added, {added: "vault1"})
+        self.assertNotIn(not_listed, index.questions())
+
+    def test_rescan_dirs_follows_moved_directory(self):
+        index = VaultIndex([self.vault1, self.vault2])
+        index.scan()
+        os.rename(self.vault1 / "a/b", self.vault2 / "b")
+        self._touch("vault2/b/c/new.md")
+        changes = index.rescan_dirs([str(self.vault1 / "a"), str(self.vault2)])
+        self.assertEqual(changes.renamed, {self.vault1 / "a/b/c/q3.md": (self.vault2 / "b/c/q3.md", "vault2")})
+        self.assertEqual(changes.added, {self.vault2 / "b/c/new.md": "vault2"})
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(index.questions(), VaultIndex([self.vault1, self.vault2]).scan())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+Background watchers of questions directories. They only collect directories where .md files or subdirectories
+were created, deleted or moved; owner re-lists them with VaultIndex.rescan_dirs on its own thread,
+which turns them into added, removed and renamed questions (see QuestionSelector.sync_index).
+inotify is used on Linux (through ctypes, no extra dependencies), directory mtimes are polled elsewhere.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class VaultWatcher(ABC):
+    def __init__(self, roots: List[str]):
+        self._roots = roots
+        self._lock = threading.Lock()
+        self._dirty_dirs: Set[str] = set()
+        self._needs_full_rescan = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Directories are watched once this returns, so scan done after it misses no changes"""
+        self._prepare()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._cleanup()
+
+    def take_changes(self) -> Tuple[Set[str], bool]:
+        """Directories changed since last call and whether some changes were lost, i.e. full rescan is needed"""
+        with self._lock:
+            dirty_dirs, self._dirty_dirs = self._dirty_dirs, set()
+            needs_full_rescan, self._needs_full_rescan = self._needs_full_rescan, False
+        return dirty_dirs, needs_full_rescan
+
+    def _mark_dirty(self, dirpath: str):
+        with self._lock:
+            self._dirty_dirs.add(dirpath)
+
+    def _mark_full_rescan(self):
+        with self._lock:
+            self._needs_full_rescan = True
+
+    def _prepare(self):
+        pass
+
+    @abstractmethod
+    def _run(self):
+        """Body of background thread, returns once stop is requested"""
+
+    def _cleanup(self):
+        pass
+
+
+class PollingWatcher(VaultWatcher):
+    """Stats every directory each poll and lists only ones whose mtime changed"""
+    _RACY_WINDOW_NS = 2 * 10 ** 9
+
+    def __init__(self, roots: List[str], poll_interval_secs: float = 1.0):
+        super().__init__(roots)
+        self._poll_interval_secs = poll_interval_secs
+        # dirpath -> (mtime_ns, subdirs)
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+
+    def _prepare(self):
+        self._poll(report=False)
+
+    def _run(self):
+        while not self._stopped.wait(self._poll_interval_secs):
+            self._poll(report=True)
+
+    def _poll(self, report: bool):
+        poll_start_ns = time.time_ns()
+        dirs = {}
+        stack = list(reversed(self._roots))
+        while stack:
+            dirpath = stack.pop()
+            if dirpath in dirs:
+                continue
+            try:
+                mtime_ns = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue  # its parent changed too
+            known = self._dirs.get(dirpath)
+            if known is not None and known[0] == mtime_ns:
+                subdirs = known[1]
+            else:
+                subdirs = PollingWatcher._list_subdirs(dirpath)
+                if report:
+                    self._mark_dirty(dirpath)
+            # directory may change again within same mtime tick, such one is listed again on next poll
+            dirs[dirpath] = (mtime_ns if mtime_ns <= poll_start_ns - self._RACY_WINDOW_NS else -1, subdirs)
+            stack.extend(os.path.join(dirpath, subdir) for subdir in reversed(subdirs))
+        self._dirs = dirs
+
+    @staticmethod
+    def _list_subdirs(dirpath: str) -> List[str]:
+        try:
+            with os.scandir(dirpath) as it:
+                return [entry.name for entry in it if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return []
+
+
+class InotifyWatcher(VaultWatcher):
+    """Single inotify instance with watch per directory; events are read with select, so stop is noticed"""
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ONLYDIR = 0x01000000
+    _IN_DONT_FOLLOW = 0x02000000
+    _IN_ISDIR = 0x40000000
+    _WATCH_MASK = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_ONLYDIR | _IN_DONT_FOLLOW
+    _EVENT_HEADER = struct.Struct("iIII")
+    _READ_TIMEOUT_SECS = 0.2
+
+    def __init__(self, roots: List[str]):
+        super().__init__(roots)
+        self._libc = InotifyWatcher._load_libc()
+        self._fd = -1
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        self._warned = False
+
+    @staticmethod
+    def is_available() -> bool:
+        return sys.platform.startswith("linux") and InotifyWatcher._load_libc() is not None
+
+    @staticmethod
+    def _load_libc():
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+        except (OSError, AttributeError):
+            return None
+        libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        libc.inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        return libc
+
+    def _prepare(self):
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        try:
+            for root in self._roots:
+                self._watch_tree(root, at_start=True)
+        except OSError:
+            self._cleanup()
+            raise
+
+    def _cleanup(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch_tree(self, top: str, at_start: bool = False):
+        """Errors other than running out of watches are ignored: directory is gone already"""
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self._WATCH_MASK)
+            if wd < 0:
+                e = ctypes.get_errno()
+                if e == errno.ENOSPC and at_start:
+                    raise OSError(e, "inotify watch limit reached (see /proc/sys/fs/inotify/max_user_watches)")
+                if e == errno.ENOSPC and not self._warned:
+                    self._warned = True
+                    print(f"WARNING: Could not watch {dirpath}, inotify watch limit reached")
+                continue
+            old_path = self._paths.get(wd)
+            if old_path is not None and self._wds.get(old_path) == wd:
+                del self._wds[old_path]
+            self._paths[wd] = dirpath
+            self._wds[dirpath] = wd
+            try:
+                with os.scandir(dirpath) as it:
+                    stack.extend(entry.path for entry in it if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                pass
+
+    def _unwatch_tree(self, top: str):
+        prefix = os.path.join(top, "")
+        for dirpath in [d for d in self._wds if d == top or d.startswith(prefix)]:
+            wd = self._wds.pop(dirpath)
+            del self._paths[wd]
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            readable, _, _ = select.select([self._fd], [], [], self._READ_TIMEOUT_SECS)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                continue
+            self._handle_events(data)
+
+    def _handle_events(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            if mask & self._IN_Q_OVERFLOW:
+                # events were dropped, new directories among them are not watched yet
+                for root in self._roots:
+                    self._watch_tree(root)
+                self._mark_full_rescan()
+                continue
+            dirpath = self._paths.get(wd)
+            if dirpath is None:
+                continue
+            if mask & self._IN_IGNORED:
+                # watched directory was deleted or moved out of vault
+                del self._paths[wd]
+                if self._wds.get(dirpath) == wd:
+                    del self._wds[dirpath]
+                continue
+            if mask & self._IN_ISDIR:
+                path = os.path.join(dirpath, name)
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    # watched before parent is re-listed, so files created in it meanwhile are not missed
+                    self._watch_tree(path)
+                elif mask & self._IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+            elif not name.endswith(".md"):
+                continue
+            self._mark_dirty(dirpath)
+
+
+def create_watcher(roots: List[str], poll_interval_secs: float = 1.0) -> VaultWatcher:
+    """Started inotify watcher if possible, started polling one otherwise"""
+    if InotifyWatcher.is_available():
+        watcher = InotifyWatcher(roots)
+        try:
+            watcher.start()
+            return watcher
+        except OSError as e:
+            print(f"WARNING: {str(e)}, polling questions directories instead")
+    watcher = PollingWatcher(roots, poll_interval_secs)
+    watcher.start()
+    return watcher
@@ -0,0 +1,65 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from vault_watcher import InotifyWatcher, PollingWatcher
+
+
+class VaultWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self._tmp.name) / "vault"
+        (self.vault / "a").mkdir(parents=True)
+        (self.vault / "a" / "q1.md").write_text("answer 1\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _wait_for_dirty(self, watcher, dirpath, timeout_secs=2.0):
+        deadline = time.monotonic() + timeout_secs
+        dirty = set()
+        while time.monotonic() < deadline:
+            dirty |= watcher.take_changes()[0]
+            if str(dirpath) in dirty:
+                return dirty
+            time.sleep(0.01)
+        self.fail(f"{dirpath} was not reported, reported: {dirty}")
+
+    def _check_watcher(self, watcher):
+        watcher.start()
+        try:
+            (self.vault / "a" / "q2.md").write_text("answer 2\n")
+            self._wait_for_dirty(watcher, self.vault / "a")
+            (self.vault / "b").mkdir()
+            self._wait_for_dirty(watcher, self.vault)
+            # files in directory created after watcher started are noticed too
+            (self.vault / "b" / "q3.md").write_text("answer 3\n")
+            self._wait_for_dirty(watcher, self.vault / "b")
+            (self.vault / "a" / "q1.md").rename(self.vault / "b" / "q1.md")
+            self._wait_for_dirty(watcher, self.vault / "a")
+        finally:
+            watcher.stop()
+
+    def test_polling_watcher(self):
+        self._check_watcher(PollingWatcher([str(self.vault)], poll_interval_secs=0.01))
+
+    @unittest.skipUnless(InotifyWatcher.is_available(), "inotify is not available")
+    def test_inotify_watcher(self):
+        self._check_watcher(InotifyWatcher([str(self.vault)]))
+
+    @unittest.skipUnless(InotifyWatcher.is_available(), "inotify is not available")
+    def test_inotify_watcher_ignores_other_files(self):
+        watcher = InotifyWatcher([str(self.vault)])
+        watcher.start()
+        try:
+            (self.vault / "a" / "q1.md.swp").write_text("")
+            (self.vault / "q2.md").write_text("answer 2\n")
+            self.assertEqual(self._wait_for_dirty(watcher, self.vault), {str(self.vault)})
+            self.assertFalse(watcher.take_changes()[1])
+        finally:
+            watcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
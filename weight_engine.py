@@ -0,0 +1,43 @@
+"""
+Vectorized counterpart of WeightHandler._compute_weight.
+Progress records are laid out as NumPy columns and all weights are computed in one pass;
+results are numerically identical to per-question computation.
+NumPy is optional: when it is not installed WeightHandler computes weights one by one.
+"""
+from typing import Iterable, List, Sequence
+
+from progress_record import ProgressRecord
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+class ProgressColumns:
+    def __init__(self, infos: Sequence[ProgressRecord], now_ts: float):
+        count = len(infos)
+        self.successes = np.fromiter((info.successes or 0 for info in infos), dtype=np.int64, count=count)
+        self.failures = np.fromiter((info.failures or 0 for info in infos), dtype=np.int64, count=count)
+        self.last_success_ts = np.fromiter(
+            (info.last_success_ts if info.last_success_ts is not None else now_ts for info in infos),
+            dtype=np.float64, count=count)
+        self.is_hot = np.fromiter((bool(info.is_hot) for info in infos), dtype=bool, count=count)
+
+
+def compute_weights(infos: Sequence[ProgressRecord], now_ts: float, time_limits: Iterable[int],
+                    questions_count: int) -> List[float]:
+    columns = ProgressColumns(infos, now_ts)
+    # operations are ordered exactly as in WeightHandler._compute_weight to keep results bit-identical
+    delta_answers = (columns.successes - columns.failures).astype(np.float64)
+    delta_time_secs = now_ts - columns.last_success_ts
+    recency_multiplier = np.ones(len(infos), dtype=np.int64)
+    for limit in time_limits:
+        recency_multiplier += delta_time_secs > limit
+    cold_weights = recency_multiplier * (1 + np.maximum(0.0, -delta_answers)) / (1.0 + np.maximum(0.0, delta_answers))
+    hot_weights = np.maximum(np.maximum(questions_count / 4, 5 * cold_weights), 5.0)
+    return np.where(columns.is_hot, hot_weights, cold_weights).tolist()
@@ -13,10 +13,100 @@ progress dict expects following layout:
         ...
     }
 }
+In memory records are kept as ProgressRecord objects, they are converted to dicts by storages.
 """
-from copy import deepcopy
+import heapq
+import random
+import weakref
+from enum import IntEnum
 
-from typing import Optional, Dict, List
+from typing import Optional, Collection, Dict, List, Tuple, Union
+
+import weight_engine
+from progress_record import ProgressRecord, EMPTY_RECORD
+from utils.grouped_sum_tree import GroupedSumTree
+
+
+class ProgressEvent(IntEnum):
+    SUCCESS = 1
+    FAILURE = 2
+    AMBIGUITY = 3
+    REASK = 4
+
+
+class QuestionSlots:
+    """
+    Questions in slots of handler weights: uid in every slot, slot and tag of every uid.
+    Handlers of several users may share them (see study_server.py), so these maps are kept once;
+    they are changed only through methods below, which update weights of every attached handler.
+    """
+    def __init__(self, question_uids_to_tags: Dict):
+        self.uids_to_tags = dict(question_uids_to_tags)
+        self.uids = list(self.uids_to_tags)
+        self.uid_to_slot = {uid: i for i, uid in enumerate(self.uids)}
+        self._handlers = weakref.WeakSet()
+
+    def __len__(self):
+        return len(self.uids)
+
+    def attach(self, handler: "WeightHandler"):
+        self._handlers.add(handler)
+
+    def find_slot(self, uid) -> int:
+        try:
+            return self.uid_to_slot[uid]
+        except KeyError:
+            raise RuntimeError(f"WARNING: Could not find path for question {uid}")
+
+    def apply_changes(self, changes):
+        """Patches in IndexChanges of vault_index"""
+        for old_uid, (new_uid, tag) in changes.renamed.items():
+            self.rename_question(old_uid, new_uid, tag)
+        for uid, tag in changes.added.items():
+            self.add_question(uid, tag)
+        for uid in changes.removed:
+            self.remove_question(uid)
+
+    def add_question(self, uid, tag):
+        i = self.uid_to_slot.get(uid)
+        if i is not None:
+            old_tag = self.uids_to_tags[uid]
+            self.uids_to_tags[uid] = tag
+            for handler in self._handlers:
+                handler._on_question_retagged(uid, i, old_tag, tag)
+            return
+        self.uids_to_tags[uid] = tag
+        self.uid_to_slot[uid] = len(self.uids)
+        self.uids.append(uid)
+        for handler in self._handlers:
+            handler._on_question_added(uid, tag)
+
+    def remove_question(self, uid):
+        i = self.find_slot(uid)
+        last = len(self.uids) - 1
+        if i != last:
+            # move last question into freed slot so slots stay contiguous
+            moved_uid = self.uids[last]
+            self.uids[i] = moved_uid
+            self.uid_to_slot[moved_uid] = i
+        self.uids.pop()
+        del self.uid_to_slot[uid]
+        tag = self.uids_to_tags.pop(uid)
+        for handler in self._handlers:
+            handler._on_question_removed(uid, i, last, tag)
+
+    def rename_question(self, old_uid, new_uid, tag):
+        self.find_slot(old_uid)
+        if new_uid in self.uid_to_slot:
+            self.remove_question(new_uid)
+        i = self.find_slot(old_uid)
+        old_tag = self.uids_to_tags.pop(old_uid)
+        self.uids[i] = new_uid
+        del self.uid_to_slot[old_uid]
+        self.uid_to_slot[new_uid] = i
+        self.uids_to_tags[new_uid] = tag
+        for handler in self._handlers:
+            handler._on_question_renamed(old_uid, new_uid, i, old_tag, tag)
 
 
 class WeightHandler:
@@ -31,19 +121,65 @@ class WeightHandler:
         _SECS_IN_WEEK
     ]
 
+    # moments when recency multiplier of question grows, counted from its last success
+    _RECENCY_THRESHOLDS = sorted(set(_TIME_LIMITS))
+
+    _STATISTICS_FIELDS = ("successes", "failures", "answered")
+
     CURRENT_PROGRESS_DATA_VERSION = 3
     REASK_WEIGHT_MULTIPLICATION_COEFF = 5
 
-    def __init__(self, question_uids_to_tags: Dict, start_ts: float, progress: Optional[Dict] = None):
-        # consciously not updating current ts after start to evade updating every weight on each step
-        # this is mostly useless - user won't likely keep program running more than day
-        self._start_ts = start_ts
+    def __init__(self, question_uids_to_tags: Union[Dict, QuestionSlots], start_ts: float,
+                 progress: Optional[Dict] = None):
+        """Questions given as QuestionSlots are shared with other handlers, dict is copied"""
+        # current ts is moved forward by advance_time; not to update every weight on each step
+        # only questions whose recency multiplier changed are recomputed, see _recency_updates
+        self._now_ts = start_ts
         self._progress = WeightHandler._migrate_progress(progress)
-        self.question_uids_to_tags = question_uids_to_tags
-        self.question_uids = list(question_uids_to_tags.keys())
-        self.weights = [self._compute_weight(self._progress.get(uid, {})) for uid in self.question_uids]
+        # questions whose progress records changed since last save, lets storages write only them;
+        # mapped to their records as of last save (None - there was none), so saves can be merged, see progress_storage
+        self._dirty_question_uids: Dict[object, Optional[ProgressRecord]] = {}
+        # records are shared with snapshots returned by get_savable_progress and copied before first change
+        # after snapshot (copy-on-write); these are questions whose records are not shared with any snapshot
+        self._unshared_question_uids = set()
+        if not isinstance(question_uids_to_tags, QuestionSlots):
+            question_uids_to_tags = QuestionSlots(question_uids_to_tags)
+        self._slots = question_uids_to_tags
+        self.question_uids_to_tags = self._slots.uids_to_tags
+        self.question_uids = self._slots.uids
+        self._uid_to_slot = self._slots.uid_to_slot
+        self.weights = self._compute_initial_weights()
         if not len(self.question_uids):
             raise RuntimeError("No questions loaded")
+        # weights are mirrored into sum trees, one per tag, which allow O(log n) draws and updates
+        self._sampler = GroupedSumTree(self.weights, (self.question_uids_to_tags[uid] for uid in self.question_uids))
+        # questions are drawn only from these tags, None - from all
+        self._tags_filter: Optional[Collection[str]] = None
+        # questions temporarily excluded from draws: their weights are kept, but zeroed in sum tree
+        self._suspended_question_uids = set()
+        # min-heap of (ts, question_uid, last_success_ts): recency multiplier of question grows after ts
+        # entries are not removed when question changes, they are skipped if last_success_ts does not match
+        self._recency_updates: List[Tuple[float, object, float]] = []
+        for uid in self.question_uids:
+            self._schedule_recency_update(uid, heapify=False)
+        heapq.heapify(self._recency_updates)
+        # sums over all progress records, over records of questions with the tag (with number of such questions)
+        # and over answers given in this session; kept up to date on every change of records or questions
+        self._statistics = WeightHandler._blank_statistics()
+        for info in self._progress.values():
+            self._add_to_statistics(self._statistics, info)
+        self._statistics_by_tag: Dict[str, Dict[str, int]] = {}
+        for uid in self.question_uids:
+            self._add_to_tag_statistics(uid, self.question_uids_to_tags[uid])
+        self._session_statistics = WeightHandler._blank_statistics()
+        self._slots.attach(self)
+
+    def _compute_initial_weights(self):
+        infos = [self._progress.get(uid, EMPTY_RECORD) for uid in self.question_uids]
+        if weight_engine.is_available():
+            return weight_engine.compute_weights(infos, self._now_ts, WeightHandler._TIME_LIMITS,
+                                                 len(self.question_uids))
+        return [self._compute_weight(info) for info in infos]
 
     @staticmethod
     def _migrate_progress(progress):
@@ -58,74 +194,300 @@ class WeightHandler:
                 info["answered"] = info.get("successes", 0) + info.get("failures", 0)
                 info["last_success_ts"] = info.get("last_answered_ts", 0)
                 del info["last_answered_ts"]
-        return progress["progress"]
+        return {uid: ProgressRecord.from_dict(info) for uid, info in progress["progress"].items()}
 
-    def get_savable_progress(self):
+    def get_savable_progress(self, question_uids=None):
+        """
+        Returns consistent snapshot of progress (of given questions only, if specified),
+        it is safe to save it on another thread while answers keep coming.
+        Snapshot shares records with handler, so it costs O(n) pointers instead of full copy.
+        """
+        if question_uids is None:
+            progress = dict(self._progress)
+        else:
+            progress = {uid: self._progress[uid] for uid in question_uids if uid in self._progress}
+        self._unshared_question_uids.clear()
         return {
             "version": WeightHandler.CURRENT_PROGRESS_DATA_VERSION,
-            "progress": deepcopy(self._progress)
+            "progress": progress
         }
 
-    def prune_progress_info(self):
-        self._progress = {k: v for k, v in self._progress.items() if k in self.question_uids}
+    def get_known_question_uids(self):
+        return self._uid_to_slot.keys() | self._progress.keys()
 
-    def success_on_question(self, question, ts):
+    def sample_question(self, rng: random.Random = random):
+        return self.question_uids[self._sampler.sample(rng, self._tags_filter)]
+
+    def can_sample_question(self):
+        return self._sampler.has_positive(self._tags_filter)
+
+    def set_tags_filter(self, tags: Optional[Collection[str]]):
+        """Restricts draws to questions with given tags, progress and weights of other questions are kept"""
+        self._tags_filter = None if tags is None else frozenset(tags)
+
+    def sample_distinct_questions(self, count: int, rng: random.Random = random):
+        """
+        Draws up to count distinct questions one after another, each with probability proportional to weights
+        of questions not drawn yet. Returns (key, question_uid) pairs, key being the moment question "arrives"
+        in race of exponential clocks ticking with rates equal to weights. Both order and keys are distributed
+        as in Efraimidis-Spirakis sampling, but cost O(count * log n) instead of a pass over all questions.
+        """
+        drawn = []
+        key = 0.0
         try:
-            i, uid = next((i, uid) for (i, uid) in enumerate(self.question_uids) if question == uid)
-            info = self._progress.setdefault(uid, WeightHandler._blank_question_record())
-            info["successes"] += 1
-            info["answered"] += 1
-            info["last_success_ts"] = ts
-            info["is_hot"] = False
-            cold_weight = self._compute_weight(info)
-            # if it was hot - it's still rather hot
-            self.weights[i] = ((self.weights[i] + cold_weight) / 2) if self.weights[i] > 1 else cold_weight
-        except StopIteration:
-            raise RuntimeError(f"WARNING: Could not find path for question {question}")
+            while len(drawn) < count:
+                if not self._sampler.has_positive(self._tags_filter):
+                    break
+                total = self._sampler.total(self._tags_filter)
+                i = self._sampler.sample(rng, self._tags_filter)
+                if self._sampler[i] <= 0.0:
+                    break  # only rounding error was left of total
+                # time to first arrival among remaining clocks is exponential with rate equal to their total weight
+                key += rng.expovariate(total)
+                drawn.append((key, i))
+                self._sampler.update(i, 0.0)
+        finally:
+            for _, i in drawn:
+                self._sampler.update(i, self._weight_in_sampler(i))
+        return [(key, self.question_uids[i]) for key, i in drawn]
+
+    def advance_time(self, now_ts: float):
+        """
+        Moves current ts forward, updating weights of questions which crossed recency thresholds since last call.
+        Their weights are rescaled rather than recomputed, so in-session changes (e.g. reasks) are kept.
+        Returns (question_uid, old_weight) pairs of updated questions.
+        """
+        due = {}
+        while self._recency_updates and self._recency_updates[0][0] < now_ts:
+            _, uid, last_success_ts = heapq.heappop(self._recency_updates)
+            info = self._progress.get(uid)
+            if uid in self._uid_to_slot and info is not None and info.last_success_ts == last_success_ts:
+                due.setdefault(uid, self._compute_weight(info))
+        self._now_ts = max(self._now_ts, now_ts)
+        changed = []
+        for uid, old_base_weight in due.items():
+            i = self._uid_to_slot[uid]
+            changed.append((uid, self.weights[i]))
+            self._set_weight(i, self.weights[i] * self._compute_weight(self._progress[uid]) / old_base_weight)
+            self._schedule_recency_update(uid)
+        return changed
+
+    def suspend_question(self, question):
+        i = self._find_slot(question)
+        self._suspended_question_uids.add(self.question_uids[i])
+        self._sampler.update(i, 0.0)
+
+    def resume_question(self, question):
+        self._suspended_question_uids.discard(question)
+        i = self._uid_to_slot.get(question)
+        if i is not None:
+            self._sampler.update(i, self.weights[i])
+
+    def get_weight(self, question):
+        return self.weights[self._find_slot(question)]
+
+    def has_dirty_question_uids(self) -> bool:
+        return bool(self._dirty_question_uids)
+
+    def take_changes_since_save(self) -> Dict[object, Optional[ProgressRecord]]:
+        """Dirty question uids mapped to their records as of last save"""
+        changes, self._dirty_question_uids = self._dirty_question_uids, {}
+        return changes
+
+    def _mark_dirty(self, uid):
+        # called before record changes, record is copied as it may be changed in place afterwards
+        if uid not in self._dirty_question_uids:
+            info = self._progress.get(uid)
+            self._dirty_question_uids[uid] = info.copy() if info is not None else None
+
+    def prune_progress_info(self, uids=None):
+        candidates = self._progress.keys() if uids is None else uids
+        pruned = [uid for uid in candidates if uid not in self._uid_to_slot and uid in self._progress]
+        for uid in pruned:
+            self._mark_dirty(uid)
+            self._add_to_statistics(self._statistics, self._progress.pop(uid), -1)
+
+    def add_question(self, uid, tag):
+        """Changes questions of every handler sharing them, as do remove_question and rename_question"""
+        self._slots.add_question(uid, tag)
+
+    def remove_question(self, uid):
+        self._slots.remove_question(uid)
+
+    def rename_question(self, old_uid, new_uid, tag):
+        self._slots.rename_question(old_uid, new_uid, tag)
+
+    def _on_question_retagged(self, uid, i, old_tag, tag):
+        self._add_to_tag_statistics(uid, old_tag, -1)
+        self._add_to_tag_statistics(uid, tag)
+        self._sampler.set_group(i, tag)
+
+    def _on_question_added(self, uid, tag):
+        self._add_to_tag_statistics(uid, tag)
+        weight = self._compute_weight(self._progress.get(uid, EMPTY_RECORD))
+        self.weights.append(weight)
+        self._sampler.append(weight, tag)
+        self._schedule_recency_update(uid)
+
+    def _on_question_removed(self, uid, i, last, tag):
+        self.weights[i] = self.weights[last]
+        self.weights.pop()
+        self._sampler.swap_remove(i)
+        self._suspended_question_uids.discard(uid)
+        self._add_to_tag_statistics(uid, tag, -1)
+
+    def _on_question_renamed(self, old_uid, new_uid, i, old_tag, tag):
+        self._add_to_tag_statistics(old_uid, old_tag, -1)
+        self._sampler.set_group(i, tag)
+        if old_uid in self._suspended_question_uids:
+            self._suspended_question_uids.remove(old_uid)
+            self._suspended_question_uids.add(new_uid)
+        # renamed question keeps its progress and in-session weight
+        if old_uid in self._progress:
+            self._mark_dirty(old_uid)
+            self._mark_dirty(new_uid)
+            if new_uid in self._progress:
+                # record of replaced question is lost
+                self._add_to_statistics(self._statistics, self._progress[new_uid], -1)
+            self._progress[new_uid] = self._progress.pop(old_uid)
+            if old_uid in self._unshared_question_uids:
+                self._unshared_question_uids.remove(old_uid)
+                self._unshared_question_uids.add(new_uid)
+            self._schedule_recency_update(new_uid)
+        self._add_to_tag_statistics(new_uid, tag)
+
+    def success_on_question(self, question, ts):
+        i = self._find_slot(question)
+        uid = self.question_uids[i]
+        info = self._change_record(uid, lambda info: WeightHandler._record_success(info, ts))
+        self._schedule_recency_update(uid)
+        cold_weight = self._compute_weight(info)
+        # if it was hot - it's still rather hot
+        self._set_weight(i, ((self.weights[i] + cold_weight) / 2) if self.weights[i] > 1 else cold_weight)
 
     def fail_on_question(self, question):
-        try:
-            i, uid = next((i, uid) for (i, uid) in enumerate(self.question_uids) if question == uid)
-            info = self._progress.setdefault(uid, WeightHandler._blank_question_record())
-            info["failures"] += 1
-            info["answered"] += 1
-            info["is_hot"] = True  # make it hot - ask it soon
-            self.weights[i] = self._compute_weight(info)
-        except StopIteration:
-            raise RuntimeError(f"WARNING: Could not find path for question {question}")
+        i = self._find_slot(question)
+        uid = self.question_uids[i]
+        info = self._change_record(uid, WeightHandler._record_failure)
+        self._set_weight(i, self._compute_weight(info))
 
     def ambiguity_on_question(self, question):
-        try:
-            i, uid = next((i, uid) for (i, uid) in enumerate(self.question_uids) if question == uid)
-            info = self._progress.setdefault(uid, WeightHandler._blank_question_record())
-            info["answered"] += 1
-            self.weights[i] *= WeightHandler.REASK_WEIGHT_MULTIPLICATION_COEFF
-        except StopIteration:
-            raise RuntimeError(f"WARNING: Could not find path for question {question}")
+        i = self._find_slot(question)
+        uid = self.question_uids[i]
+        self._change_record(uid, WeightHandler._record_ambiguity)
+        self._set_weight(i, self.weights[i] * WeightHandler.REASK_WEIGHT_MULTIPLICATION_COEFF)
+
+    def replay_progress_events(self, events):
+        """
+        Applies (ProgressEvent, question_uid, ts) tuples recorded in previous session to progress.
+        Only progress is restored: weights of touched questions are recomputed from scratch
+        and reasks, which affect nothing but weights, are skipped.
+        """
+        touched = set()
+        for event, uid, ts in events:
+            if event == ProgressEvent.REASK:
+                continue
+            if event == ProgressEvent.SUCCESS:
+                self._change_record(uid, lambda info: WeightHandler._record_success(info, ts), in_session=False)
+            elif event == ProgressEvent.FAILURE:
+                self._change_record(uid, WeightHandler._record_failure, in_session=False)
+            elif event == ProgressEvent.AMBIGUITY:
+                self._change_record(uid, WeightHandler._record_ambiguity, in_session=False)
+            touched.add(uid)
+        for uid in touched:
+            i = self._uid_to_slot.get(uid)
+            if i is not None:
+                self._set_weight(i, self._compute_weight(self._progress[uid]))
+                self._schedule_recency_update(uid)
 
     def get_statistics(self):
-        statistics = {
-            "successes": 0,
-            "failures": 0,
-            "answered": 0,
-        }
-        for info in self._progress.values():
-            statistics["successes"] += info.get("successes", 0)
-            statistics["failures"] += info.get("failures", 0)
-            statistics["answered"] += info.get("answered", 0)
-        return statistics
+        return dict(self._statistics)
+
+    def get_statistics_by_tag(self):
+        """Statistics of questions in index by tag, with "questions" - number of such questions"""
+        return {tag: dict(statistics) for tag, statistics in self._statistics_by_tag.items() if statistics["questions"]}
+
+    def get_session_statistics(self):
+        """Statistics of answers given since handler was created (replayed answers are not counted)"""
+        return dict(self._session_statistics)
 
     def reask(self, question):
-        try:
-            i, _ = next((i, uid) for (i, uid) in enumerate(self.question_uids) if question == uid)
-            self.weights[i] *= WeightHandler.REASK_WEIGHT_MULTIPLICATION_COEFF
-        except StopIteration:
-            raise RuntimeError(f"WARNING: Could not find path for question {question}")
+        i = self._find_slot(question)
+        self._set_weight(i, self.weights[i] * WeightHandler.REASK_WEIGHT_MULTIPLICATION_COEFF)
+
+    def _change_record(self, uid, change, in_session=True):
+        self._mark_dirty(uid)
+        info = self._get_writable_record(uid)
+        before = [getattr(info, field) or 0 for field in WeightHandler._STATISTICS_FIELDS]
+        change(info)
+        tag = self.question_uids_to_tags.get(uid) if uid in self._uid_to_slot else None
+        affected = [self._statistics]
+        if tag is not None:
+            affected.append(self._statistics_by_tag[tag])
+        if in_session:
+            affected.append(self._session_statistics)
+        for field, value_before in zip(WeightHandler._STATISTICS_FIELDS, before):
+            delta = (getattr(info, field) or 0) - value_before
+            for statistics in affected:
+                statistics[field] += delta
+        return info
+
+    def _add_to_tag_statistics(self, uid, tag, sign=1):
+        statistics = self._statistics_by_tag.get(tag)
+        if statistics is None:
+            statistics = self._statistics_by_tag[tag] = dict(WeightHandler._blank_statistics(), questions=0)
+        statistics["questions"] += sign
+        info = self._progress.get(uid)
+        if info is not None:
+            self._add_to_statistics(statistics, info, sign)
+
+    @staticmethod
+    def _add_to_statistics(statistics, info, sign=1):
+        for field in WeightHandler._STATISTICS_FIELDS:
+            statistics[field] += sign * (getattr(info, field) or 0)
+
+    @staticmethod
+    def _blank_statistics():
+        return dict.fromkeys(WeightHandler._STATISTICS_FIELDS, 0)
+
+    def _get_writable_record(self, uid):
+        info = self._progress.get(uid)
+        if info is None:
+            info = self._progress[uid] = WeightHandler._blank_question_record()
+        elif uid not in self._unshared_question_uids:
+            info = self._progress[uid] = info.copy()
+        self._unshared_question_uids.add(uid)
+        return info
+
+    def _find_slot(self, question):
+        return self._slots.find_slot(question)
+
+    def _schedule_recency_update(self, uid, heapify=True):
+        info = self._progress.get(uid)
+        if info is None or info.last_success_ts is None:
+            return  # never succeeded, recency multiplier stays the same
+        delta_time_secs = self._now_ts - info.last_success_ts
+        for threshold in WeightHandler._RECENCY_THRESHOLDS:
+            if delta_time_secs <= threshold:
+                entry = (info.last_success_ts + threshold, uid, info.last_success_ts)
+                if heapify:
+                    heapq.heappush(self._recency_updates, entry)
+                else:
+                    self._recency_updates.append(entry)
+                return
+
+    def _set_weight(self, i, weight):
+        self.weights[i] = weight
+        self._sampler.update(i, self._weight_in_sampler(i))
+
+    def _weight_in_sampler(self, i):
+        return 0.0 if self.question_uids[i] in self._suspended_question_uids else self.weights[i]
 
     def _compute_weight(self, info, old_weight=None):
         def _compute_cold_weight():
-            delta_answers = float(info.get("successes", 0) - info.get("failures", 0))
-            delta_time_secs = self._start_ts - info.get("last_success_ts", self._start_ts)
+            delta_answers = float((info.successes or 0) - (info.failures or 0))
+            last_success_ts = info.last_success_ts
+            delta_time_secs = self._now_ts - (last_success_ts if last_success_ts is not None else self._now_ts)
             recency_multiplier = 1 + sum([int(delta_time_secs > delta) for delta in WeightHandler._TIME_LIMITS])
             return recency_multiplier * (1 + max(0.0, -delta_answers)) / (1.0 + max(0.0, delta_answers))
 
@@ -133,19 +495,30 @@ class WeightHandler:
             cold_weight = _compute_cold_weight()
             return float(max(len(self.question_uids) / 4, 5 * cold_weight, 5))
 
-        new_weight = _compute_hot_weight() if info.get("is_hot", False) else _compute_cold_weight()
+        new_weight = _compute_hot_weight() if info.is_hot else _compute_cold_weight()
         if old_weight is not None and old_weight > new_weight:
             # when question is asked correctly we diminish its weight gradually
             # program will show it once or twice in the near future to cement the result
             new_weight = (old_weight + new_weight)/2
         return new_weight
 
+    @staticmethod
+    def _record_success(info, ts):
+        info.successes = (info.successes or 0) + 1
+        info.answered = (info.answered or 0) + 1
+        info.last_success_ts = ts
+        info.is_hot = False
+
+    @staticmethod
+    def _record_failure(info):
+        info.failures = (info.failures or 0) + 1
+        info.answered = (info.answered or 0) + 1
+        info.is_hot = True  # make it hot - ask it soon
+
+    @staticmethod
+    def _record_ambiguity(info):
+        info.answered = (info.answered or 0) + 1
+
     @staticmethod
     def _blank_question_record():
-        return {
-            "successes": 0,
-            "failures": 0,
-            "answered": 0,
-            "last_success_ts": 0,
-            "is_hot": 0
-        }
+        return ProgressRecord(0, 0, 0, 0, 0)
@@ -1,6 +1,10 @@
+import random
+from copy import deepcopy
 import unittest
+from unittest import mock
 
-from weight_handler import WeightHandler
+import weight_engine
+from weight_handler import ProgressEvent, QuestionSlots, WeightHandler
 
 
 class WeightHandlerTest(unittest.TestCase):
@@ -100,6 +104,34 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(len(wh.weights), 2)
         self.assertLess(wh.weights[0], wh.weights[1])
 
+    def test_weights_follow_time_in_long_session(self):
+        day = WeightHandler._SECS_IN_DAY
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag", "path/question3": "tag"},
+            1000000,
+            {"version": 3, "progress": {
+                "path/question1": {"successes": 1, "failures": 0, "answered": 1, "last_success_ts": 1000000 - 100},
+                "path/question2": {"successes": 1, "failures": 0, "answered": 1, "last_success_ts": 0},
+            }})
+        weights = list(wh.weights)
+        self.assertEqual(wh.advance_time(1000000 + day - 200), [])
+        wh.reask("path/question1")
+        self.assertEqual(wh.advance_time(1000000 + day), [("path/question1", 5 * weights[0])])
+        # in-session reask is kept, recency multiplier grows from 1 to 2
+        self.assertEqual(wh.weights, [10 * weights[0], weights[1], weights[2]])
+        wh.success_on_question("path/question3", 1000000 + day)
+        weight = wh.get_weight("path/question3")
+        self.assertEqual(wh.advance_time(1000000 + 2 * day - 99), [])
+        wh.advance_time(1000000 + 2 * day + 1)
+        self.assertEqual(wh.get_weight("path/question3"), 2 * weight)
+        # after a week multiplier is 5 (week is counted thrice), after that it does not change
+        wh.advance_time(1000000 + 7 * day)
+        self.assertEqual(wh.weights[0], 25 * weights[0])
+        wh.advance_time(1000000 + 30 * day)
+        self.assertEqual(wh.weights[0], 25 * weights[0])
+        self.assertEqual(wh.get_weight("path/question3"), 5 * weight)
+        self.assertEqual(wh._recency_updates, [])
+
     def test_weights_depend_on_previous_hotness(self):
         wh = WeightHandler(
             {"path/question1": "tag", "path/question2": "tag"},
@@ -185,7 +217,7 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(len(wh._progress), 0)
         wh.success_on_question("path/question2", 1000000)
         self.assertEqual(len(wh._progress), 1)
-        self.assertGreater(len(wh._progress["path/question2"]), 0)
+        self.assertGreater(len(wh._progress["path/question2"].to_dict()), 0)
 
     def test_weights_record_kept_after_failure(self):
         wh = WeightHandler(
@@ -195,7 +227,7 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(len(wh._progress), 0)
         wh.fail_on_question("path/question2")
         self.assertEqual(len(wh._progress), 1)
-        self.assertGreater(len(wh._progress["path/question2"]), 0)
+        self.assertGreater(len(wh._progress["path/question2"].to_dict()), 0)
 
     def test_weight_relaxed_gradually_after_wrong_then_correct_answer(self):
         wh = WeightHandler(
@@ -206,6 +238,241 @@ class WeightHandlerTest(unittest.TestCase):
         wh.success_on_question("path/question2", 1000000)
         self.assertLess(wh.weights[0], wh.weights[1])  # still greater!
 
+    def test_sampler_follows_weights(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag", "path/question3": "tag"},
+            1000000,
+            None)
+        wh.fail_on_question("path/question1")
+        wh.success_on_question("path/question2", 1000000)
+        wh.reask("path/question3")
+        wh.ambiguity_on_question("path/question3")
+        self.assertEqual([wh._sampler[i] for i in range(3)], wh.weights)
+        self.assertAlmostEqual(wh._sampler.total(), sum(wh.weights))
+
+    def test_sample_question(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag"},
+            1000000,
+            None)
+        rng = random.Random(0)
+        self.assertIn(wh.sample_question(rng), wh.question_uids)
+
+    def test_grading_unknown_question_raises(self):
+        wh = WeightHandler(
+            {"path/question1": "tag"},
+            1000000,
+            None)
+        for grade in (lambda q: wh.success_on_question(q, 1000000),
+                      wh.fail_on_question,
+                      wh.ambiguity_on_question,
+                      wh.reask):
+            with self.assertRaises(RuntimeError):
+                grade("path/question2")
+
+    @unittest.skipUnless(weight_engine.is_available(), "NumPy is not installed")
+    def test_vectorized_weights_identical_to_per_question_weights(self):
+        rng = random.Random(0)
+        now_ts = 100 * WeightHandler._SECS_IN_DAY + 0.5
+        question_uids_to_tags = {f"path/question{i}": "tag" for i in range(1000)}
+        progress = {
+            "version": 3,
+            "progress": {
+                f"path/question{i}": {
+                    "successes": rng.randrange(10),
+                    "failures": rng.randrange(10),
+                    "answered": 0,
+                    "last_success_ts": now_ts - rng.uniform(0, 60 * WeightHandler._SECS_IN_DAY),
+                    "is_hot": rng.random() < 0.3,
+                } for i in range(0, 1000, 2)
+            }
+        }
+        progress["progress"]["path/question0"] = {"successes": 3}  # partial record
+        vectorized = WeightHandler(question_uids_to_tags, now_ts, deepcopy(progress))
+        with mock.patch.object(weight_engine, "is_available", return_value=False):
+            per_question = WeightHandler(question_uids_to_tags, now_ts, deepcopy(progress))
+        self.assertEqual(vectorized.weights, per_question.weights)
+        self.assertTrue(all(type(w) is float for w in vectorized.weights))
+
+    def test_sample_distinct_questions(self):
+        question_uids_to_tags = {f"path/question{i}": "tag" for i in range(10)}
+        wh = WeightHandler(question_uids_to_tags, 1000000, None)
+        wh.fail_on_question("path/question3")
+        weights = list(wh.weights)
+        total = wh._sampler.total()
+        drawn = wh.sample_distinct_questions(5, random.Random(0))
+        keys = [key for key, _ in drawn]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len({uid for _, uid in drawn}), 5)
+        self.assertEqual(wh.weights, weights)
+        self.assertAlmostEqual(wh._sampler.total(), total)
+        all_drawn = wh.sample_distinct_questions(100, random.Random(0))
+        self.assertEqual(sorted(uid for _, uid in all_drawn), sorted(question_uids_to_tags))
+        # hot question has most of weight, so it is drawn first most of the time
+        rng = random.Random(1)
+        first = [wh.sample_distinct_questions(3, rng)[0][1] for _ in range(100)]
+        self.assertGreater(first.count("path/question3"), 50)
+
+    def test_suspended_question_not_drawn(self):
+        wh = WeightHandler({f"path/question{i}": "tag" for i in range(4)}, 1000000, None)
+        for _ in range(3):
+            wh.reask("path/question0")
+        wh.suspend_question("path/question0")
+        wh.suspend_question("path/question3")
+        rng = random.Random(0)
+        self.assertEqual({wh.sample_question(rng) for _ in range(100)}, {"path/question1", "path/question2"})
+        # weight changes of suspended question are kept aside until it is resumed
+        wh.fail_on_question("path/question3")
+        self.assertGreater(wh.get_weight("path/question3"), 1)
+        self.assertAlmostEqual(wh._sampler.total(), wh.weights[1] + wh.weights[2])
+        wh.remove_question("path/question1")
+        wh.rename_question("path/question0", "path/renamed", "tag")
+        self.assertEqual({wh.sample_question(rng) for _ in range(100)}, {"path/question2"})
+        wh.resume_question("path/renamed")
+        wh.resume_question("path/question3")
+        self.assertAlmostEqual(wh._sampler.total(), sum(wh.weights))
+
+    def test_nothing_to_sample_once_every_question_suspended(self):
+        wh = WeightHandler({f"path/question{i}": "tag" for i in range(7)}, 1000000, None)
+        wh.success_on_question("path/question3", 1000000)
+        wh.success_on_question("path/question1", 1000000)
+        wh.fail_on_question("path/question4")
+        wh.success_on_question("path/question6", 1000000)
+        wh.reask("path/question4")
+        wh.success_on_question("path/question1", 1000000)
+        for i in (5, 3, 4, 0, 2, 1, 6):
+            wh.suspend_question(f"path/question{i}")
+        # rounding errors of weight updates are left in total
+        self.assertFalse(wh.can_sample_question())
+        self.assertEqual(wh.sample_distinct_questions(3), [])
+
+    def test_tags_filter(self):
+        wh = WeightHandler({"path/question1": "tag1", "path/question2": "tag2", "path/question3": "tag2"}, 1000000, None)
+        rng = random.Random(0)
+        wh.set_tags_filter(["tag1"])
+        self.assertEqual({wh.sample_question(rng) for _ in range(20)}, {"path/question1"})
+        self.assertEqual([uid for _, uid in wh.sample_distinct_questions(3, rng)], ["path/question1"])
+        wh.rename_question("path/question2", "path/moved", "tag1")
+        wh.add_question("path/question3", "tag1")
+        wh.remove_question("path/question1")
+        self.assertEqual({wh.sample_question(rng) for _ in range(50)}, {"path/moved", "path/question3"})
+        wh.suspend_question("path/moved")
+        wh.suspend_question("path/question3")
+        self.assertFalse(wh.can_sample_question())
+        wh.set_tags_filter(None)
+        wh.add_question("path/question4", "tag2")
+        self.assertTrue(wh.can_sample_question())
+        self.assertEqual(wh.sample_question(rng), "path/question4")
+
+    def test_add_question(self):
+        wh = WeightHandler(
+            {"path/question1": "tag"},
+            1000000,
+            {"version": 3, "progress": {"path/question2": {"successes": 3, "failures": 0, "answered": 3}}})
+        wh.fail_on_question("path/question1")
+        weight_before = wh.weights[0]
+        wh.add_question("path/question2", "tag2")
+        self.assertEqual(wh.question_uids, ["path/question1", "path/question2"])
+        self.assertEqual(wh.weights[0], weight_before)
+        self.assertLess(wh.weights[1], weight_before)
+        self.assertEqual(wh.question_uids_to_tags["path/question2"], "tag2")
+        self.assertAlmostEqual(wh._sampler.total(), sum(wh.weights))
+        wh.success_on_question("path/question2", 1000000)
+
+    def test_remove_question(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag", "path/question3": "tag"},
+            1000000,
+            None)
+        wh.reask("path/question3")
+        weight_before = wh.weights[2]
+        wh.remove_question("path/question1")
+        self.assertEqual(sorted(wh.question_uids), ["path/question2", "path/question3"])
+        self.assertEqual(wh.weights[wh.question_uids.index("path/question3")], weight_before)
+        self.assertNotIn("path/question1", wh.question_uids_to_tags)
+        self.assertAlmostEqual(wh._sampler.total(), sum(wh.weights))
+        with self.assertRaises(RuntimeError):
+            wh.reask("path/question1")
+        wh.reask("path/question3")
+
+    def test_rename_question_keeps_progress_and_weight(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag"},
+            1000000,
+            None)
+        wh.fail_on_question("path/question1")
+        weight_before = wh.weights[0]
+        wh.rename_question("path/question1", "path/renamed", "tag2")
+        self.assertEqual(wh.question_uids, ["path/renamed", "path/question2"])
+        self.assertEqual(wh.weights[0], weight_before)
+        self.assertEqual(wh._progress["path/renamed"].failures, 1)
+        self.assertNotIn("path/question1", wh._progress)
+        self.assertEqual(wh.question_uids_to_tags["path/renamed"], "tag2")
+
+    def test_prune_selected(self):
+        wh = WeightHandler(
+            {"path/question1": "tag"},
+            1000100,
+            {
+                "version": 3,
+                "progress": {
+                    "path/question1": {"successes": 1, "failures": 0, "answered": 1},
+                    "path/question2": {"successes": 1, "failures": 0, "answered": 1},
+                    "path/question3": {"successes": 1, "failures": 0, "answered": 1},
+                }
+            })
+        wh.prune_progress_info(["path/question1", "path/question2"])
+        self.assertEqual(sorted(wh._progress), ["path/question1", "path/question3"])
+
+    def test_dirty_question_uids(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag", "path/question3": "tag"},
+            1000000,
+            {"version": 3, "progress": {"path/removed": {"successes": 1, "failures": 0, "answered": 1}}})
+        self.assertEqual(set(wh.take_changes_since_save()), set())
+        wh.success_on_question("path/question1", 1000000)
+        wh.fail_on_question("path/question2")
+        wh.reask("path/question3")
+        wh.prune_progress_info()
+        self.assertEqual(set(wh.take_changes_since_save()), {"path/question1", "path/question2", "path/removed"})
+        self.assertEqual(set(wh.take_changes_since_save()), set())
+
+    def test_snapshot_not_affected_by_later_answers(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag"},
+            1000000,
+            {"version": 3, "progress": {"path/question1": {"successes": 1, "failures": 0, "answered": 1}}})
+        snapshot = wh.get_savable_progress()
+        snapshot_copy = deepcopy(snapshot)
+        wh.fail_on_question("path/question1")
+        wh.fail_on_question("path/question1")
+        wh.success_on_question("path/question2", 1000000)
+        self.assertEqual(snapshot, snapshot_copy)
+        self.assertEqual(wh._progress["path/question1"].failures, 2)
+        new_snapshot = wh.get_savable_progress()
+        self.assertEqual(new_snapshot["progress"]["path/question1"].failures, 2)
+        self.assertEqual(new_snapshot["progress"]["path/question2"].successes, 1)
+
+    def test_snapshot_shares_untouched_records(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag"},
+            1000000,
+            {"version": 3, "progress": {"path/question1": {"successes": 1, "failures": 0, "answered": 1},
+                                        "path/question2": {"successes": 1, "failures": 0, "answered": 1}}})
+        snapshot = wh.get_savable_progress()
+        wh.fail_on_question("path/question1")
+        self.assertIs(snapshot["progress"]["path/question2"], wh._progress["path/question2"])
+        self.assertIsNot(snapshot["progress"]["path/question1"], wh._progress["path/question1"])
+
+    def test_partial_snapshot(self):
+        wh = WeightHandler(
+            {"path/question1": "tag", "path/question2": "tag"},
+            1000000,
+            None)
+        wh.fail_on_question("path/question1")
+        snapshot = wh.get_savable_progress({"path/question1", "path/question2"})
+        self.assertEqual(list(snapshot["progress"]), ["path/question1"])
+
     def test_prune(self):
         wh = WeightHandler(
             {"path/question1": "tag"},
@@ -228,7 +495,7 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(len(wh._progress), 2)
         wh.prune_progress_info()
         self.assertEqual(len(wh._progress), 1)
-        self.assertGreater(len(wh._progress["path/question1"]), 0)
+        self.assertGreater(len(wh._progress["path/question1"].to_dict()), 0)
 
     def test_statistics(self):
         wh = WeightHandler(
@@ -254,6 +521,48 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(statistics["failures"], 4)
         self.assertEqual(statistics["answered"], 5)
 
+    def test_statistics_kept_up_to_date(self):
+        def recount(wh):
+            statistics = {"successes": 0, "failures": 0, "answered": 0}
+            statistics_by_tag = {}
+            for uid, info in wh._progress.items():
+                for k in statistics:
+                    statistics[k] += getattr(info, k) or 0
+            for uid, tag in wh.question_uids_to_tags.items():
+                tag_statistics = statistics_by_tag.setdefault(
+                    tag, {"successes": 0, "failures": 0, "answered": 0, "questions": 0})
+                tag_statistics["questions"] += 1
+                for k in statistics:
+                    tag_statistics[k] += getattr(wh._progress.get(uid), k, 0) or 0
+            return statistics, statistics_by_tag
+
+        wh = WeightHandler(
+            {"path/question1": "tag1", "path/question2": "tag1", "path/question3": "tag2"},
+            1000100,
+            {"version": 3, "progress": {
+                "path/question1": {"successes": 1, "failures": 0, "answered": 2},
+                "path/question2": {"successes": 2, "failures": 4, "answered": 7},
+                "path/removed": {"successes": 5, "failures": 5, "answered": 10},
+            }})
+        self.assertEqual((wh.get_statistics(), wh.get_statistics_by_tag()), recount(wh))
+        wh.success_on_question("path/question1", 1000100)
+        wh.fail_on_question("path/question3")
+        wh.ambiguity_on_question("path/question3")
+        wh.reask("path/question3")
+        self.assertEqual(wh.get_session_statistics(), {"successes": 1, "failures": 1, "answered": 3})
+        wh.replay_progress_events([(ProgressEvent.SUCCESS, "path/question2", 1000000)])
+        self.assertEqual(wh.get_session_statistics(), {"successes": 1, "failures": 1, "answered": 3})
+        wh.prune_progress_info()
+        wh.rename_question("path/question1", "path/renamed", "tag2")
+        wh.add_question("path/added", "tag3")
+        wh.add_question("path/question2", "tag3")
+        wh.remove_question("path/question3")
+        wh.rename_question("path/renamed", "path/question2", "tag1")
+        self.assertEqual((wh.get_statistics(), wh.get_statistics_by_tag()), recount(wh))
+        # record of question2 was replaced by renamed question1, removed question3 was not pruned
+        self.assertEqual(wh.get_statistics(), {"successes": 2, "failures": 1, "answered": 5})
+        self.assertEqual(sorted(wh.get_statistics_by_tag()), ["tag1", "tag3"])
+
     def test_retrieve_tags(self):
         wh = WeightHandler(
             {"path/question1": "tag1", "path/question2": "tag2"},
@@ -262,6 +571,24 @@ class WeightHandlerTest(unittest.TestCase):
         self.assertEqual(wh.question_uids_to_tags["path/question1"], "tag1")
         self.assertEqual(wh.question_uids_to_tags["path/question2"], "tag2")
 
+    def test_shared_questions_changed_for_every_handler(self):
+        slots = QuestionSlots({"path/question1": "tag1", "path/question2": "tag1", "path/question3": "tag2"})
+        first = WeightHandler(slots, 1000000, None)
+        second = WeightHandler(slots, 1000000, None)
+        first.fail_on_question("path/question3")
+        slots.remove_question("path/question1")
+        slots.rename_question("path/question3", "path/renamed", "tag1")
+        second.add_question("path/question4", "tag2")
+        self.assertEqual(first.question_uids, ["path/renamed", "path/question2", "path/question4"])
+        self.assertIs(first.question_uids, second.question_uids)
+        self.assertGreater(first.get_weight("path/renamed"), first.get_weight("path/question2"))
+        self.assertEqual(second.get_weight("path/renamed"), second.get_weight("path/question2"))
+        for wh in (first, second):
+            self.assertEqual(len(wh.weights), 3)
+            self.assertEqual({tag: s["questions"] for tag, s in wh.get_statistics_by_tag().items()},
+                             {"tag1": 2, "tag2": 1})
+            self.assertIn(wh.sample_question(random.Random(0)), wh.question_uids)
+
 
 if __name__ == '__main__':
     unittest.main()